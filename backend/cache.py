@@ -0,0 +1,442 @@
+"""
+Cachés de la API con backend intercambiable.
+
+Todas las cachés del servidor (usuario autenticado, empresas, contexto
+normativo, recomendaciones de IA) usan `get_cache().namespace(...)`:
+
+- L1: LRU en memoria del proceso, siempre presente
+- L2: backend compartido opcional (Redis) para que varios workers de uvicorn
+  compartan los aciertos
+
+Las invalidaciones (`invalidate`, `clear`) borran L1 y L2 y se publican en un
+canal para que los demás workers descarten su copia local. Sin backend
+compartido el canal es local al proceso.
+
+Los PDF renderizados usan `DiskCache`, con la misma interfaz, porque sus
+claves ya incluyen las marcas de versión y no necesitan invalidación.
+
+`get_or_set` no guarda el resultado del factory si hubo una invalidación
+mientras se calculaba: el valor pudo leerse antes del cambio.
+
+CACHE_BACKEND: local (por defecto) o redis
+REDIS_URL: conexión a Redis (por defecto redis://localhost:6379/0)
+CACHE_LOCAL_MAX_ENTRIES: tamaño del LRU local (por defecto 5000)
+CACHE_LOCAL_TTL_S: vida máxima en L1 con backend compartido, por si se pierde
+  un mensaje de invalidación (por defecto 30)
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from metrics import CACHE_LOOKUPS
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional: only needed with CACHE_BACKEND=redis
+    aioredis = None
+
+INVALIDATION_CHANNEL = "auditx:cache:invalidate"
+
+
+class CacheBackend:
+    """Key/value store; `None` means a miss, so `None` values are never cached"""
+
+    async def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+    async def publish(self, message: str):
+        """Broadcast an invalidation message to the other workers (shared backends only)"""
+        raise NotImplementedError
+
+    def messages(self):
+        """Async iterator over invalidation messages published by any worker"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class LocalCache(CacheBackend):
+    """In-process LRU with per-entry TTL. Mutable values are copied in and out"""
+
+    def __init__(self, max_entries: int = 5000, max_ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get_nowait(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def set_nowait(self, key: str, value: Any, ttl: Optional[float] = None):
+        if self.max_ttl is not None:
+            ttl = min(ttl, self.max_ttl) if ttl else self.max_ttl
+        stored = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        self._entries[key] = (stored, time.monotonic() + ttl if ttl else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete_nowait(self, key: str):
+        self._entries.pop(key, None)
+
+    def delete_prefix_nowait(self, prefix: str):
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+    def clear_nowait(self):
+        self._entries.clear()
+
+    async def get(self, key: str) -> Any:
+        return self.get_nowait(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.set_nowait(key, value, ttl)
+
+    async def delete(self, key: str):
+        self.delete_nowait(key)
+
+    async def delete_prefix(self, prefix: str):
+        self.delete_prefix_nowait(prefix)
+
+
+class RedisCache(CacheBackend):
+    """Shared backend. Bytes are stored raw; everything else as JSON"""
+
+    def __init__(self, url: str):
+        if aioredis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requiere el paquete 'redis'")
+        self.redis = aioredis.from_url(url)
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return b"B" + value
+        return b"J" + json.dumps(value, default=str).encode("utf-8")
+
+    @staticmethod
+    def _decode(raw: Optional[bytes]) -> Any:
+        if raw is None:
+            return None
+        if raw[:1] == b"B":
+            return raw[1:]
+        return json.loads(raw[1:])
+
+    async def get(self, key: str) -> Any:
+        return self._decode(await self.redis.get(key))
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self.redis.set(key, self._encode(value), px=int(ttl * 1000) if ttl else None)
+
+    async def delete(self, key: str):
+        await self.redis.delete(key)
+
+    async def delete_prefix(self, prefix: str):
+        batch = []
+        async for key in self.redis.scan_iter(match=f"{prefix}*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.redis.delete(*batch)
+                batch.clear()
+        if batch:
+            await self.redis.delete(*batch)
+
+    async def publish(self, message: str):
+        await self.redis.publish(INVALIDATION_CHANNEL, message)
+
+    async def messages(self):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+class DiskCache(CacheBackend):
+    """
+    Bytes values as files in a directory shared by the workers of a host.
+    Writes are atomic (temp file + rename) so readers never see a partial
+    value; least recently used files are evicted past `max_bytes`. File names
+    are key hashes, so each file starts with its key (see `_HEADER`) for
+    `delete_prefix` to find entries by key.
+    """
+
+    _MAGIC = b"AXC1"
+    _HEADER = struct.Struct(">4sI")  # magic, key length
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ".bin"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}{self.suffix}"
+
+    def _split(self, data: bytes) -> tuple:
+        """(key, value) of a stored file; key is None for files without a valid header"""
+        if len(data) < self._HEADER.size:
+            return None, None
+        magic, key_length = self._HEADER.unpack_from(data)
+        start = self._HEADER.size + key_length
+        if magic != self._MAGIC or len(data) < start:
+            return None, None
+        return data[self._HEADER.size:start].decode("utf-8", "replace"), data[start:]
+
+    def _read_key(self, path: Path) -> Optional[str]:
+        with open(path, "rb") as f:
+            header = f.read(self._HEADER.size)
+            if len(header) < self._HEADER.size:
+                return None
+            magic, key_length = self._HEADER.unpack(header)
+            if magic != self._MAGIC:
+                return None
+            return f.read(key_length).decode("utf-8", "replace")
+
+    def _get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        stored_key, value = self._split(data)
+        if stored_key != key:
+            return None
+        os.utime(path)  # mark as recently used
+        return value
+
+    def _set(self, key: str, value: bytes):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            encoded_key = key.encode("utf-8")
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._HEADER.pack(self._MAGIC, len(encoded_key)))
+                f.write(encoded_key)
+                f.write(value)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        await asyncio.to_thread(self._set, key, value)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+    def _delete_prefix(self, prefix: str):
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                key = self._read_key(path)
+            except FileNotFoundError:
+                continue
+            # Files without a header (older format) cannot be matched: drop them too
+            if key is None or key.startswith(prefix):
+                path.unlink(missing_ok=True)
+
+    async def delete_prefix(self, prefix: str):
+        await asyncio.to_thread(self._delete_prefix, prefix)
+
+
+# ====================
+# TWO-TIER CACHE + INVALIDATION
+# ====================
+
+class Cache:
+    def __init__(self, local: LocalCache, shared: Optional[CacheBackend] = None):
+        self.local = local
+        self.shared = shared
+        self.instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        # Bumped on every invalidation (local or from another worker) so that
+        # get_or_set can tell whether its factory raced with one
+        self.generation = 0
+
+    def namespace(self, name: str, ttl: Optional[float] = None) -> "CacheNamespace":
+        return CacheNamespace(self, name, ttl)
+
+    async def get(self, key: str, namespace: str = "-") -> Any:
+        value = self.local.get_nowait(key)
+        if value is not None:
+            CACHE_LOOKUPS.labels(namespace, "hit_local").inc()
+            return value
+        if self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                logging.warning(f"Cache compartida no disponible: {e}")
+                value = None
+            if value is not None:
+                CACHE_LOOKUPS.labels(namespace, "hit_shared").inc()
+                self.local.set_nowait(key, value)
+                return value
+        CACHE_LOOKUPS.labels(namespace, "miss").inc()
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        if value is None:
+            return
+        self.local.set_nowait(key, value, ttl)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value, ttl)
+            except Exception as e:
+                logging.warning(f"Cache compartida no disponible: {e}")
+
+    async def invalidate(self, key: str, prefix: bool = False):
+        """Drop a key (or every key under a prefix) here, in the shared backend and in every other worker"""
+        self.generation += 1
+        if prefix:
+            self.local.delete_prefix_nowait(key)
+        else:
+            self.local.delete_nowait(key)
+        if self.shared is None:
+            return
+        try:
+            if prefix:
+                await self.shared.delete_prefix(key)
+            else:
+                await self.shared.delete(key)
+            message = json.dumps({"origin": self.instance_id, "key": key, "prefix": prefix})
+            await self.shared.publish(message)
+        except Exception as e:
+            logging.warning(f"No se pudo propagar la invalidación de caché {key}: {e}")
+
+    async def _listen(self):
+        while True:
+            try:
+                async for message in self.shared.messages():
+                    data = json.loads(message)
+                    if data.get("origin") == self.instance_id:
+                        continue
+                    self.generation += 1
+                    if data.get("prefix"):
+                        self.local.delete_prefix_nowait(data["key"])
+                    else:
+                        self.local.delete_nowait(data["key"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries may have been missed while disconnected: start clean
+                logging.warning(f"Canal de invalidación de caché desconectado: {e}")
+                self.local.clear_nowait()
+                self.generation += 1
+                await asyncio.sleep(1)
+
+    async def start(self):
+        if self.shared is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self.shared is not None:
+            await self.shared.close()
+
+
+class CacheNamespace:
+    """Keys prefixed with the namespace name and a default TTL"""
+
+    def __init__(self, cache: Cache, name: str, ttl: Optional[float] = None):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def get(self, key: str) -> Any:
+        return await self.cache.get(self._key(key), self.name)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self.cache.set(self._key(key), value, ttl or self.ttl)
+
+    async def get_or_set(self, key: str, factory: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """Cached value, or the factory's. An invalidation during the factory call skips the write,
+        since the value may have been computed from data that changed meanwhile"""
+        value = await self.get(key)
+        if value is None:
+            generation = self.cache.generation
+            value = await factory()
+            if self.cache.generation == generation:
+                await self.set(key, value, ttl)
+        return value
+
+    async def invalidate(self, key: str):
+        await self.cache.invalidate(self._key(key))
+
+    async def clear(self):
+        await self.cache.invalidate(f"{self.name}:", prefix=True)
+
+
+_cache: Optional[Cache] = None
+
+
+def get_cache() -> Cache:
+    """Process-wide cache selected by CACHE_BACKEND"""
+    global _cache
+    if _cache is None:
+        backend = os.getenv("CACHE_BACKEND", "local")
+        max_entries = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "5000"))
+        if backend == "redis":
+            shared = RedisCache(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+            local = LocalCache(max_entries, max_ttl=float(os.getenv("CACHE_LOCAL_TTL_S", "30")))
+            _cache = Cache(local, shared)
+        elif backend == "local":
+            _cache = Cache(LocalCache(max_entries))
+        else:
+            raise ValueError(f"CACHE_BACKEND desconocido: {backend}")
+    return _cache
@@ -0,0 +1,231 @@
+"""
+Borrado en cascada en segundo plano para empresas y auditorías.
+
+Los documentos principales (empresa/usuario o auditoría) se eliminan dentro de
+la petición para que desaparezcan de inmediato de los listados; todo lo que
+depende de ellos se purga aquí por lotes, registrando el avance en la
+colección `purge_jobs` para poder consultarlo y reanudarlo.
+
+Cada URL de almacenamiento referenciada es una referencia del contenido
+compartido (object_storage.py), así que se guardan todas, repetidas incluidas:
+`storage_urls` las que indica la petición y `storage_refs.<auditoría>` las de
+cada auditoría purgada. Antes de liberar una referencia se reclama en
+`released` del trabajo; un trabajo reanudado o ejecutado por dos procesos a la
+vez nunca libera dos veces la misma (si el proceso cae entre la marca y la
+liberación se pierde una referencia, nunca se borra contenido en uso).
+"""
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from norma_content import delete_contents
+from object_storage import ObjectStore
+from response_map import responses_list
+
+PURGE_BATCH_SIZE = 500
+STORAGE_DELETE_CONCURRENCY = 8
+
+# Keep references so resumed tasks are not garbage-collected mid-run
+_resumed_tasks = set()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def evidence_urls(inspection: Dict[str, Any]) -> List[str]:
+    """Storage URLs referenced by the evidence images of an inspection"""
+    urls = []
+    for response in responses_list(inspection):
+        for image in response.get('evidence_images') or []:
+            if image.get('url'):
+                urls.append(image['url'])
+    return urls
+
+
+def dropped_evidence_urls(inspection: Dict[str, Any], responses: List[Dict[str, Any]]) -> List[str]:
+    """Evidence URLs of an inspection that `responses` (its new content) no longer reference, repeats counted"""
+    kept = Counter(image['url'] for response in responses
+                   for image in response.get('evidence_images') or [] if image.get('url'))
+    return list((Counter(evidence_urls(inspection)) - kept).elements())
+
+
+async def release_urls(db, urls: List[str]):
+    """Release the storage references behind `urls` (failures are logged, the content is then kept)"""
+    store = ObjectStore(db)
+    for url in urls:
+        try:
+            await store.release_url(url)
+        except Exception as e:
+            logging.error(f"No se pudo liberar {url}: {e}")
+
+
+async def create_purge_job(db, kind: str, target_id: str, company_id: Optional[str] = None,
+                           user_id: Optional[str] = None, inspection_ids: Optional[List[str]] = None,
+                           storage_urls: Optional[List[str]] = None) -> str:
+    """Persist a purge job describing everything needed to finish it later"""
+    job = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,  # company, inspection
+        "target_id": target_id,
+        "company_id": company_id,
+        "user_id": user_id,
+        "inspection_ids": inspection_ids or [],
+        "storage_urls": storage_urls or [],
+        "status": "pending",  # pending, running, completed, failed
+        "progress": {"deleted": {}, "storage_deleted": 0, "storage_failed": 0, "step": None},
+        "error": None,
+        "created_at": _now(),
+        "updated_at": _now(),
+    }
+    await db.purge_jobs.insert_one(job)
+    return job["id"]
+
+
+async def _report(db, job_id: str, **fields):
+    update = {f"progress.{key}": value for key, value in fields.items()}
+    update["updated_at"] = _now()
+    await db.purge_jobs.update_one({"id": job_id}, {"$set": update})
+
+
+async def _count_deleted(db, job_id: str, collection: str, count: int):
+    if count:
+        await db.purge_jobs.update_one(
+            {"id": job_id},
+            {"$inc": {f"progress.deleted.{collection}": count}, "$set": {"updated_at": _now()}}
+        )
+
+
+async def _purge_inspection_batch(db, job_id: str, inspection_ids: List[str]):
+    """Delete a batch of inspections and their analyses, recording referenced storage URLs on the job first"""
+    refs = {}
+    async for inspection in db.inspections.find({"id": {"$in": inspection_ids}}, {"_id": 0, "id": 1, "responses": 1}):
+        urls = evidence_urls(inspection)
+        if urls:
+            # Keyed by inspection: collecting it again after a crash overwrites instead of duplicating
+            refs[f"storage_refs.{inspection['id']}"] = urls
+    if refs:
+        await db.purge_jobs.update_one({"id": job_id}, {"$set": refs})
+
+    analyses, inspections = await asyncio.gather(
+        db.ai_analyses.delete_many({"inspection_id": {"$in": inspection_ids}}),
+        db.inspections.delete_many({"id": {"$in": inspection_ids}}),
+    )
+    await _count_deleted(db, job_id, "ai_analyses", analyses.deleted_count)
+    await _count_deleted(db, job_id, "inspections", inspections.deleted_count)
+
+
+async def _purge_company_data(db, job: Dict[str, Any]):
+    job_id = job["id"]
+    company_id = job["company_id"]
+
+    await _report(db, job_id, step="inspections")
+    batch = []
+    async for inspection in db.inspections.find({"company_id": company_id}, {"_id": 0, "id": 1}).batch_size(PURGE_BATCH_SIZE):
+        batch.append(inspection["id"])
+        if len(batch) >= PURGE_BATCH_SIZE:
+            await _purge_inspection_batch(db, job_id, batch)
+            batch = []
+    if batch:
+        await _purge_inspection_batch(db, job_id, batch)
+
+    await _report(db, job_id, step="dependents")
+    norma_ids = [n["id"] async for n in db.normas_especificas.find({"company_id": company_id}, {"_id": 0, "id": 1})]
+    await delete_contents(db, "especifica", norma_ids)
+    configs, normas, resets = await asyncio.gather(
+        db.configuraciones_auditoria.delete_many({"company_id": company_id}),
+        db.normas_especificas.delete_many({"company_id": company_id}),
+        db.password_resets.delete_many({"user_id": job.get("user_id")}),
+    )
+    await _count_deleted(db, job_id, "configuraciones_auditoria", configs.deleted_count)
+    await _count_deleted(db, job_id, "normas_especificas", normas.deleted_count)
+    await _count_deleted(db, job_id, "password_resets", resets.deleted_count)
+
+
+async def _purge_inspection_data(db, job: Dict[str, Any]):
+    job_id = job["id"]
+    inspection_ids = job.get("inspection_ids") or [job["target_id"]]
+
+    await _report(db, job_id, step="inspections")
+    for start in range(0, len(inspection_ids), PURGE_BATCH_SIZE):
+        await _purge_inspection_batch(db, job_id, inspection_ids[start:start + PURGE_BATCH_SIZE])
+
+
+def storage_references(job: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(reference id, url) for every storage reference held by the purged documents"""
+    refs = [(f"job-{index}", url) for index, url in enumerate(job.get("storage_urls") or [])]
+    for inspection_id, urls in (job.get("storage_refs") or {}).items():
+        refs.extend((f"{inspection_id}-{index}", url) for index, url in enumerate(urls))
+    return refs
+
+
+async def _purge_storage(db, job_id: str):
+    """Release storage references with bounded concurrency, each at most once; shared content survives until its last reference goes"""
+    store = ObjectStore(db)
+    job = await db.purge_jobs.find_one({"id": job_id}, {"_id": 0, "storage_urls": 1, "storage_refs": 1, "released": 1})
+    refs = storage_references(job)
+    released = job.get("released") or {}
+    await _report(db, job_id, step="storage", storage_total=len(refs))
+    semaphore = asyncio.Semaphore(STORAGE_DELETE_CONCURRENCY)
+
+    async def release(ref_id: str, url: str) -> Optional[bool]:
+        async with semaphore:
+            claimed = await db.purge_jobs.update_one(
+                {"id": job_id, f"released.{ref_id}": {"$exists": False}},
+                {"$set": {f"released.{ref_id}": _now()}}
+            )
+            if not claimed.modified_count:
+                return None  # released by an earlier or concurrent run
+            return await store.release_url(url)
+
+    results = await asyncio.gather(*(release(ref_id, url) for ref_id, url in refs if ref_id not in released),
+                                   return_exceptions=True)
+    deleted = sum(1 for r in results if r is True)
+    failed = sum(1 for r in results if r is not True and r is not None)
+    if deleted or failed:
+        await db.purge_jobs.update_one(
+            {"id": job_id},
+            {"$inc": {"progress.storage_deleted": deleted, "progress.storage_failed": failed},
+             "$set": {"updated_at": _now()}}
+        )
+
+
+async def run_purge_job(db, job_id: str):
+    """Run (or resume) a purge job; every step can be repeated safely (storage references are released once)"""
+    job = await db.purge_jobs.find_one_and_update(
+        {"id": job_id, "status": {"$in": ["pending", "running"]}},
+        {"$set": {"status": "running", "updated_at": _now()}},
+        projection={"_id": 0},
+    )
+    if not job:
+        return
+
+    try:
+        if job["kind"] == "company":
+            await _purge_company_data(db, job)
+        else:
+            await _purge_inspection_data(db, job)
+
+        await _purge_storage(db, job_id)
+        await db.purge_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "completed", "progress.step": "done", "completed_at": _now(), "updated_at": _now()}}
+        )
+        logging.info(f"Purge job {job_id} ({job['kind']} {job['target_id']}) completed")
+    except Exception as e:
+        logging.error(f"Purge job {job_id} failed: {e}")
+        await db.purge_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "failed", "error": str(e), "updated_at": _now()}}
+        )
+
+
+async def resume_purge_jobs(db):
+    """Resume jobs interrupted by a restart"""
+    async for job in db.purge_jobs.find({"status": {"$in": ["pending", "running"]}}, {"_id": 0, "id": 1}):
+        task = asyncio.create_task(run_purge_job(db, job["id"]))
+        _resumed_tasks.add(task)
+        task.add_done_callback(_resumed_tasks.discard)
@@ -0,0 +1,354 @@
+"""
+Ciclo de vida del cliente MongoDB.
+
+El cliente se crea en el lifespan de la aplicación (no al importar el módulo),
+con el pool configurado por variables de entorno, y se precalienta antes de
+aceptar tráfico. Un listener del pool lleva estadísticas de conexiones en uso
+y esperas de checkout para el endpoint de readiness y Prometheus.
+
+MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE: tamaño del pool por proceso (100 / 0)
+MONGO_MAX_IDLE_TIME_MS: cierre de conexiones ociosas
+MONGO_CONNECT_TIMEOUT_MS / MONGO_SOCKET_TIMEOUT_MS / MONGO_SERVER_SELECTION_TIMEOUT_MS
+MONGO_WAIT_QUEUE_TIMEOUT_MS: espera máxima por una conexión libre
+MONGO_WARMUP_CONNECTIONS: conexiones abiertas antes de aceptar tráfico (por defecto, el mínimo del pool o 1)
+
+Lecturas en secundarios (MONGO_SECONDARY_READS=1, requiere replica set): las rutas
+que toleran datos algo atrasados declaran `Depends(mongo.prefer_secondary)` y sus
+lecturas van a secundarios con secondaryPreferred (acotado por
+MONGO_MAX_STALENESS_S, mínimo 90; un valor menor impide arrancar). Para que
+"guardar y luego ver" siga siendo consistente, cada escritura devuelve la
+cabecera X-Causal-Token con el tiempo de operación del primario; si el cliente
+la reenvía, la lectura se hace en una sesión causal que espera a que el
+secundario haya aplicado esa escritura.
+"""
+import asyncio
+import base64
+import contextvars
+import functools
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import bson
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import monitoring
+from pymongo.read_preferences import SecondaryPreferred
+
+from metrics import MONGO_POOL_CHECKOUT_WAIT, MONGO_POOL_CONNECTIONS
+
+POOL_OPTION_ENV = {
+    "maxPoolSize": "MONGO_MAX_POOL_SIZE",
+    "minPoolSize": "MONGO_MIN_POOL_SIZE",
+    "maxIdleTimeMS": "MONGO_MAX_IDLE_TIME_MS",
+    "connectTimeoutMS": "MONGO_CONNECT_TIMEOUT_MS",
+    "socketTimeoutMS": "MONGO_SOCKET_TIMEOUT_MS",
+    "serverSelectionTimeoutMS": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+    "waitQueueTimeoutMS": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+}
+
+
+CAUSAL_TOKEN_HEADER = "X-Causal-Token"
+MIN_MAX_STALENESS_S = 90  # smallest maxStalenessSeconds MongoDB accepts
+
+# Collection methods that take the causal session in secondary-routed requests
+SESSION_READ_METHODS = {"find", "find_one", "count_documents", "aggregate", "distinct"}
+
+# Read routing for the current request, set by MongoConnection.prefer_secondary
+_read_policy: contextvars.ContextVar[Optional["ReadPolicy"]] = contextvars.ContextVar("auditx_read_policy", default=None)
+
+
+def pool_options() -> Dict[str, int]:
+    """Client keyword arguments for every pool setting present in the environment"""
+    return {option: int(os.environ[env]) for option, env in POOL_OPTION_ENV.items() if os.getenv(env)}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters. Motor runs pymongo operations in worker threads;
+    check-out start and completion fire on the same thread, so the start time
+    is kept in a thread-local to measure how long each checkout waited.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=window)
+
+    def _publish(self):
+        MONGO_POOL_CONNECTIONS.labels("open").set(self.open)
+        MONGO_POOL_CONNECTIONS.labels("in_use").set(self.in_use)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        wait = time.perf_counter() - started if started is not None else 0.0
+        self._local.started = None
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.max_wait = max(self.max_wait, wait)
+            self.recent_waits.append(wait)
+            self._publish()
+        MONGO_POOL_CHECKOUT_WAIT.observe(wait)
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+            self._publish()
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self._publish()
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(0, self.open - 1)
+            self._publish()
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = list(self.recent_waits)
+            return {
+                "open": self.open,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_wait_ms": {
+                    "p50": round(_percentile(waits, 50) * 1000, 3),
+                    "p95": round(_percentile(waits, 95) * 1000, 3),
+                    "p99": round(_percentile(waits, 99) * 1000, 3),
+                    "max": round(self.max_wait * 1000, 3),
+                    "samples": len(waits),
+                },
+            }
+
+
+class ReadPolicy:
+    def __init__(self, database, session=None):
+        self.database = database
+        self.session = session
+
+
+class SessionCollection:
+    """Collection wrapper that passes the request's causal session to read methods"""
+
+    def __init__(self, collection: AsyncIOMotorCollection, session):
+        self._collection = collection
+        self._session = session
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._collection, name)
+        if name in SESSION_READ_METHODS:
+            return functools.partial(attr, session=self._session)
+        return attr
+
+
+class DatabaseProxy:
+    """
+    Stand-in for the Motor database while the client does not exist yet, so
+    modules can keep a module-level `db` and use `db.collection` as before.
+    Inside a secondary-routed request the primary proxy follows the request's
+    read policy; `secondary=True` always reads from secondaries (for streaming
+    exports that outlive the request's dependencies).
+    """
+
+    def __init__(self, connection: "MongoConnection", secondary: bool = False):
+        self._connection = connection
+        self._secondary = secondary
+
+    def _database(self):
+        if self._connection.database is None:
+            raise RuntimeError("El cliente MongoDB no está iniciado (lifespan de la aplicación)")
+        return self._connection.secondary_database if self._secondary else self._connection.database
+
+    def _target(self):
+        policy = _read_policy.get()
+        if policy is None or self._secondary:
+            return self._database(), None
+        return policy.database, policy.session
+
+    @staticmethod
+    def _bind(attr, session):
+        if session is not None and isinstance(attr, AsyncIOMotorCollection):
+            return SessionCollection(attr, session)
+        return attr
+
+    def __getattr__(self, name: str):
+        database, session = self._target()
+        return self._bind(getattr(database, name), session)
+
+    def __getitem__(self, name: str):
+        database, session = self._target()
+        return self._bind(database[name], session)
+
+
+def max_staleness() -> int:
+    """MONGO_MAX_STALENESS_S, or -1 (no limit) when unset"""
+    value = int(os.getenv("MONGO_MAX_STALENESS_S", "0"))
+    if value and value < MIN_MAX_STALENESS_S:
+        raise ValueError(
+            f"MONGO_MAX_STALENESS_S={value} no es válido: el mínimo que acepta MongoDB es {MIN_MAX_STALENESS_S} segundos"
+        )
+    return value or -1
+
+
+class MongoConnection:
+    def __init__(self, url: str, db_name: str, event_listeners: Optional[list] = None, token_secret: str = ""):
+        self.url = url
+        self.db_name = db_name
+        self.event_listeners = list(event_listeners or [])
+        self.pool_stats = PoolStats()
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.database = None
+        self.secondary_database = None
+        self.db = DatabaseProxy(self)
+        self.secondary_db = DatabaseProxy(self, secondary=True)
+        self.options = pool_options()
+        self.secondary_reads = os.getenv("MONGO_SECONDARY_READS", "").lower() in ("1", "true", "yes")
+        self.max_staleness = max_staleness()
+        self._token_key = hashlib.sha256(f"causal-token|{token_secret}".encode("utf-8")).digest()
+
+    async def start(self):
+        """Create the client and open the warm-up connections before serving requests"""
+        self.client = AsyncIOMotorClient(
+            self.url,
+            event_listeners=[*self.event_listeners, self.pool_stats],
+            **self.options
+        )
+        self.database = self.client[self.db_name]
+        self.secondary_database = self.database
+        if self.secondary_reads:
+            self.secondary_database = self.database.with_options(
+                read_preference=SecondaryPreferred(max_staleness=self.max_staleness)
+            )
+        warmup = int(os.getenv("MONGO_WARMUP_CONNECTIONS", "0")) or self.options.get("minPoolSize") or 1
+        # Concurrent pings force the pool to open `warmup` sockets (TLS/auth handshakes included)
+        await asyncio.gather(*[self.database.command("ping") for _ in range(warmup)])
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.database = None
+            self.secondary_database = None
+
+    async def readiness(self) -> Dict[str, Any]:
+        """Ping latency plus pool statistics; raises if the database is unreachable"""
+        start = time.perf_counter()
+        await self.db.command("ping")
+        return {
+            "status": "ready",
+            "ping_ms": round((time.perf_counter() - start) * 1000, 3),
+            "pool": {
+                "max_pool_size": self.options.get("maxPoolSize", 100),
+                "min_pool_size": self.options.get("minPoolSize", 0),
+                **self.pool_stats.snapshot(),
+            },
+        }
+
+    # ====================
+    # READ ROUTING / CAUSAL CONSISTENCY
+    # ====================
+
+    def _encode_token(self, session) -> Optional[str]:
+        if session.cluster_time is None or session.operation_time is None:
+            return None
+        payload = bson.encode({"c": session.cluster_time, "o": session.operation_time})
+        signature = hmac.new(self._token_key, payload, hashlib.sha256).digest()[:16]
+        return base64.urlsafe_b64encode(signature + payload).decode("ascii")
+
+    def _decode_token(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = base64.urlsafe_b64decode(token.encode("ascii"))
+        except (ValueError, UnicodeEncodeError):
+            return None
+        signature, payload = raw[:16], raw[16:]
+        expected = hmac.new(self._token_key, payload, hashlib.sha256).digest()[:16]
+        if not payload or not hmac.compare_digest(signature, expected):
+            return None
+        return bson.decode(payload)
+
+    async def causal_token(self) -> Optional[str]:
+        """Token for the primary's latest applied operation (covers every write acknowledged so far)"""
+        async with await self.client.start_session(causal_consistency=True) as session:
+            await self.database.command("ping", session=session)
+            return self._encode_token(session)
+
+    async def prefer_secondary(self, request: Request):
+        """
+        Route dependency for read-only endpoints that tolerate replication lag.
+        With a valid X-Causal-Token the reads run in a causal session advanced
+        to that token, so they observe the caller's own earlier writes.
+        """
+        if not self.secondary_reads:
+            yield
+            return
+
+        session = None
+        token = request.headers.get(CAUSAL_TOKEN_HEADER)
+        times = self._decode_token(token) if token else None
+        if times:
+            session = await self.client.start_session(causal_consistency=True)
+            session.advance_cluster_time(times["c"])
+            session.advance_operation_time(times["o"])
+
+        policy_token = _read_policy.set(ReadPolicy(self.secondary_database, session))
+        try:
+            yield
+        finally:
+            _read_policy.reset(policy_token)
+            if session is not None:
+                await session.end_session()
+
+    async def causal_token_middleware(self, request: Request, call_next):
+        """Attach X-Causal-Token to successful writes when secondary reads are enabled"""
+        response = await call_next(request)
+        if (self.secondary_reads and request.method not in ("GET", "HEAD", "OPTIONS")
+                and response.status_code < 400 and request.url.path.startswith("/api/")):
+            try:
+                token = await self.causal_token()
+            except Exception:
+                token = None
+            if token:
+                response.headers[CAUSAL_TOKEN_HEADER] = token
+        return response
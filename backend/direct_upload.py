@@ -0,0 +1,220 @@
+"""
+Subidas directas del navegador al almacenamiento (logos y evidencias).
+
+En lugar de pasar cada byte por la API, el navegador pide un permiso de subida
+(`issue`), envía el archivo directamente al almacenamiento y avisa al terminar
+(`inspect` + registro en server.py). El permiso es un token firmado de corta
+duración que fija el nombre del objeto, el tipo de contenido, el tamaño máximo
+y a qué empresa o auditoría pertenece, así que la confirmación no confía en
+nada que el cliente no haya firmado antes el servidor. Cada permiso se
+confirma una sola vez (`upload_completions`, con el nombre del objeto como
+clave): repetir la confirmación devuelve el mismo registro.
+
+Según el backend de object_storage.py:
+- firebase: URL firmada V4 de Google Cloud Storage (PUT) cuando hay
+  credenciales de cuenta de servicio; si no, la URL REST de Firebase Storage
+  (POST), protegida por las reglas del bucket como hasta ahora.
+- local: emulador en la propia API (`PUT /api/storage-emulator/...`) que
+  escribe en UPLOADS_DIR, servido por el montaje /uploads. Pensado para
+  desarrollo y pruebas.
+
+UPLOAD_TOKEN_TTL_SECONDS: validez del permiso de subida (300)
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import jwt
+
+from object_storage import InvalidObjectKey, file_sha256, get_backend, storage_backend
+
+UPLOAD_TOKEN_TTL_SECONDS = int(os.getenv("UPLOAD_TOKEN_TTL_SECONDS", "300"))
+TOKEN_PURPOSE = "direct_upload"
+UPLOAD_TOKEN_HEADER = "X-Upload-Token"
+
+IMAGE_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+
+# Evidence goes under logos/ too: it is the folder the bucket rules already allow
+UPLOAD_KINDS = {
+    "logo": {"prefix": "logos/", "content_types": IMAGE_TYPES, "max_bytes": 5 * 1024 * 1024},
+    "evidence": {"prefix": "logos/evidence_", "content_types": IMAGE_TYPES, "max_bytes": 5 * 1024 * 1024},
+}
+
+
+class UploadRejected(Exception):
+    """The upload does not match its token (missing object, size or type); `status` is the HTTP code"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def local_path(object_name: str) -> Path:
+    try:
+        return get_backend().path(object_name)
+    except InvalidObjectKey:
+        raise UploadRejected("Nombre de objeto no válido")
+
+
+def _gcs_signed_put_url(object_name: str, content_type: str, ttl: int) -> Optional[str]:
+    """V4 signed PUT URL, or None when no signing credentials are available"""
+    try:
+        from google.cloud import storage
+
+        blob = storage.Client().bucket(get_backend().bucket).blob(object_name)
+        return blob.generate_signed_url(version="v4", expiration=timedelta(seconds=ttl),
+                                        method="PUT", content_type=content_type)
+    except Exception as e:
+        logging.debug(f"Sin URL firmada de GCS ({e}); se usa la URL REST de Firebase")
+        return None
+
+
+class DirectUploads:
+    """Issues and verifies upload tokens and reads back what was uploaded"""
+
+    def __init__(self, secret: str, algorithm: str = "HS256", ttl: int = UPLOAD_TOKEN_TTL_SECONDS):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.ttl = ttl
+
+    async def issue(self, kind: str, filename: str, content_type: str, size: int, base_url: str,
+                    target: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """
+        Upload grant for one object: where and how to send it, plus the token
+        to present on completion. `target` holds the owner ids (user_id,
+        company_id, inspection_id, standard_id) recorded with the object.
+        """
+        spec = UPLOAD_KINDS[kind]
+        if content_type not in spec["content_types"]:
+            raise UploadRejected("Solo se permiten imágenes JPEG, PNG o WEBP")
+        if size > spec["max_bytes"]:
+            raise UploadRejected(f"La imagen no puede superar {spec['max_bytes'] // (1024 * 1024)}MB", status=413)
+
+        object_name = f"{spec['prefix']}{uuid.uuid4()}.{spec['content_types'][content_type]}"
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        headers = {"Content-Type": content_type}
+
+        backend = storage_backend()
+        storage = get_backend()
+        public_url = storage.url(object_name, base_url)
+        if backend == "local":
+            upload = {"method": "PUT", "url": f"{base_url}/api/storage-emulator/{object_name}"}
+        else:
+            signed = await asyncio.to_thread(_gcs_signed_put_url, object_name, content_type, self.ttl)
+            upload = {"method": "PUT", "url": signed} if signed else {"method": "POST", "url": storage.upload_url(object_name)}
+
+        token = jwt.encode({
+            "purpose": TOKEN_PURPOSE,
+            "kind": kind,
+            "object": object_name,
+            "url": public_url,
+            "filename": filename,
+            "content_type": content_type,
+            "max_bytes": spec["max_bytes"],
+            "target": target,
+            "exp": expires_at,
+        }, self.secret, algorithm=self.algorithm)
+        if backend == "local":
+            headers[UPLOAD_TOKEN_HEADER] = token
+
+        return {
+            **upload,
+            "headers": headers,
+            "backend": backend,
+            "object_name": object_name,
+            "public_url": public_url,
+            "token": token,
+            "expires_at": expires_at.isoformat(),
+            "max_bytes": spec["max_bytes"],
+        }
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except jwt.ExpiredSignatureError:
+            raise UploadRejected("El permiso de subida expiró", status=401)
+        except jwt.InvalidTokenError:
+            raise UploadRejected("Permiso de subida inválido", status=401)
+        if claims.get("purpose") != TOKEN_PURPOSE:
+            raise UploadRejected("Permiso de subida inválido", status=401)
+        return claims
+
+    async def inspect(self, claims: Dict[str, Any], declared_sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Size, content type and hashes of the uploaded object, checked against
+        the token. Local objects are hashed here; for the bucket the SHA-256
+        is the one declared by the client (the storage reports only MD5).
+        Oversized or mistyped objects are deleted.
+        """
+        object_name = claims["object"]
+        if storage_backend() == "local":
+            info = await asyncio.to_thread(_inspect_local, object_name)
+            if declared_sha256 and declared_sha256.lower() != info["sha256"]:
+                raise UploadRejected("El hash del archivo no coincide")
+        else:
+            info = await asyncio.to_thread(_inspect_firebase, object_name)
+            info["sha256"] = declared_sha256.lower() if declared_sha256 else None
+
+        if info["size"] > claims["max_bytes"] or info["content_type"] != claims["content_type"]:
+            await asyncio.to_thread(delete_object, object_name)
+            raise UploadRejected("El archivo subido no corresponde al permiso (tamaño o tipo)", status=413)
+        return info
+
+
+def _inspect_local(object_name: str) -> Dict[str, Any]:
+    path = local_path(object_name)
+    if not path.exists():
+        raise UploadRejected("El archivo no se encontró en el almacenamiento", status=404)
+    return {
+        "size": path.stat().st_size,
+        "content_type": get_backend().content_type(object_name),
+        "sha256": file_sha256(path),
+        "md5": None,
+    }
+
+
+def _inspect_firebase(object_name: str) -> Dict[str, Any]:
+    metadata = get_backend().metadata(object_name)
+    if metadata is None:
+        raise UploadRejected("El archivo no se encontró en el almacenamiento", status=404)
+    return {
+        "size": int(metadata.get("size", 0)),
+        "content_type": metadata.get("contentType"),
+        "sha256": None,
+        "md5": metadata.get("md5Hash"),
+    }
+
+
+def delete_object(object_name: str) -> bool:
+    return get_backend().delete(object_name)
+
+
+async def write_emulated_object(claims: Dict[str, Any], content_type: Optional[str], chunks) -> int:
+    """
+    Local emulator: stream the request body to UPLOADS_DIR, stopping as soon
+    as it exceeds the token's limit. The content type is kept next to the
+    object so completion can check it like the bucket metadata.
+    """
+    if (content_type or "").split(";")[0].strip() != claims["content_type"]:
+        raise UploadRejected("Tipo de contenido distinto al autorizado")
+    path = local_path(claims["object"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(path.suffix + ".part")
+    size = 0
+    try:
+        with open(partial, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > claims["max_bytes"]:
+                    raise UploadRejected("El archivo supera el tamaño autorizado", status=413)
+                await asyncio.to_thread(out.write, chunk)
+        partial.replace(path)
+        path.with_suffix(path.suffix + ".type").write_text(claims["content_type"])
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return size
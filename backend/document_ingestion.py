@@ -0,0 +1,265 @@
+"""
+Carga de normas desde archivos (PDF, DOCX, TXT).
+
+El archivo subido se copia por bloques a un directorio temporal (con el límite
+de tamaño comprobado mientras se copia) y la petición responde de inmediato
+con un trabajo de ingesta. En segundo plano se extrae el texto por partes —
+páginas de PDF en el pool de procesos, párrafos de DOCX con iterparse, TXT por
+bloques — y se va guardando en trozos comprimidos (norma_content.ContentWriter),
+así que la memoria no depende del tamaño del documento. El avance queda en la
+colección `normas_ingestas` y los trabajos interrumpidos se reanudan al
+arrancar.
+
+NORMA_UPLOAD_MAX_MB: tamaño máximo del archivo (50)
+NORMA_INGEST_DIR: directorio de los archivos pendientes de procesar
+NORMA_INGEST_CONCURRENCY: ingestas simultáneas (2)
+NORMA_INGEST_PDF_PAGES: páginas de PDF extraídas por lote (20)
+"""
+import asyncio
+import codecs
+import logging
+import os
+import tempfile
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+from http_cache import versioned_update
+from norma_content import NORMA_COLLECTIONS, NORMA_STAMP_FIELD, ContentWriter
+from pdf_export import get_pdf_pool
+
+NORMA_UPLOAD_MAX_BYTES = int(os.getenv("NORMA_UPLOAD_MAX_MB", "50")) * 1024 * 1024
+NORMA_INGEST_DIR = Path(os.getenv("NORMA_INGEST_DIR", os.path.join(tempfile.gettempdir(), "auditx-ingest")))
+NORMA_INGEST_CONCURRENCY = int(os.getenv("NORMA_INGEST_CONCURRENCY", "2"))
+NORMA_INGEST_PDF_PAGES = int(os.getenv("NORMA_INGEST_PDF_PAGES", "20"))
+
+UPLOAD_COPY_CHUNK = 1024 * 1024
+TEXT_BATCH_CHARS = 64 * 1024
+
+DOCUMENT_FORMATS = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".txt": "txt",
+}
+CONTENT_TYPE_FORMATS = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "text/plain": "txt",
+}
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_semaphore: Optional[asyncio.Semaphore] = None
+
+# Keep references so background ingestions are not garbage-collected mid-run
+_running_tasks = set()
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """pdf / docx / txt from the file extension, falling back to the declared content type"""
+    suffix = Path(filename or "").suffix.lower()
+    return DOCUMENT_FORMATS.get(suffix) or CONTENT_TYPE_FORMATS.get((content_type or "").split(";")[0].strip())
+
+
+async def save_upload(upload, max_bytes: int = NORMA_UPLOAD_MAX_BYTES) -> Tuple[Path, int]:
+    """Copy an UploadFile to the ingest directory in 1 MB blocks, aborting as soon as it exceeds `max_bytes`"""
+    NORMA_INGEST_DIR.mkdir(parents=True, exist_ok=True)
+    path = NORMA_INGEST_DIR / f"{uuid.uuid4()}.upload"
+    size = 0
+    try:
+        with open(path, "wb") as out:
+            while chunk := await upload.read(UPLOAD_COPY_CHUNK):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, size
+
+
+# ====================
+# TEXT EXTRACTION
+# ====================
+
+def extract_pdf_pages(path: str, start: int, count: int) -> Tuple[List[str], int]:
+    """Text of pages [start, start + count) and the page total; runs in a pool worker"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    total = len(reader.pages)
+    texts = []
+    for index in range(start, min(start + count, total)):
+        texts.append(reader.pages[index].extract_text() or "")
+    return texts, total
+
+
+def iter_docx_paragraphs(path: str) -> Iterator[str]:
+    """Paragraph texts of word/document.xml, parsed incrementally (elements are freed as they are read)"""
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as document:
+        parts = []
+        for event, element in iterparse(document, events=("end",)):
+            if element.tag == f"{_WORD_NS}t":
+                parts.append(element.text or "")
+            elif element.tag == f"{_WORD_NS}tab":
+                parts.append("\t")
+            elif element.tag == f"{_WORD_NS}p":
+                yield "".join(parts) + "\n"
+                parts = []
+                element.clear()
+
+
+def iter_text_file(path: str) -> Iterator[str]:
+    """UTF-8 text in 64 KB blocks (Latin-1 if the file is not valid UTF-8)"""
+    for encoding in ("utf-8-sig", "latin-1"):
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, "rb") as source:
+                # Validate the whole file first so a late decode error does not leave half a text
+                while block := source.read(UPLOAD_COPY_CHUNK):
+                    decoder.decode(block)
+                decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            continue
+        decoder = codecs.getincrementaldecoder(encoding)()
+        with open(path, "rb") as source:
+            while block := source.read(TEXT_BATCH_CHARS):
+                yield decoder.decode(block)
+            yield decoder.decode(b"", final=True)
+        return
+
+
+def _next_batch(iterator: Iterator[str], max_chars: int = TEXT_BATCH_CHARS) -> Optional[str]:
+    parts, size = [], 0
+    for text in iterator:
+        parts.append(text)
+        size += len(text)
+        if size >= max_chars:
+            break
+    return "".join(parts) if parts else None
+
+
+# ====================
+# JOBS
+# ====================
+
+async def create_ingestion_job(db, kind: str, norma_id: str, path: Path, size: int,
+                               filename: str, document_format: str) -> str:
+    job = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "norma_id": norma_id,
+        "path": str(path),
+        "filename": filename,
+        "format": document_format,
+        "bytes": size,
+        "status": "pending",  # pending, extracting, completed, failed
+        "progress": {"pages_total": None, "pages_done": 0, "chars": 0, "chunks": 0},
+        "error": None,
+        "created_at": _now(),
+        "updated_at": _now(),
+    }
+    await db.normas_ingestas.insert_one(job)
+    return job["id"]
+
+
+async def _report(db, job_id: str, writer: ContentWriter, **progress):
+    update = {f"progress.{key}": value for key, value in progress.items()}
+    update.update({"progress.chars": writer.chars, "progress.chunks": writer.chunks, "updated_at": _now()})
+    await db.normas_ingestas.update_one({"id": job_id}, {"$set": update})
+
+
+async def _extract(db, job: Dict[str, Any], writer: ContentWriter):
+    path = job["path"]
+    if job["format"] == "pdf":
+        loop = asyncio.get_running_loop()
+        start, total = 0, None
+        while total is None or start < total:
+            texts, total = await loop.run_in_executor(get_pdf_pool(), extract_pdf_pages, path, start, NORMA_INGEST_PDF_PAGES)
+            for text in texts:
+                await writer.append(text.rstrip() + "\n\n")
+            start += NORMA_INGEST_PDF_PAGES
+            await _report(db, job["id"], writer, pages_total=total, pages_done=min(start, total))
+        return
+
+    iterator = iter_docx_paragraphs(path) if job["format"] == "docx" else iter_text_file(path)
+    while (text := await asyncio.to_thread(_next_batch, iterator)) is not None:
+        await writer.append(text)
+        await _report(db, job["id"], writer)
+
+
+async def run_ingestion(db, job_id: str, on_complete: Optional[Callable[[], Awaitable[Any]]] = None):
+    """Extract and store the text of an uploaded document; restarting a job begins again from the file"""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(NORMA_INGEST_CONCURRENCY)
+
+    async with _semaphore:
+        job = await db.normas_ingestas.find_one_and_update(
+            {"id": job_id, "status": {"$in": ["pending", "extracting"]}},
+            {"$set": {"status": "extracting", "updated_at": _now()}},
+            projection={"_id": 0},
+        )
+        if not job:
+            return
+
+        collection = db[NORMA_COLLECTIONS[job["kind"]]]
+        writer = ContentWriter(db, job["kind"], job["norma_id"])
+        try:
+            await _extract(db, job, writer)
+            if not writer.chars:
+                raise ValueError("No se encontró texto en el documento (¿PDF escaneado sin OCR?)")
+            summary = await writer.finish()
+            await collection.update_one(
+                {"id": job["norma_id"]},
+                versioned_update({**summary, "ingestion_status": "completado"}, NORMA_STAMP_FIELD)
+            )
+            await db.normas_ingestas.update_one(
+                {"id": job_id},
+                {"$set": {"status": "completed", "progress.chars": writer.chars, "progress.chunks": writer.chunks,
+                          "completed_at": _now(), "updated_at": _now()}}
+            )
+            Path(job["path"]).unlink(missing_ok=True)
+            if on_complete:
+                await on_complete()
+            logging.info(f"Ingesta {job_id} ({job['filename']}): {writer.chars} caracteres en {writer.chunks} trozos")
+        except Exception as e:
+            logging.error(f"Ingesta {job_id} ({job['filename']}) falló: {e}")
+            await writer.abort()
+            await collection.update_one(
+                {"id": job["norma_id"]}, versioned_update({"ingestion_status": "error"}, NORMA_STAMP_FIELD)
+            )
+            await db.normas_ingestas.update_one(
+                {"id": job_id}, {"$set": {"status": "failed", "error": str(e), "updated_at": _now()}}
+            )
+            Path(job["path"]).unlink(missing_ok=True)
+
+
+def start_ingestion(db, job_id: str, on_complete: Optional[Callable[[], Awaitable[Any]]] = None):
+    task = asyncio.create_task(run_ingestion(db, job_id, on_complete))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+
+
+async def resume_ingestions(db, on_complete: Optional[Callable[[], Awaitable[Any]]] = None):
+    """Restart jobs interrupted by a restart whose file is still on disk"""
+    async for job in db.normas_ingestas.find({"status": {"$in": ["pending", "extracting"]}}, {"_id": 0, "id": 1, "path": 1}):
+        if Path(job["path"]).exists():
+            start_ingestion(db, job["id"], on_complete)
+        else:
+            await db.normas_ingestas.update_one(
+                {"id": job["id"]},
+                {"$set": {"status": "failed", "error": "Archivo temporal no disponible tras reinicio", "updated_at": _now()}}
+            )
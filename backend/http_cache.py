@@ -0,0 +1,238 @@
+import gzip
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional, se sirve gzip en su lugar
+    brotli = None
+
+
+def etag_matches(if_none_match: Optional[str], *etags: str) -> bool:
+    """Check an If-None-Match header against any of the given ETags (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    targets = {etag[2:] if etag.startswith("W/") else etag for etag in etags}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in targets:
+            return True
+    return False
+
+
+def pick_encoding(accept_encoding: Optional[str], available) -> Optional[str]:
+    """Choose the best content-coding the client accepts among the available ones"""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        pieces = part.strip().split(";")
+        coding = pieces[0].strip().lower()
+        q = 1.0
+        for param in pieces[1:]:
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+
+    for coding in ("br", "gzip"):
+        if coding in available and accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+class PrecomputedJSON:
+    """
+    JSON payload serialized once, with gzip/brotli variants. Each
+    representation has its own strong ETag derived from the content hash
+    ("<hash>", "<hash>-gz", "<hash>-br"), as strong validators must differ per
+    content-coding; a revalidation with any of them gets a 304.
+    """
+
+    ETAG_SUFFIXES = {"gzip": "-gz", "br": "-br"}
+
+    def __init__(self, data: Any, cache_control: str = "private, max-age=0, must-revalidate"):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.cache_control = cache_control
+        self.variants: Dict[str, bytes] = {"gzip": gzip.compress(self.body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(self.body, quality=11)
+        self.etags: Dict[Optional[str], str] = {
+            None: self.etag,
+            **{encoding: f'"{digest}{self.ETAG_SUFFIXES[encoding]}"' for encoding in self.variants},
+        }
+
+    def response(self, request: Request) -> Response:
+        encoding = pick_encoding(request.headers.get("accept-encoding"), self.variants)
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        if etag_matches(request.headers.get("if-none-match"), *self.etags.values()):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(content=self.variants[encoding], media_type="application/json", headers=headers)
+
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+# ====================
+# RESPONSE COMPRESSION
+# ====================
+
+# Formats that are already compressed: gzip would only cost CPU, drop Content-Length
+# and break byte ranges, which refer to the stored bytes
+INCOMPRESSIBLE_MEDIA_TYPES = {
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+INCOMPRESSIBLE_PREFIXES = ("image/", "audio/", "video/")
+
+
+def compressible(headers: Headers) -> bool:
+    """Whether a response may be gzipped: not already compressed, not a byte range"""
+    if "content-range" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return media_type not in INCOMPRESSIBLE_MEDIA_TYPES and not media_type.startswith(INCOMPRESSIBLE_PREFIXES)
+
+
+class _SelectiveGZipResponder(GZipResponder):
+    passthrough = False
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.passthrough = not compressible(Headers(raw=message["headers"]))
+        if self.passthrough:
+            await self.send(message)
+            return
+        await super().send_with_gzip(message)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves already-compressed media types and partial content untouched"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _SelectiveGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+# ====================
+# VERSION STAMPS / CONDITIONAL GET
+# ====================
+
+# Collections whose documents already use `version` for their own data (e.g. the
+# "1.0" of a norma específica) keep the numeric stamp in another field
+STAMP_FIELD = "version"
+STAMP_PROJECTION = {"_id": 0, "id": 1, "version": 1, "rev": 1, "updated_at": 1, "created_at": 1}
+
+
+def initial_stamp(stamp_field: str = STAMP_FIELD) -> Dict[str, Any]:
+    """Version fields for a freshly inserted mutable document"""
+    return {stamp_field: 1, "updated_at": datetime.now(timezone.utc).isoformat()}
+
+
+def versioned_update(fields: Dict[str, Any], stamp_field: str = STAMP_FIELD) -> Dict[str, Any]:
+    """Build an update document that applies `fields` and bumps the version stamp"""
+    return {
+        "$set": {**fields, "updated_at": datetime.now(timezone.utc).isoformat()},
+        "$inc": {stamp_field: 1},
+    }
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+
+def document_stamp(doc: Optional[Dict[str, Any]]) -> str:
+    if not doc:
+        return "-"
+    return f"{doc.get('id')}:{doc.get('version', 0)}:{doc.get('rev', 0)}:{doc.get('updated_at') or doc.get('created_at')}"
+
+
+def resource_etag(*docs: Optional[Dict[str, Any]]) -> str:
+    """Weak ETag covering every document that contributes to a representation"""
+    digest = hashlib.sha1("|".join(document_stamp(d) for d in docs).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def last_modified(*docs: Optional[Dict[str, Any]]) -> Optional[datetime]:
+    stamps = [_as_datetime(d.get("updated_at") or d.get("created_at")) for d in docs if d]
+    stamps = [s for s in stamps if s]
+    return max(stamps) if stamps else None
+
+
+def is_not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the current stamp"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_json(request: Request, content: Any, *docs: Optional[Dict[str, Any]], listing: bool = False) -> Response:
+    """
+    Return `content` as JSON with ETag/Last-Modified, or 304 if the client copy is current.
+
+    Listings only get an ETag: removing a document changes the set but not its
+    newest timestamp, so Last-Modified would be unreliable for them.
+    """
+    etag = resource_etag(*docs)
+    modified = None if listing else last_modified(*docs)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if modified:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+
+    if is_not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
@@ -0,0 +1,269 @@
+"""
+Capa de proveedores LLM.
+
+Los endpoints de IA abren una conversación con `get_llm_provider().conversation(...)`
+y envían mensajes con `send()`. El proveedor se elige con LLM_PROVIDER:
+
+- emergent (por defecto): LlmChat de emergentintegrations con LLM_MODEL_PROVIDER/LLM_MODEL
+- stub: respuestas Markdown deterministas generadas localmente, con latencia,
+  velocidad de streaming y tasa de fallos configurables, para pruebas y benchmarks
+
+Comunes a ambos: LLM_TIMEOUT_S (tiempo máximo por mensaje) y
+LLM_MAX_CONCURRENCY (mensajes simultáneos por proceso).
+"""
+import asyncio
+import hashlib
+import math
+import os
+import random
+from typing import AsyncIterator, Optional
+
+
+class LLMProviderError(Exception):
+    """Raised when the upstream model fails or times out"""
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+class Conversation:
+    """A chat session with a fixed system message; history is kept by the provider"""
+
+    def __init__(self, provider: "LLMProvider", session_id: str, system_message: str, purpose: str):
+        self.provider = provider
+        self.session_id = session_id
+        self.system_message = system_message
+        self.purpose = purpose
+
+    async def _send(self, text: str, image_base64: Optional[str]) -> str:
+        raise NotImplementedError
+
+    async def stream(self, text: str, image_base64: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield the response in chunks; providers without streaming yield it whole"""
+        yield await self._send(text, image_base64)
+
+    async def send(self, text: str, image_base64: Optional[str] = None) -> str:
+        async with self.provider.limiter:
+            try:
+                if self.provider.timeout:
+                    return await asyncio.wait_for(self._send(text, image_base64), self.provider.timeout)
+                return await self._send(text, image_base64)
+            except asyncio.TimeoutError:
+                raise LLMProviderError(f"El modelo no respondió en {self.provider.timeout:.0f}s")
+
+
+class LLMProvider:
+    name = "base"
+
+    def __init__(self):
+        self.timeout = _env_float("LLM_TIMEOUT_S", 0) or None
+        max_concurrency = int(_env_float("LLM_MAX_CONCURRENCY", 0))
+        self.limiter = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else _Unlimited()
+
+    def is_configured(self) -> bool:
+        return True
+
+    def conversation(self, session_id: str, system_message: str, purpose: str = "chat") -> Conversation:
+        raise NotImplementedError
+
+
+class _Unlimited:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# ====================
+# EMERGENT (OpenAI gpt-4o)
+# ====================
+
+class EmergentConversation(Conversation):
+    def __init__(self, provider: "EmergentProvider", session_id: str, system_message: str, purpose: str):
+        super().__init__(provider, session_id, system_message, purpose)
+        from emergentintegrations.llm.chat import LlmChat
+
+        self._chat = LlmChat(
+            api_key=provider.api_key,
+            session_id=session_id,
+            system_message=system_message
+        ).with_model(provider.model_provider, provider.model)
+
+    async def _send(self, text: str, image_base64: Optional[str]) -> str:
+        from emergentintegrations.llm.chat import UserMessage, ImageContent
+
+        if image_base64:
+            message = UserMessage(text=text, file_contents=[ImageContent(image_base64=image_base64)])
+        else:
+            message = UserMessage(text=text)
+        return await self._chat.send_message(message)
+
+
+class EmergentProvider(LLMProvider):
+    name = "emergent"
+
+    def __init__(self):
+        super().__init__()
+        self.api_key = os.getenv("EMERGENT_LLM_KEY")
+        self.model_provider = os.getenv("LLM_MODEL_PROVIDER", "openai")
+        self.model = os.getenv("LLM_MODEL", "gpt-4o")
+
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def conversation(self, session_id: str, system_message: str, purpose: str = "chat") -> Conversation:
+        return EmergentConversation(self, session_id, system_message, purpose)
+
+
+# ====================
+# STUB (local, determinista)
+# ====================
+
+STUB_TEMPLATES = {
+    "analyze-inspection": """# ANÁLISIS DEL SISTEMA DE GESTIÓN SST
+
+## 1. RESUMEN EJECUTIVO
+- Nivel de cumplimiento global: **{score}**
+- Clasificación: Moderado (60-84%)
+- Hallazgo principal: {snippet}
+
+## 2. ANÁLISIS POR FASES (PHVA)
+| Fase | Cumplimiento | Observación |
+|---|---|---|
+| I. PLANEAR | 72.0% | Recursos asignados parcialmente |
+| II. HACER | 65.5% | Brechas en gestión de peligros |
+| III. VERIFICAR | 80.0% | Auditoría anual realizada |
+| IV. ACTUAR | 58.0% | Acciones correctivas sin cierre |
+
+### Fortalezas
+- **Responsable del SG-SST** designado con licencia vigente
+- Comité de convivencia conformado
+
+### Brechas críticas
+- Matriz de peligros *desactualizada*
+- Plan de emergencias sin simulacros documentados
+""",
+    "standard-recommendation": """## 📋 Análisis del Hallazgo
+El estándar evaluado presenta oportunidades de mejora. {snippet}
+
+## ⚡ Acciones Recomendadas (Priorizadas)
+1. **Documentar el procedimiento** - Plazo: 15 días
+   - Descripción detallada del soporte requerido
+   - Responsable sugerido: Responsable del SG-SST
+2. **Socializar con el personal** - Plazo: 30 días
+
+## 📎 Evidencias Requeridas
+- Acta de asignación firmada
+- Registro de socialización
+
+## 📚 Fundamento Normativo
+- Resolución 0312 de 2019, artículo 16
+- Decreto 1072 de 2015, artículo 2.2.4.6.8
+""",
+    "analyze-image": """1. **Descripción General**: {snippet}
+2. **Elementos de SST Identificados**: EPP, señalización de evacuación
+3. **Aspectos Positivos (Cumplimiento)**: Uso de casco y chaleco reflectivo
+4. **Aspectos a Mejorar (No Cumplimiento)**: Extintor sin señalización visible
+5. **Relevancia para el Estándar**: Evidencia directa del estándar evaluado
+6. **Recomendaciones**: Instalar señalización y verificar inspección de extintores
+""",
+}
+
+
+class StubConversation(Conversation):
+    async def stream(self, text: str, image_base64: Optional[str] = None) -> AsyncIterator[str]:
+        provider: StubProvider = self.provider
+
+        await asyncio.sleep(provider.sample_latency())
+        if provider.random.random() < provider.failure_rate:
+            raise LLMProviderError("Fallo simulado del proveedor LLM (stub)")
+
+        response = provider.render(self.purpose, text, provider.rng_for(self.purpose, text))
+        words = response.split(" ")
+        if provider.tokens_per_second <= 0:
+            yield response
+            return
+
+        chunk = max(1, int(provider.tokens_per_second * provider.stream_interval))
+        for start in range(0, len(words), chunk):
+            piece = " ".join(words[start:start + chunk])
+            yield piece if start == 0 else " " + piece
+            await asyncio.sleep(provider.stream_interval)
+
+    async def _send(self, text: str, image_base64: Optional[str]) -> str:
+        return "".join([piece async for piece in self.stream(text, image_base64)])
+
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic local model: the same prompt and purpose always yield the
+    same text, in any session, while latency and failures are drawn from the
+    configured distribution.
+
+    LLM_STUB_LATENCY_MS / LLM_STUB_LATENCY_JITTER_MS: time to first token
+    LLM_STUB_LATENCY_DISTRIBUTION: fixed, normal or lognormal
+    LLM_STUB_TOKENS_PER_SECOND: streaming rate (0 = whole response at once)
+    LLM_STUB_FAILURE_RATE: probability [0-1] of raising LLMProviderError
+    LLM_STUB_RESPONSE_REPEAT: how many times the template is repeated (report length)
+    LLM_STUB_SEED: set to vary the deterministic output between runs
+    """
+    name = "stub"
+    stream_interval = 0.05
+
+    def __init__(self):
+        super().__init__()
+        self.latency_ms = _env_float("LLM_STUB_LATENCY_MS", 500)
+        self.jitter_ms = _env_float("LLM_STUB_LATENCY_JITTER_MS", 0)
+        self.distribution = os.getenv("LLM_STUB_LATENCY_DISTRIBUTION", "fixed")
+        self.tokens_per_second = _env_float("LLM_STUB_TOKENS_PER_SECOND", 0)
+        self.failure_rate = _env_float("LLM_STUB_FAILURE_RATE", 0)
+        self.repeat = max(1, int(_env_float("LLM_STUB_RESPONSE_REPEAT", 1)))
+        self.seed = os.getenv("LLM_STUB_SEED", "auditx")
+        self.random = random.Random(self.seed)
+
+    def rng_for(self, purpose: str, text: str) -> random.Random:
+        """Seeded from the prompt and purpose only: session ids are random, so they would break reproducibility"""
+        digest = hashlib.sha256(f"{self.seed}|{purpose}|{text}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def sample_latency(self) -> float:
+        mean, jitter = self.latency_ms, self.jitter_ms
+        if self.distribution == "normal":
+            value = self.random.gauss(mean, jitter)
+        elif self.distribution == "lognormal" and mean > 0:
+            sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2)) if jitter else 0
+            value = self.random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        else:
+            value = mean
+        return max(0.0, value) / 1000
+
+    def render(self, purpose: str, prompt: str, rng: random.Random) -> str:
+        template = STUB_TEMPLATES.get(purpose, STUB_TEMPLATES["standard-recommendation"])
+        snippet = " ".join(prompt.split())[:160]
+        body = template.format(score=f"{rng.uniform(40, 95):.1f}%", snippet=snippet)
+        return "\n".join([body] * self.repeat)
+
+    def conversation(self, session_id: str, system_message: str, purpose: str = "chat") -> Conversation:
+        return StubConversation(self, session_id, system_message, purpose)
+
+
+PROVIDERS = {
+    "emergent": EmergentProvider,
+    "stub": StubProvider,
+}
+
+_provider: Optional[LLMProvider] = None
+
+
+def get_llm_provider() -> LLMProvider:
+    """Provider selected by LLM_PROVIDER, created once per process"""
+    global _provider
+    if _provider is None:
+        name = os.getenv("LLM_PROVIDER", "emergent")
+        if name not in PROVIDERS:
+            raise ValueError(f"LLM_PROVIDER desconocido: {name}")
+        _provider = PROVIDERS[name]()
+    return _provider
@@ -0,0 +1,175 @@
+"""
+Métricas en formato Prometheus para la API de AuditX.
+
+Expone histogramas de latencia por ruta, operación de MongoDB, llamadas al
+LLM, generación de PDF, subidas a Storage y resultados de envío de correo.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from fastapi import Request
+from fastapi.responses import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from pymongo import monitoring
+
+from tracing import span, SPAN_KIND_CLIENT
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180)
+SIZE_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "auditx_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+MONGO_OPERATION_DURATION = Histogram(
+    "auditx_mongo_operation_duration_seconds",
+    "MongoDB command latency by collection and operation",
+    ["collection", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "auditx_mongo_pool_checkout_wait_seconds",
+    "Time spent waiting for a MongoDB pool connection",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "auditx_mongo_pool_connections",
+    "MongoDB pool connections by state (open, in_use)",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+LLM_CALL_DURATION = Histogram(
+    "auditx_llm_call_duration_seconds",
+    "LLM call latency by endpoint",
+    ["endpoint", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "auditx_llm_tokens_total",
+    "Estimated LLM tokens (about 4 characters per token) by endpoint",
+    ["endpoint", "kind"],
+)
+PDF_RENDER_DURATION = Histogram(
+    "auditx_pdf_render_duration_seconds",
+    "PDF report render time",
+    buckets=LATENCY_BUCKETS,
+)
+PDF_SIZE = Histogram(
+    "auditx_pdf_size_bytes",
+    "Rendered PDF report size",
+    buckets=SIZE_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "auditx_cache_lookups_total",
+    "Cache lookups by namespace and outcome (hit_local, hit_shared, miss)",
+    ["namespace", "outcome"],
+)
+STORAGE_UPLOAD_DURATION = Histogram(
+    "auditx_storage_upload_duration_seconds",
+    "Storage upload latency by kind",
+    ["kind", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+STORAGE_UPLOAD_BYTES = Counter(
+    "auditx_storage_upload_bytes_total",
+    "Bytes uploaded to storage by kind",
+    ["kind"],
+)
+EMAIL_SENDS = Counter(
+    "auditx_email_sends_total",
+    "Email send attempts by outcome",
+    ["outcome"],
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + 3) // 4
+
+
+async def observed_llm_call(endpoint: str, conversation, text: str, image_base64=None):
+    """Send `text` through an LLM conversation, recording latency and token estimates for `endpoint`"""
+    LLM_TOKENS.labels(endpoint, "prompt").inc(estimate_tokens(text))
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        with span("llm.send_message", SPAN_KIND_CLIENT, endpoint=endpoint):
+            result = await conversation.send(text, image_base64=image_base64)
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        LLM_CALL_DURATION.labels(endpoint, outcome).observe(time.perf_counter() - start)
+    LLM_TOKENS.labels(endpoint, "completion").inc(estimate_tokens(result if isinstance(result, str) else str(result)))
+    return result
+
+
+@contextmanager
+def observe_storage_upload(kind: str, size: int):
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        with span("storage.upload", SPAN_KIND_CLIENT, kind=kind, size=size):
+            yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        STORAGE_UPLOAD_DURATION.labels(kind, outcome).observe(time.perf_counter() - start)
+        if outcome == "success":
+            STORAGE_UPLOAD_BYTES.labels(kind).inc(size)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding MONGO_OPERATION_DURATION"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def _collection(self, event) -> str:
+        return self._collections.pop((event.connection_id, event.request_id), "-")
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else "-"
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", "-")
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        MONGO_OPERATION_DURATION.labels(self._collection(event), event.command_name, "success").observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event):
+        MONGO_OPERATION_DURATION.labels(self._collection(event), event.command_name, "error").observe(
+            event.duration_micros / 1_000_000
+        )
+
+
+async def http_metrics_middleware(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        HTTP_REQUEST_DURATION.labels(request.method, route_path, str(status_code)).observe(time.perf_counter() - start)
+
+
+def metrics_response() -> Response:
+    """Render all metrics; aggregates across workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,236 @@
+"""
+Texto completo de las normas, fuera de los documentos de metadatos.
+
+Los documentos de `normas_generales` y `normas_especificas` solo guardan
+metadatos (nombre, categoría, vigencia, tamaño del texto); el contenido va
+comprimido con zlib en la colección `normas_contenido`, una entrada por norma.
+Los listados y las búsquedas por id ya no arrastran el texto, que solo se
+carga en los endpoints que lo necesitan (ver contenido, editar, contexto
+normativo de la IA).
+
+Los textos largos (documentos cargados, ver document_ingestion.py) se guardan
+en trozos de CONTENT_CHUNK_CHARS caracteres en `normas_contenido_trozos`, cada
+uno comprimido por separado; la entrada de la norma apunta a la generación de
+trozos vigente, que solo cambia cuando la nueva está completa. Así se
+escriben sin tener el texto entero en memoria y se puede leer solo el
+principio (`max_chars`).
+
+Las normas antiguas con `contenido` en línea se siguen leyendo; al arrancar se
+trasladan por lotes a la colección nueva (`migrate_inline_contents`).
+"""
+import asyncio
+import hashlib
+import logging
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from bson import Binary
+
+CONTENT_COLLECTION = "normas_contenido"
+CHUNK_COLLECTION = "normas_contenido_trozos"
+NORMA_COLLECTIONS = {"general": "normas_generales", "especifica": "normas_especificas"}
+COMPRESSION_LEVEL = 6
+CONTENT_CHUNK_CHARS = 256 * 1024
+MIGRATION_BATCH_SIZE = 100
+
+# Metadata queries never need the inline body of not-yet-migrated norms
+METADATA_PROJECTION = {"_id": 0, "contenido": 0}
+# `version` of a norma específica is its document version ("1.0"), not a counter
+NORMA_STAMP_FIELD = "rev"
+
+
+def _content_id(kind: str, norma_id: str) -> str:
+    return f"{kind}:{norma_id}"
+
+
+def _compress(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def _decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+class ContentWriter:
+    """
+    Incremental writer for a norm body: text is appended in pieces and stored
+    as compressed chunks of a new generation. `finish()` switches the norm to
+    that generation and drops the previous one; until then readers keep
+    seeing the old text.
+    """
+
+    def __init__(self, db, kind: str, norma_id: str):
+        self.db = db
+        self.kind = kind
+        self.norma_id = norma_id
+        self.content_id = _content_id(kind, norma_id)
+        self.generation = str(uuid.uuid4())
+        self.chars = 0
+        self.compressed_bytes = 0
+        self.chunks = 0
+        self._digest = hashlib.sha256()
+        self._buffer = []
+        self._buffered = 0
+
+    async def append(self, text: str):
+        self._digest.update(text.encode("utf-8"))
+        self.chars += len(text)
+        self._buffer.append(text)
+        self._buffered += len(text)
+        while self._buffered >= CONTENT_CHUNK_CHARS:
+            pending = "".join(self._buffer)
+            await self._write_chunk(pending[:CONTENT_CHUNK_CHARS])
+            rest = pending[CONTENT_CHUNK_CHARS:]
+            self._buffer = [rest] if rest else []
+            self._buffered = len(rest)
+
+    async def _write_chunk(self, text: str):
+        data = await asyncio.to_thread(_compress, text)
+        await self.db[CHUNK_COLLECTION].insert_one({
+            "content_id": self.content_id,
+            "generation": self.generation,
+            "index": self.chunks,
+            "data": Binary(data),
+        })
+        self.chunks += 1
+        self.compressed_bytes += len(data)
+
+    async def finish(self) -> Dict[str, object]:
+        """Publish the new generation; returns the summary fields for the metadata document"""
+        if self._buffer:
+            await self._write_chunk("".join(self._buffer))
+            self._buffer, self._buffered = [], 0
+        digest = self._digest.hexdigest()
+        await self.db[CONTENT_COLLECTION].replace_one(
+            {"id": self.content_id},
+            {
+                "id": self.content_id,
+                "kind": self.kind,
+                "norma_id": self.norma_id,
+                "encoding": "zlib",
+                "generation": self.generation,
+                "chunks": self.chunks,
+                "chars": self.chars,
+                "compressed_bytes": self.compressed_bytes,
+                "sha256": digest,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            },
+            upsert=True,
+        )
+        await self.db[CHUNK_COLLECTION].delete_many({"content_id": self.content_id, "generation": {"$ne": self.generation}})
+        return {"contenido_chars": self.chars, "contenido_sha256": digest}
+
+    async def abort(self):
+        """Drop the chunks written so far (the published text is untouched)"""
+        await self.db[CHUNK_COLLECTION].delete_many({"content_id": self.content_id, "generation": self.generation})
+
+
+async def store_content(db, kind: str, norma_id: str, text: str) -> Dict[str, object]:
+    """Save the compressed body of a norm; returns the summary fields for its metadata document"""
+    if len(text) > CONTENT_CHUNK_CHARS:
+        writer = ContentWriter(db, kind, norma_id)
+        await writer.append(text)
+        return await writer.finish()
+
+    data = await asyncio.to_thread(_compress, text)
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    await db[CONTENT_COLLECTION].replace_one(
+        {"id": _content_id(kind, norma_id)},
+        {
+            "id": _content_id(kind, norma_id),
+            "kind": kind,
+            "norma_id": norma_id,
+            "encoding": "zlib",
+            "data": Binary(data),
+            "chars": len(text),
+            "compressed_bytes": len(data),
+            "sha256": digest,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        },
+        upsert=True,
+    )
+    await db[CHUNK_COLLECTION].delete_many({"content_id": _content_id(kind, norma_id)})
+    return {"contenido_chars": len(text), "contenido_sha256": digest}
+
+
+async def _read_chunks(db, doc: Dict[str, object], max_chars: Optional[int]) -> str:
+    query = {"content_id": doc["id"], "generation": doc["generation"]}
+    cursor = db[CHUNK_COLLECTION].find(query, {"_id": 0, "data": 1}).sort("index", 1)
+    if max_chars is not None:
+        cursor = cursor.limit(max_chars // CONTENT_CHUNK_CHARS + 1)
+    parts = []
+    async for chunk in cursor:
+        parts.append(await asyncio.to_thread(_decompress, bytes(chunk["data"])))
+    text = "".join(parts)
+    return text[:max_chars] if max_chars is not None else text
+
+
+async def load_contents(db, kind: str, norma_ids: Iterable[str], max_chars: Optional[int] = None) -> Dict[str, str]:
+    """
+    Bodies of several norms by norm id, or only their first `max_chars`
+    characters (chunked bodies then read just the chunks needed). Falls back
+    to inline legacy bodies.
+    """
+    norma_ids = list(dict.fromkeys(norma_ids))
+    if not norma_ids:
+        return {}
+    docs = await db[CONTENT_COLLECTION].find(
+        {"id": {"$in": [_content_id(kind, i) for i in norma_ids]}},
+        {"_id": 0, "id": 1, "norma_id": 1, "data": 1, "generation": 1}
+    ).to_list(len(norma_ids))
+    contents = {}
+    for doc in docs:
+        if doc.get("generation"):
+            contents[doc["norma_id"]] = await _read_chunks(db, doc, max_chars)
+        else:
+            contents[doc["norma_id"]] = (await asyncio.to_thread(_decompress, bytes(doc["data"])))[:max_chars]
+
+    missing = [i for i in norma_ids if i not in contents]
+    if missing:
+        async for norma in db[NORMA_COLLECTIONS[kind]].find(
+            {"id": {"$in": missing}, "contenido": {"$exists": True}}, {"_id": 0, "id": 1, "contenido": 1}
+        ):
+            contents[norma["id"]] = norma["contenido"][:max_chars]
+    return contents
+
+
+async def load_content(db, kind: str, norma_id: str) -> Optional[str]:
+    return (await load_contents(db, kind, [norma_id])).get(norma_id)
+
+
+async def delete_contents(db, kind: str, norma_ids: Iterable[str]):
+    content_ids = [_content_id(kind, i) for i in norma_ids]
+    await db[CONTENT_COLLECTION].delete_many({"id": {"$in": content_ids}})
+    await db[CHUNK_COLLECTION].delete_many({"content_id": {"$in": content_ids}})
+
+
+async def migrate_inline_contents(db, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    Move inline `contenido` bodies to the content collection, batch by batch.
+    Each norm is copied first and its inline body removed afterwards, only if
+    unchanged, so an interrupted run just resumes on the next start.
+    """
+    moved = 0
+    for kind, collection in NORMA_COLLECTIONS.items():
+        while True:
+            batch = await db[collection].find(
+                {"contenido": {"$exists": True}}, {"_id": 0, "id": 1, "contenido": 1}
+            ).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+            batch_moved = 0
+            for norma in batch:
+                summary = await store_content(db, kind, norma["id"], norma["contenido"])
+                result = await db[collection].update_one(
+                    {"id": norma["id"], "contenido": norma["contenido"]},
+                    {"$set": summary, "$unset": {"contenido": ""}},
+                )
+                batch_moved += result.modified_count
+            if not batch_moved:
+                break  # every body in the batch changed meanwhile: retry on the next start
+            moved += batch_moved
+    if moved:
+        logging.info(f"Contenido de {moved} normas trasladado a {CONTENT_COLLECTION}")
+    return moved
@@ -0,0 +1,330 @@
+"""
+Almacenamiento de archivos (logos y evidencias), direccionado por contenido.
+
+Una sola interfaz con dos backends:
+- firebase: bucket de Firebase Storage por la API REST.
+- local: directorio UPLOADS_DIR, servido por el montaje /uploads.
+
+Los objetos cuyo contenido pasa por el servidor (o que el servidor puede leer,
+como en el backend local) se guardan bajo su SHA-256
+(`logos/sha256/ab/abcdef….png`), así que el mismo logo o la misma foto subidos
+varias veces ocupan un solo objeto. La colección `storage_blobs` lleva, por
+clave, el tamaño, el tipo y un contador de referencias: cada subida suma una y
+cada borrado (`release`) resta una. Un objeto sin referencias no se borra en
+el acto sino tras STORAGE_ORPHAN_GRACE_SECONDS (`sweep_orphans`), reclamándolo
+antes con la marca `deleting` para que ninguna subida nueva lo reutilice
+mientras desaparece.
+
+Los objetos subidos directamente al bucket (permiso firmado o subida
+reanudable) no se pueden leer sin descargarlos: se registran bajo su propio
+nombre, con una referencia y el SHA-256 que declaró el cliente.
+
+STORAGE_BACKEND: firebase | local (firebase si FIREBASE_STORAGE_BUCKET está definido)
+UPLOADS_DIR: directorio del backend local
+STORAGE_ORPHAN_GRACE_SECONDS: espera antes de borrar objetos sin referencias (3600)
+STORAGE_SWEEP_INTERVAL_SECONDS: cada cuánto se buscan objetos sin referencias (600)
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote, unquote
+
+import requests
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+UPLOADS_DIR = Path(os.getenv("UPLOADS_DIR", "/app/backend/uploads"))
+STORAGE_ORPHAN_GRACE_SECONDS = int(os.getenv("STORAGE_ORPHAN_GRACE_SECONDS", "3600"))
+STORAGE_SWEEP_INTERVAL_SECONDS = int(os.getenv("STORAGE_SWEEP_INTERVAL_SECONDS", "600"))
+
+# Under logos/: it is the folder the bucket rules allow
+CAS_PREFIX = "logos/sha256/"
+CONTENT_EXTENSIONS = {"image/jpeg": "jpg", "image/jpg": "jpg", "image/png": "png", "image/webp": "webp"}
+ACQUIRE_RETRIES = 20
+
+
+class InvalidObjectKey(ValueError):
+    pass
+
+
+def storage_backend() -> str:
+    return os.getenv("STORAGE_BACKEND") or ("firebase" if os.getenv("FIREBASE_STORAGE_BUCKET") else "local")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while block := source.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_key(sha256: str, content_type: str) -> str:
+    return f"{CAS_PREFIX}{sha256[:2]}/{sha256}.{CONTENT_EXTENSIONS.get(content_type, 'bin')}"
+
+
+# ====================
+# BACKENDS (blocking; called through asyncio.to_thread)
+# ====================
+
+class LocalBackend:
+    name = "local"
+
+    def __init__(self, root: Path = UPLOADS_DIR):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise InvalidObjectKey(key)
+        return path
+
+    def _type_path(self, path: Path) -> Path:
+        return path.with_suffix(path.suffix + ".type")
+
+    def put_file(self, key: str, source: Path, content_type: str, move: bool = False):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(path.suffix + ".part")
+        if move:
+            os.replace(source, partial)
+        else:
+            shutil.copyfile(source, partial)
+        os.replace(partial, path)
+        self._type_path(path).write_text(content_type)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(path.suffix + ".part")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+        self._type_path(path).write_text(content_type)
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def content_type(self, key: str) -> Optional[str]:
+        type_path = self._type_path(self.path(key))
+        return type_path.read_text().strip() if type_path.exists() else None
+
+    def delete(self, key: str) -> bool:
+        path = self.path(key)
+        path.unlink(missing_ok=True)
+        self._type_path(path).unlink(missing_ok=True)
+        return True
+
+    def url(self, key: str, base_url: str = "") -> str:
+        return f"{base_url}/uploads/{key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        marker = "/uploads/"
+        return url.split(marker, 1)[1].split("?", 1)[0] if marker in url else None
+
+
+class FirebaseBackend:
+    name = "firebase"
+
+    def __init__(self, bucket: Optional[str] = None):
+        self.bucket = bucket or os.getenv("FIREBASE_STORAGE_BUCKET", "")
+
+    def _object_url(self, key: str) -> str:
+        return f"https://firebasestorage.googleapis.com/v0/b/{self.bucket}/o/{quote(key, safe='')}"
+
+    def upload_url(self, key: str) -> str:
+        return f"https://firebasestorage.googleapis.com/v0/b/{self.bucket}/o?uploadType=media&name={quote(key, safe='')}"
+
+    def _post(self, key: str, body, content_type: str):
+        response = requests.post(self.upload_url(key), data=body, headers={'Content-Type': content_type}, timeout=120)
+        if response.status_code not in [200, 201]:
+            raise Exception(f"Firebase upload failed: {response.status_code} - {response.text}")
+
+    def put_file(self, key: str, source: Path, content_type: str, move: bool = False):
+        # requests streams file objects, so the body is never loaded whole
+        with open(source, "rb") as body:
+            self._post(key, body, content_type)
+        if move:
+            Path(source).unlink(missing_ok=True)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str):
+        self._post(key, data, content_type)
+
+    def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        response = requests.get(self._object_url(key), timeout=10)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def exists(self, key: str) -> bool:
+        return self.metadata(key) is not None
+
+    def delete(self, key: str) -> bool:
+        response = requests.delete(self._object_url(key), timeout=30)
+        return response.status_code in (204, 404)
+
+    def url(self, key: str, base_url: str = "") -> str:
+        return f"{self._object_url(key)}?alt=media"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        if 'firebasestorage.googleapis.com' not in url or '/o/' not in url:
+            return None
+        return unquote(url.split('/o/', 1)[1].split('?', 1)[0])
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None or _backend.name != storage_backend():
+        _backend = LocalBackend() if storage_backend() == "local" else FirebaseBackend()
+    return _backend
+
+
+# ====================
+# CONTENT-ADDRESSED STORE
+# ====================
+
+class ObjectStore:
+    """Reference-counted objects in the configured backend (see module docstring)"""
+
+    def __init__(self, db, backend=None):
+        self.db = db
+        self.backend = backend or get_backend()
+
+    async def _acquire(self, key: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Add a reference to `key`; returns the blob as it was before (None if new)"""
+        for _ in range(ACQUIRE_RETRIES):
+            try:
+                return await self.db.storage_blobs.find_one_and_update(
+                    {"_id": key, "deleting": {"$ne": True}},
+                    {"$inc": {"refs": 1}, "$unset": {"orphaned_at": ""},
+                     "$setOnInsert": {**fields, "created_at": _now().isoformat()}},
+                    upsert=True, return_document=ReturnDocument.BEFORE,
+                )
+            except DuplicateKeyError:
+                # Being swept right now: wait for it to disappear, then start afresh
+                await asyncio.sleep(0.25)
+        raise RuntimeError(f"El objeto {key} sigue en proceso de borrado")
+
+    async def _store_verified(self, sha256: str, size: int, content_type: str, write) -> Dict[str, Any]:
+        key = content_key(sha256, content_type)
+        before = await self._acquire(key, {"sha256": sha256, "size": size, "content_type": content_type, "verified": True})
+        deduplicated = bool(before and before.get("stored"))
+        try:
+            await asyncio.to_thread(write, None if deduplicated else key)
+        except Exception:
+            await self.release(key)
+            raise
+        if not deduplicated:
+            await self.db.storage_blobs.update_one({"_id": key}, {"$set": {"stored": True}})
+        return {"key": key, "sha256": sha256, "size": size, "content_type": content_type, "deduplicated": deduplicated}
+
+    async def put_bytes(self, data: bytes, content_type: str) -> Dict[str, Any]:
+        """Store content held in memory; identical content is stored once"""
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        def write(key):
+            if key is not None:
+                self.backend.put_bytes(key, data, content_type)
+
+        return await self._store_verified(sha256, len(data), content_type, write)
+
+    async def put_file(self, source: Path, content_type: str, sha256: Optional[str] = None,
+                       move: bool = False) -> Dict[str, Any]:
+        """Store a file by its content (hashed here unless given); with `move` the source is consumed"""
+        sha256 = sha256 or await asyncio.to_thread(file_sha256, source)
+        size = Path(source).stat().st_size
+
+        def write(key):
+            if key is not None:
+                self.backend.put_file(key, Path(source), content_type, move=move)
+            elif move:
+                Path(source).unlink(missing_ok=True)
+
+        return await self._store_verified(sha256, size, content_type, write)
+
+    async def adopt(self, key: str, size: int, content_type: str, sha256: Optional[str] = None,
+                    verified: bool = False) -> Dict[str, Any]:
+        """
+        Take over an object already written to the backend under `key`. A
+        verified local object is moved to its content address (or dropped if
+        that content is already stored); anything else keeps its key.
+        """
+        if verified and sha256 and isinstance(self.backend, LocalBackend):
+            stored = await self.put_file(self.backend.path(key), content_type, sha256, move=True)
+            await asyncio.to_thread(self.backend.delete, key)
+            return stored
+        await self._acquire(key, {"sha256": sha256, "size": size, "content_type": content_type,
+                                  "verified": verified, "stored": True})
+        return {"key": key, "sha256": sha256, "size": size, "content_type": content_type, "deduplicated": False}
+
+    def url(self, key: str, base_url: str = "") -> str:
+        return self.backend.url(key, base_url)
+
+    async def release(self, key: str) -> bool:
+        """Drop one reference; the object is deleted by the sweeper once unreferenced. False if unknown"""
+        blob = await self.db.storage_blobs.find_one_and_update(
+            {"_id": key, "refs": {"$gt": 0}}, {"$inc": {"refs": -1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not blob:
+            return False
+        if blob["refs"] == 0:
+            await self.db.storage_blobs.update_one({"_id": key, "refs": 0}, {"$set": {"orphaned_at": _now().isoformat()}})
+        return True
+
+    async def release_url(self, url: str) -> bool:
+        """Release the object behind a public URL; objects stored before reference counting are deleted directly"""
+        key = self.backend.key_from_url(url)
+        if key is None:
+            return False
+        if await self.release(key):
+            return True
+        if await self.db.storage_blobs.find_one({"_id": key}, {"_id": 1}):
+            return True  # already unreferenced
+        return bool(await asyncio.to_thread(self.backend.delete, key))
+
+    async def sweep_orphans(self, grace_seconds: int = STORAGE_ORPHAN_GRACE_SECONDS) -> int:
+        """Delete objects left without references for longer than the grace period"""
+        cutoff = (_now() - timedelta(seconds=grace_seconds)).isoformat()
+        deleted = 0
+        while True:
+            blob = await self.db.storage_blobs.find_one_and_update(
+                {"refs": 0, "orphaned_at": {"$lt": cutoff}, "deleting": {"$ne": True}},
+                {"$set": {"deleting": True}},
+            )
+            if not blob:
+                break
+            try:
+                await asyncio.to_thread(self.backend.delete, blob["_id"])
+                await self.db.storage_blobs.delete_one({"_id": blob["_id"], "deleting": True})
+                deleted += 1
+            except Exception as e:
+                logging.error(f"No se pudo borrar el objeto {blob['_id']}: {e}")
+                await self.db.storage_blobs.update_one({"_id": blob["_id"]}, {"$unset": {"deleting": ""}})
+                break
+        if deleted:
+            logging.info(f"Objetos sin referencias borrados: {deleted}")
+        return deleted
+
+    async def run_sweeper(self, interval: int = STORAGE_SWEEP_INTERVAL_SECONDS):
+        """Sweep orphans every `interval` seconds until cancelled"""
+        while True:
+            try:
+                await self.sweep_orphans()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error al barrer objetos sin referencias: {e}")
+            await asyncio.sleep(interval)
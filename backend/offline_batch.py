@@ -0,0 +1,188 @@
+"""
+Envío por lotes de operaciones encoladas sin conexión.
+
+Un auditor en planta acumula guardados, análisis de evidencias y solicitudes de
+recomendación mientras no tiene red; al reconectar los envía en una sola
+petición. Las operaciones se aplican en orden sobre el estado de cada
+auditoría en memoria, cada auditoría se recalifica una sola vez y todas las
+escrituras salen en un único `bulk_write`. Cada operación recibe su propio
+resultado.
+
+Conflictos: una operación de respuestas puede llevar `base_version`, la versión
+de la auditoría que tenía el cliente al encolarla. Los estándares que otra
+sesión modificó después de esa versión (su `rev` es mayor) no se sobrescriben y
+se devuelven como conflicto con el valor actual del servidor.
+
+Reenvíos: si la respuesta de un lote se pierde, el cliente lo vuelve a enviar
+completo. Los resultados de las operaciones aplicadas se guardan en la
+auditoría (`applied_ops`, los últimos BATCH_APPLIED_OPS_KEPT) en la misma
+escritura que las aplica, y una operación ya aplicada devuelve ese resultado
+(con `replayed`) sin repetirse: ni otra evidencia ni otra llamada al LLM.
+
+BATCH_MAX_OPERATIONS: operaciones por lote (500)
+BATCH_LLM_CONCURRENCY: llamadas al LLM simultáneas dentro de un lote (4)
+BATCH_APPLIED_OPS_KEPT: resultados de operaciones aplicadas que se guardan por auditoría (1000)
+"""
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from cascade_purge import dropped_evidence_urls, release_urls
+from http_cache import versioned_update
+from response_map import response_key, set_responses, stored_map, version_filter
+from scoring import score_responses
+from standards_catalog import catalog_for_inspection
+
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "500"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+BATCH_APPLIED_OPS_KEPT = int(os.getenv("BATCH_APPLIED_OPS_KEPT", "1000"))
+
+OPERATION_TYPES = ("responses", "recommendation", "image_analysis")
+RESPONSE_FIELDS = ("response", "observations", "ai_recommendation", "evidence_images")
+
+
+def outcome(operation, status: str, **fields) -> Dict[str, Any]:
+    return {"op_id": operation.op_id, "type": operation.type, "auditoria_id": operation.auditoria_id,
+            "status": status, **fields}
+
+
+def replayed_outcomes(inspections: Dict[str, Dict[str, Any]], operations: list) -> Dict[str, Dict[str, Any]]:
+    """Stored outcome of every operation already applied by an earlier submission, by op_id"""
+    applied = {
+        auditoria_id: {entry["op_id"]: entry for entry in inspection.get("applied_ops") or []}
+        for auditoria_id, inspection in inspections.items()
+    }
+    return {
+        operation.op_id: {**applied[operation.auditoria_id][operation.op_id], "replayed": True}
+        for operation in operations
+        if operation.op_id in applied.get(operation.auditoria_id, {})
+    }
+
+
+def _entry(merged: Dict[str, Dict[str, Any]], standard_id: str) -> Dict[str, Any]:
+    key = response_key(standard_id)
+    entry = dict(merged.get(key) or {"standard_id": standard_id})
+    merged[key] = entry
+    return entry
+
+
+def fold_operations(inspection: Dict[str, Any], operations: list,
+                    llm_results: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Apply the operations of one inspection, in order, to its stored responses.
+    `llm_results` holds the generated recommendation or image analysis per
+    op_id. Returns the merged responses map and one outcome per operation.
+    """
+    catalog = catalog_for_inspection(inspection)
+    merged = stored_map(inspection)
+    touched = set()
+    outcomes = []
+
+    for operation in operations:
+        if operation.type == "responses":
+            applied, conflicts = [], []
+            for change in operation.responses:
+                standard_id = change.get('standard_id')
+                if standard_id not in catalog.by_id:
+                    conflicts.append({"standard_id": standard_id, "reason": "unknown_standard"})
+                    continue
+                key = response_key(standard_id)
+                current = merged.get(key) or {}
+                if (operation.base_version is not None and key not in touched
+                        and current.get('rev', 0) > operation.base_version):
+                    conflicts.append({"standard_id": standard_id, "reason": "modified", "server": current})
+                    continue
+                _entry(merged, standard_id).update({f: change[f] for f in RESPONSE_FIELDS if f in change})
+                touched.add(key)
+                applied.append(standard_id)
+            status = "applied" if not conflicts else ("partial" if applied else "conflict")
+            outcomes.append(outcome(operation, status, applied=applied, conflicts=conflicts))
+            continue
+
+        result = llm_results.get(operation.op_id)
+        if result is None or "error" in result:
+            outcomes.append(outcome(operation, "failed", error=(result or {}).get("error", "sin resultado")))
+            continue
+
+        if operation.type == "recommendation":
+            standard_id = operation.recommendation.standard_id
+            _entry(merged, standard_id)['ai_recommendation'] = result['recommendation']
+        else:
+            standard_id = operation.image_analysis.standard_id
+            entry = _entry(merged, standard_id)
+            entry['evidence_images'] = [*(entry.get('evidence_images') or []), {
+                "url": operation.image_url or "",
+                "filename": operation.filename or "",
+                "analysis": result['analysis'],
+            }]
+        touched.add(response_key(standard_id))
+        outcomes.append(outcome(operation, "applied", result=result))
+
+    return merged, outcomes
+
+
+def inspection_update(inspection: Dict[str, Any], merged: Dict[str, Dict[str, Any]], batch_id: str,
+                      applied: List[Dict[str, Any]]) -> Tuple[UpdateOne, Dict[str, Any], List[str]]:
+    """
+    Single conditional update rescoring the inspection once and recording
+    the `applied` outcomes, plus the new summary and the evidence URLs it drops.
+    """
+    catalog = catalog_for_inspection(inspection)
+    responses_with_score, percentage, progress, answered_count = score_responses(list(merged.values()), catalog)
+    version = inspection.get('version', 0)
+    update = versioned_update({"total_score": percentage, "progress": progress, "last_sync_batch": batch_id})
+    set_responses(update, inspection, responses_with_score, rev=version + 1)
+    update["$push"] = {"applied_ops": {"$each": applied, "$slice": -BATCH_APPLIED_OPS_KEPT}}
+    summary = {"version": version + 1, "total_score": percentage, "progress": progress,
+               "answered": answered_count, "total": len(catalog)}
+    dropped = dropped_evidence_urls(inspection, responses_with_score)
+    return UpdateOne({"id": inspection['id'], **version_filter(version)}, update), summary, dropped
+
+
+async def apply_batch(db, inspections: Dict[str, Dict[str, Any]], operations: list,
+                      llm_results: Dict[str, Dict[str, Any]],
+                      rejected: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Fold the operations of every inspection, write them with one bulk_write
+    and report per-operation outcomes in submission order. `rejected` holds
+    the outcomes of operations refused up front (missing or closed audit,
+    no permission) or already applied (see replayed_outcomes). Inspections changed by another session while the batch
+    ran are left untouched and their operations come back as `retry`.
+    """
+    batch_id = str(uuid.uuid4())
+    outcomes: Dict[str, Dict[str, Any]] = dict(rejected or {})
+    by_inspection: Dict[str, list] = {}
+    for operation in operations:
+        if operation.op_id not in outcomes:
+            by_inspection.setdefault(operation.auditoria_id, []).append(operation)
+
+    requests, summaries, dropped = [], {}, {}
+    for auditoria_id, ops in by_inspection.items():
+        merged, op_outcomes = fold_operations(inspections[auditoria_id], ops, llm_results)
+        outcomes.update({o["op_id"]: o for o in op_outcomes})
+        applied = [o for o in op_outcomes if o["status"] in ("applied", "partial", "conflict")]
+        if any(o["status"] in ("applied", "partial") for o in op_outcomes):
+            request, summaries[auditoria_id], dropped[auditoria_id] = inspection_update(
+                inspections[auditoria_id], merged, batch_id, applied)
+            requests.append(request)
+
+    if requests:
+        await db.inspections.bulk_write(requests, ordered=False)
+        written = {doc['id'] async for doc in db.inspections.find(
+            {"id": {"$in": list(summaries)}, "last_sync_batch": batch_id}, {"_id": 0, "id": 1}
+        )}
+        for auditoria_id in set(summaries) - written:
+            del summaries[auditoria_id]
+            for operation in by_inspection[auditoria_id]:
+                if outcomes[operation.op_id]["status"] in ("applied", "partial"):
+                    outcomes[operation.op_id] = {**outcomes[operation.op_id], "status": "retry",
+                                                 "error": "La auditoría cambió durante el envío"}
+        await release_urls(db, [url for auditoria_id in summaries for url in dropped[auditoria_id]])
+
+    return {
+        "batch_id": batch_id,
+        "results": [outcomes[operation.op_id] for operation in operations],
+        "auditorias": summaries,
+    }
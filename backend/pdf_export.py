@@ -0,0 +1,241 @@
+"""
+Exportación masiva de informes PDF en un archivo ZIP.
+
+Los informes se renderizan en paralelo en un pool de procesos (ReportLab es
+CPU puro y bloquearía el event loop) y se reutilizan desde una caché en disco
+indexada por las marcas de versión de la auditoría, la empresa y el análisis.
+El ZIP se escribe en streaming a medida que terminan los informes: en memoria
+solo hay como mucho PDF_EXPORT_WINDOW informes a la vez.
+
+PDF_EXPORT_WORKERS: procesos del pool (por defecto, número de CPUs)
+PDF_EXPORT_WINDOW: informes en vuelo simultáneamente (por defecto, 2 x workers)
+PDF_EXPORT_MAX_REPORTS: límite de informes por exportación
+PDF_CACHE_DIR / PDF_CACHE_MAX_MB: ubicación y tamaño máximo de la caché de renders
+PDF_SPOOL_MAX_MB: tamaño a partir del cual una descarga individual pasa de memoria a archivo temporal
+"""
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from http_cache import document_stamp
+from cache import DiskCache
+from metrics import CACHE_LOOKUPS, PDF_RENDER_DURATION, PDF_SIZE
+
+# Bump when the report layout changes so stale cached renders are not reused
+PDF_TEMPLATE_VERSION = "2"
+
+PDF_EXPORT_WORKERS = int(os.getenv("PDF_EXPORT_WORKERS", "0")) or os.cpu_count() or 2
+PDF_EXPORT_WINDOW = int(os.getenv("PDF_EXPORT_WINDOW", "0")) or 2 * PDF_EXPORT_WORKERS
+PDF_EXPORT_MAX_REPORTS = int(os.getenv("PDF_EXPORT_MAX_REPORTS", "500"))
+PDF_SPOOL_MAX_BYTES = int(os.getenv("PDF_SPOOL_MAX_MB", "8")) * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Process pool for PDF renders, created on first use"""
+    global _pool
+    if _pool is None:
+        # spawn: never fork a process that holds the event loop and Mongo sockets
+        _pool = ProcessPoolExecutor(max_workers=PDF_EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pdf_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def render_report_pdf(company: Dict[str, Any], inspection: Dict[str, Any],
+                      analysis: Optional[Dict[str, Any]]) -> Tuple[bytes, float]:
+    """Render one report in memory; runs inside a pool worker. Returns the bytes and render time"""
+    from pdf_generator import generate_professional_pdf
+
+    start = time.perf_counter()
+    buffer = BytesIO()
+    generate_professional_pdf(buffer, company, inspection, analysis)
+    return buffer.getvalue(), time.perf_counter() - start
+
+
+def render_report_spooled(company: Dict[str, Any], inspection: Dict[str, Any],
+                          analysis: Optional[Dict[str, Any]]) -> Tuple[tempfile.SpooledTemporaryFile, int]:
+    """
+    Render one report for a single download. The PDF stays in memory up to
+    PDF_SPOOL_MAX_BYTES and rolls over to an anonymous temporary file beyond
+    that, so there is no shared path and nothing to clean up but the handle.
+    Returns the spool rewound to the start and the PDF size.
+    """
+    from pdf_generator import generate_professional_pdf
+
+    spool = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES)
+    try:
+        generate_professional_pdf(spool, company, inspection, analysis)
+        size = spool.tell()
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+    return spool, size
+
+
+def iter_spooled(spool) -> Iterator[bytes]:
+    """Read a spooled PDF in chunks, closing (and deleting) it when done or on disconnect"""
+    try:
+        while chunk := spool.read(STREAM_CHUNK_SIZE):
+            yield chunk
+    finally:
+        spool.close()
+
+
+def attachment_header(filename: str) -> str:
+    """Content-Disposition value, RFC 5987-encoded when the name is not plain ASCII"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+# ====================
+# RENDER CACHE
+# ====================
+
+# Keys carry the version stamps of every document feeding the report, so
+# entries never need invalidation; old ones simply age out of the LRU
+pdf_cache = DiskCache(
+    os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "auditx-pdf-cache")),
+    int(os.getenv("PDF_CACHE_MAX_MB", "500")) * 1024 * 1024,
+    suffix=".pdf",
+)
+
+
+def report_cache_key(company: Dict[str, Any], inspection: Dict[str, Any], analysis: Optional[Dict[str, Any]]) -> str:
+    stamps = "|".join([PDF_TEMPLATE_VERSION, document_stamp(inspection), document_stamp(company), document_stamp(analysis)])
+    return "pdf:" + hashlib.sha256(stamps.encode("utf-8")).hexdigest()
+
+
+async def render_report_cached(company: Dict[str, Any], inspection: Dict[str, Any],
+                               analysis: Optional[Dict[str, Any]]) -> bytes:
+    """Cached render, falling back to the process pool"""
+    key = report_cache_key(company, inspection, analysis)
+    data = await pdf_cache.get(key)
+    if data is not None:
+        CACHE_LOOKUPS.labels("pdf", "hit_local").inc()
+        return data
+
+    CACHE_LOOKUPS.labels("pdf", "miss").inc()
+    loop = asyncio.get_running_loop()
+    data, elapsed = await loop.run_in_executor(get_pdf_pool(), render_report_pdf, company, inspection, analysis)
+    PDF_RENDER_DURATION.observe(elapsed)
+    PDF_SIZE.observe(len(data))
+    try:
+        await pdf_cache.set(key, data)
+    except OSError as e:
+        logging.warning(f"No se pudo guardar el PDF en caché: {e}")
+    return data
+
+
+# ====================
+# STREAMING ZIP
+# ====================
+
+class ZipStreamSink:
+    """Write-only, non-seekable file object: ZipFile falls back to data descriptors"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def report_filename(company: Dict[str, Any], inspection: Dict[str, Any]) -> str:
+    name = re.sub(r"[^\w.-]+", "_", company.get('company_name') or "empresa").strip("_")
+    date = (inspection.get('closed_at') or inspection.get('created_at') or "")[:10]
+    parts = ["informe", name, date, inspection['id'][:8]]
+    return "_".join(p for p in parts if p) + ".pdf"
+
+
+async def stream_reports_zip(db, query: Dict[str, Any], max_reports: int = PDF_EXPORT_MAX_REPORTS) -> AsyncIterator[bytes]:
+    """
+    Yield a ZIP archive with the report of every inspection matching `query`.
+
+    Inspections are read from a cursor and at most PDF_EXPORT_WINDOW renders are
+    in flight; each PDF is written to the archive (and its bytes yielded) as
+    soon as it completes, so entries appear in completion order. Reports that
+    fail are listed in ERRORES.txt at the end instead of aborting the download.
+    """
+    sink = ZipStreamSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+    companies: Dict[str, Optional[Dict[str, Any]]] = {}
+    pending: Dict[asyncio.Future, str] = {}
+    errors = []
+
+    async def write_completed():
+        done, _ = await asyncio.wait(set(pending), return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            filename = pending.pop(task)
+            try:
+                data = task.result()
+            except Exception as e:
+                logging.error(f"Error generando {filename} para exportación: {e}")
+                errors.append(f"{filename}: {e}")
+                continue
+            await asyncio.to_thread(archive.writestr, filename, data)
+
+    try:
+        cursor = db.inspections.find(query, {"_id": 0}).sort("created_at", 1).limit(max_reports)
+        async for inspection in cursor:
+            company_id = inspection['company_id']
+            if company_id not in companies:
+                companies[company_id] = await db.companies.find_one({"id": company_id}, {"_id": 0})
+            company = companies[company_id]
+            if not company:
+                errors.append(f"{inspection['id']}: empresa no encontrada")
+                continue
+
+            analysis = await db.ai_analyses.find_one({"inspection_id": inspection['id']}, {"_id": 0})
+            task = asyncio.ensure_future(render_report_cached(company, inspection, analysis))
+            pending[task] = report_filename(company, inspection)
+
+            if len(pending) >= PDF_EXPORT_WINDOW:
+                await write_completed()
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+
+        while pending:
+            await write_completed()
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+        if errors:
+            archive.writestr("ERRORES.txt", "\n".join(errors) + "\n")
+        archive.close()
+        yield sink.drain()
+    finally:
+        # Client disconnected or export failed: drop renders nobody will read
+        for task in pending:
+            task.cancel()
@@ -4,14 +4,19 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    PageBreak, Image, KeepTogether
+    PageBreak, Image, KeepTogether, Preformatted
 )
+from reportlab.platypus.flowables import HRFlowable
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
 from datetime import datetime, timezone
+from xml.sax.saxutils import escape
 import os
+import re
 from io import BytesIO
 import requests
 
+from tracing import span, SPAN_KIND_CLIENT
+
 # Colors palette for AuditX branding
 AUDITX_BLUE = colors.HexColor('#2563eb')
 AUDITX_PURPLE = colors.HexColor('#7c3aed')
@@ -19,6 +24,149 @@ AUDITX_GRAY = colors.HexColor('#6b7280')
 AUDITX_LIGHT_GRAY = colors.HexColor('#f3f4f6')
 HEADER_BG = colors.HexColor('#1e3a8a')
 
+PAGE_MARGIN = inch
+CONTENT_WIDTH = A4[0] - 2 * PAGE_MARGIN
+
+# ====================
+# STYLE REGISTRY (compiled once per process, shared by every build)
+# ====================
+
+def _build_stylesheet():
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        'CoverTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=HEADER_BG,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold',
+        leading=28
+    ))
+    for name, score_color in (('ScoreHigh', colors.green), ('ScoreMedium', colors.orange), ('ScoreLow', colors.red)):
+        styles.add(ParagraphStyle(
+            name,
+            parent=styles['Normal'],
+            fontSize=48,
+            textColor=score_color,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ))
+    styles.add(ParagraphStyle(
+        'CompanyName',
+        parent=styles['Heading2'],
+        fontSize=20,
+        textColor=AUDITX_BLUE,
+        alignment=TA_CENTER,
+        spaceAfter=20
+    ))
+    styles.add(ParagraphStyle(
+        'Branding',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.white,
+        alignment=TA_CENTER,
+        leading=14
+    ))
+    styles.add(ParagraphStyle(
+        'SectionHeader',
+        parent=styles['Heading1'],
+        fontSize=16,
+        textColor=HEADER_BG,
+        spaceAfter=20,
+        spaceBefore=20,
+        fontName='Helvetica-Bold',
+        borderPadding=(10, 5, 10, 5),
+        backColor=AUDITX_LIGHT_GRAY,
+        borderRadius=5
+    ))
+    styles.add(ParagraphStyle(
+        'CustomH3',
+        parent=styles['Heading3'],
+        fontSize=12,
+        textColor=AUDITX_BLUE,
+        spaceAfter=10,
+        spaceBefore=15
+    ))
+    styles.add(ParagraphStyle(
+        'CustomH4',
+        parent=styles['Heading4'],
+        textColor=HEADER_BG,
+        spaceAfter=6,
+        spaceBefore=10
+    ))
+    for level in range(4):
+        styles.add(ParagraphStyle(
+            f'ListLevel{level}',
+            parent=styles['Normal'],
+            leftIndent=14 + 14 * level,
+            bulletIndent=4 + 14 * level,
+            spaceAfter=2
+        ))
+    styles.add(ParagraphStyle(
+        'Quote',
+        parent=styles['BodyText'],
+        leftIndent=14,
+        textColor=AUDITX_GRAY,
+        fontName='Helvetica-Oblique'
+    ))
+    styles.add(ParagraphStyle(
+        'TableCell',
+        parent=styles['Normal'],
+        fontSize=9,
+        leading=11
+    ))
+    styles.add(ParagraphStyle(
+        'TableHeader',
+        parent=styles['Normal'],
+        fontSize=9,
+        leading=11,
+        textColor=colors.white,
+        fontName='Helvetica-Bold'
+    ))
+    return styles
+
+STYLES = _build_stylesheet()
+
+COVER_INFO_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('TEXTCOLOR', (0, 0), (0, -1), AUDITX_GRAY),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
+BRANDING_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), HEADER_BG),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 15),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+    ('ROUNDEDCORNERS', [10, 10, 10, 10]),
+])
+
+CHARACTERIZATION_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('TEXTCOLOR', (0, 0), (0, -1), AUDITX_BLUE),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, AUDITX_GRAY),
+])
+
+MARKDOWN_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), HEADER_BG),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, AUDITX_LIGHT_GRAY]),
+    ('GRID', (0, 0), (-1, -1), 0.5, AUDITX_GRAY),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
 def add_header_footer(canvas, doc):
     """Add header and footer to each page"""
     canvas.saveState()
@@ -44,7 +192,8 @@ def create_cover_page(story, styles, company_data, inspection_data, company_logo
     if company_logo_url:
         try:
             # Download logo
-            response = requests.get(company_logo_url, timeout=5)
+            with span("storage.download_logo", SPAN_KIND_CLIENT):
+                response = requests.get(company_logo_url, timeout=5)
             if response.status_code == 200:
                 img_data = BytesIO(response.content)
                 img = Image(img_data)
@@ -63,16 +212,7 @@ def create_cover_page(story, styles, company_data, inspection_data, company_logo
             pass  # Continue without logo if it fails
     
     # Main title
-    title_style = ParagraphStyle(
-        'CoverTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=HEADER_BG,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold',
-        leading=28
-    )
+    title_style = styles['CoverTitle']
     
     story.append(Spacer(1, 1*inch))
     story.append(Paragraph("INFORME DE EVALUACIÓN", title_style))
@@ -82,30 +222,13 @@ def create_cover_page(story, styles, company_data, inspection_data, company_logo
     
     # Score badge
     score = inspection_data['total_score']
-    score_color = colors.green if score >= 85 else colors.orange if score >= 60 else colors.red
-    
-    score_style = ParagraphStyle(
-        'Score',
-        parent=styles['Normal'],
-        fontSize=48,
-        textColor=score_color,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
+    score_style = styles['ScoreHigh'] if score >= 85 else styles['ScoreMedium'] if score >= 60 else styles['ScoreLow']
     
     story.append(Paragraph(f"{score:.1f}%", score_style))
     story.append(Spacer(1, 0.3*inch))
     
     # Company name
-    company_style = ParagraphStyle(
-        'CompanyName',
-        parent=styles['Heading2'],
-        fontSize=20,
-        textColor=AUDITX_BLUE,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    story.append(Paragraph(company_data['company_name'], company_style))
+    story.append(Paragraph(escape(company_data['company_name']), styles['CompanyName']))
     
     # Company info table
     info_data = [
@@ -117,62 +240,26 @@ def create_cover_page(story, styles, company_data, inspection_data, company_logo
     ]
     
     info_table = Table(info_data, colWidths=[2.5*inch, 3.5*inch])
-    info_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('TEXTCOLOR', (0, 0), (0, -1), AUDITX_GRAY),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    info_table.setStyle(COVER_INFO_TABLE_STYLE)
     
     story.append(Spacer(1, 0.5*inch))
     story.append(info_table)
     story.append(Spacer(1, 1*inch))
     
     # AuditX branding box
-    branding_style = ParagraphStyle(
-        'Branding',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.white,
-        alignment=TA_CENTER,
-        leading=14
-    )
-    
     branding_data = [[
-        Paragraph("<b>Generado con AuditX</b><br/>El mejor software de auditoría en SG-SST<br/>nelson@sanchezcya.com | 3206177799", branding_style)
+        Paragraph("<b>Generado con AuditX</b><br/>El mejor software de auditoría en SG-SST<br/>nelson@sanchezcya.com | 3206177799", styles['Branding'])
     ]]
     
     branding_table = Table(branding_data, colWidths=[5*inch])
-    branding_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), HEADER_BG),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 15),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-        ('ROUNDEDCORNERS', [10, 10, 10, 10]),
-    ]))
+    branding_table.setStyle(BRANDING_TABLE_STYLE)
     
     story.append(branding_table)
     story.append(PageBreak())
 
-def create_section_header(title, styles):
-    """Create a styled section header"""
-    section_style = ParagraphStyle(
-        'SectionHeader',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=HEADER_BG,
-        spaceAfter=20,
-        spaceBefore=20,
-        fontName='Helvetica-Bold',
-        borderPadding=(10, 5, 10, 5),
-        backColor=AUDITX_LIGHT_GRAY,
-        borderRadius=5
-    )
-    return Paragraph(title, section_style)
+def create_section_header(title, styles=STYLES):
+    """Create a styled section header (title is ReportLab paragraph markup)"""
+    return Paragraph(title, styles['SectionHeader'])
 
 def create_characterization_section(story, styles, company_data):
     """Create company characterization section"""
@@ -205,34 +292,170 @@ def create_characterization_section(story, styles, company_data):
     
     if char_data:
         char_table = Table(char_data, colWidths=[2.5*inch, 4*inch])
-        char_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TEXTCOLOR', (0, 0), (0, -1), AUDITX_BLUE),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, AUDITX_GRAY),
-        ]))
+        char_table.setStyle(CHARACTERIZATION_TABLE_STYLE)
         
         story.append(char_table)
         story.append(Spacer(1, 0.3*inch))
 
+# ====================
+# MARKDOWN -> FLOWABLES
+# ====================
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*$')
+BULLET_RE = re.compile(r'^(\s*)([-*+])\s+(.*)$')
+ORDERED_RE = re.compile(r'^(\s*)(\d+)[.)]\s+(.*)$')
+TABLE_SEPARATOR_RE = re.compile(r'^\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?$')
+HR_RE = re.compile(r'^(\*\s*){3,}$|^(-\s*){3,}$|^(_\s*){3,}$')
+
+INLINE_RULES = [
+    (re.compile(r'`([^`]+)`'), r'<font face="Courier">\1</font>'),
+    (re.compile(r'\*\*(.+?)\*\*|__(.+?)__'), lambda m: f"<b>{m.group(1) or m.group(2)}</b>"),
+    (re.compile(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])|(?<![\w_])_(?!\s)(.+?)(?<!\s)_(?![\w_])'),
+     lambda m: f"<i>{m.group(1) or m.group(2)}</i>"),
+    (re.compile(r'\[([^\]]+)\]\((https?://[^)\s]+)\)'), r'<link href="\2" color="blue">\1</link>'),
+]
+
+
+def inline_markup(text):
+    """Escape XML and translate Markdown inline emphasis into ReportLab paragraph markup"""
+    text = escape(text)
+    for pattern, replacement in INLINE_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
+
+
+def _markdown_table(rows, styles):
+    header, body = rows[0], rows[1:]
+    columns = max(len(row) for row in rows)
+    data = [[Paragraph(inline_markup(cell), styles['TableHeader']) for cell in header + [''] * (columns - len(header))]]
+    for row in body:
+        data.append([Paragraph(inline_markup(cell), styles['TableCell']) for cell in row + [''] * (columns - len(row))])
+    table = Table(data, colWidths=[CONTENT_WIDTH / columns] * columns, repeatRows=1, hAlign='LEFT')
+    table.setStyle(MARKDOWN_TABLE_STYLE)
+    return table
+
+
+def markdown_to_flowables(markdown_text, styles=STYLES):
+    """
+    Compile AI-generated Markdown into flowables in a single pass.
+
+    Supports headings, paragraphs, nested bullet/numbered lists, pipe tables,
+    block quotes, fenced code, horizontal rules and inline bold/italic/code/links.
+    """
+    flowables = []
+    paragraph = []
+    table_rows = []
+    code_lines = None
+
+    def flush_paragraph():
+        if paragraph:
+            flowables.append(Paragraph(inline_markup(" ".join(paragraph)), styles['BodyText']))
+            paragraph.clear()
+
+    def flush_table():
+        if table_rows:
+            flowables.append(_markdown_table(table_rows, styles))
+            flowables.append(Spacer(1, 0.1*inch))
+            table_rows.clear()
+
+    def add_spacer():
+        if flowables and not isinstance(flowables[-1], Spacer):
+            flowables.append(Spacer(1, 0.1*inch))
+
+    for raw_line in markdown_text.split('\n'):
+        line = raw_line.rstrip()
+        stripped = line.strip()
+
+        # Fenced code blocks are copied verbatim
+        if code_lines is not None:
+            if stripped.startswith('```'):
+                flowables.append(Preformatted('\n'.join(code_lines), styles['Code']))
+                code_lines = None
+            else:
+                code_lines.append(line)
+            continue
+        if stripped.startswith('```'):
+            flush_paragraph()
+            flush_table()
+            code_lines = []
+            continue
+
+        # Tables: consecutive lines starting with a pipe
+        if stripped.startswith('|'):
+            flush_paragraph()
+            if not TABLE_SEPARATOR_RE.match(stripped):
+                table_rows.append(_split_row(stripped))
+            continue
+        flush_table()
+
+        if not stripped:
+            flush_paragraph()
+            add_spacer()
+            continue
+
+        heading = HEADING_RE.match(stripped)
+        if heading:
+            flush_paragraph()
+            level, text = len(heading.group(1)), inline_markup(heading.group(2))
+            if level <= 2:
+                flowables.append(create_section_header(text, styles))
+            elif level == 3:
+                flowables.append(Paragraph(text, styles['CustomH3']))
+            else:
+                flowables.append(Paragraph(text, styles['CustomH4']))
+            continue
+
+        if HR_RE.match(stripped):
+            flush_paragraph()
+            flowables.append(HRFlowable(width='100%', thickness=0.5, color=AUDITX_GRAY, spaceBefore=6, spaceAfter=6))
+            continue
+
+        item = BULLET_RE.match(line) or ORDERED_RE.match(line)
+        if item:
+            flush_paragraph()
+            indent, marker, text = item.groups()
+            level = min(len(indent.expandtabs(4)) // 2, 3)
+            bullet = '•' if marker in '-*+' else f"{marker}."
+            flowables.append(Paragraph(inline_markup(text), styles[f'ListLevel{level}'], bulletText=bullet))
+            continue
+
+        if stripped.startswith('>'):
+            flush_paragraph()
+            flowables.append(Paragraph(inline_markup(stripped.lstrip('> ')), styles['Quote']))
+            continue
+
+        paragraph.append(stripped)
+
+    if code_lines:
+        flowables.append(Preformatted('\n'.join(code_lines), styles['Code']))
+    flush_paragraph()
+    flush_table()
+    return flowables
+
+
 def generate_professional_pdf(pdf_path, company_data, inspection_data, analysis_data):
     """Generate a professional PDF report"""
     
     doc = SimpleDocTemplate(
         pdf_path,
         pagesize=A4,
-        rightMargin=inch,
-        leftMargin=inch,
+        rightMargin=PAGE_MARGIN,
+        leftMargin=PAGE_MARGIN,
         topMargin=0.75*inch,
         bottomMargin=0.75*inch
     )
     
     story = []
-    styles = getSampleStyleSheet()
+    styles = STYLES
     
     # Create cover page
     create_cover_page(story, styles, company_data, inspection_data, company_data.get('logo_url'))
@@ -242,40 +465,7 @@ def generate_professional_pdf(pdf_path, company_data, inspection_data, analysis_
     
     # Add report content
     if analysis_data:
-        # Process markdown content from AI
-        report_lines = analysis_data['report'].split('\n')
-        
-        for line in report_lines:
-            line = line.strip()
-            if not line:
-                story.append(Spacer(1, 0.1*inch))
-                continue
-            
-            # Headers
-            if line.startswith('###'):
-                header_text = line.replace('###', '').strip()
-                header_style = ParagraphStyle(
-                    'CustomH3',
-                    parent=styles['Heading3'],
-                    fontSize=12,
-                    textColor=AUDITX_BLUE,
-                    spaceAfter=10,
-                    spaceBefore=15
-                )
-                story.append(Paragraph(header_text, header_style))
-            elif line.startswith('##'):
-                header_text = line.replace('##', '').strip()
-                story.append(create_section_header(header_text, styles))
-            elif line.startswith('#'):
-                header_text = line.replace('#', '').strip()
-                story.append(create_section_header(header_text, styles))
-            # Lists
-            elif line.startswith('-') or line.startswith('*'):
-                list_text = line[1:].strip()
-                story.append(Paragraph(f"• {list_text}", styles['Normal']))
-            else:
-                # Regular paragraph
-                story.append(Paragraph(line, styles['BodyText']))
+        story.extend(markdown_to_flowables(analysis_data['report'], styles))
     
     # Build PDF with custom header/footer
     doc.build(story, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
@@ -0,0 +1,181 @@
+"""
+Construcción de los prompts del análisis de auditoría.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from response_map import responses_list
+from scoring import phase_percentages as compute_phase_percentages
+from standards_catalog import catalog_for_inspection
+
+
+def build_analysis_prompts(inspection: Dict[str, Any], company: Dict[str, Any]) -> Tuple[str, str]:
+    """Return the analysis prompt and the follow-up report prompt for an inspection"""
+    catalog = catalog_for_inspection(inspection)
+    responses = responses_list(inspection)
+    phase_percentages = compute_phase_percentages(responses, catalog)
+    
+    # Build detailed responses text
+    responses_parts: List[str] = []
+    critical_items = []
+    partial_items = []
+    
+    for resp in responses:
+        standard = catalog.by_id.get(resp['standard_id'])
+        if standard:
+            responses_parts.append(
+                f"\n\nEstándar {standard['id']}: {standard['title']}\n"
+                f"Categoría: {standard['category']}\n"
+                f"Descripción: {standard['description']}\n"
+                f"Respuesta: {resp['response']}\n"
+                f"Observaciones: {resp['observations']}\n"
+                f"Puntaje obtenido: {resp['score']}/{standard['weight']}\n"
+            )
+            
+            if resp['response'] == 'no_cumple':
+                critical_items.append(f"{standard['id']} - {standard['title']}")
+            elif resp['response'] == 'cumple_parcial':
+                partial_items.append(f"{standard['id']} - {standard['title']}")
+    
+    responses_text = "".join(responses_parts)
+    
+    prompt = f"""Eres un experto consultor en Seguridad y Salud en el Trabajo en Colombia, especializado en {catalog.framework}.
+
+INFORMACIÓN DE LA EMPRESA:
+Empresa: {company['company_name']}
+Marco evaluado: {catalog.name} (versión {catalog.version})
+Puntaje Total: {inspection['total_score']:.2f}%
+
+DESGLOSE POR FASES:
+{chr(10).join([f"- {phase}: {pct:.1f}%" for phase, pct in phase_percentages.items()])}
+
+ESTÁNDARES CRÍTICOS (No Cumple): {len(critical_items)}
+ESTÁNDARES PARCIALES (Cumple Parcial): {len(partial_items)}
+
+RESPUESTAS DETALLADAS A LOS ESTÁNDARES:
+{responses_text}
+
+Por favor, proporciona un análisis profesional y estructurado con:
+
+1. **RESUMEN EJECUTIVO**
+   - Nivel de cumplimiento global y clasificación (Crítico <60%, Moderado 60-84%, Excelente ≥85%)
+   - Principales hallazgos en 3-4 puntos clave
+   - Riesgo general identificado
+
+2. **ANÁLISIS POR FASES (PHVA)**
+   - Planear: Análisis del {phase_percentages.get('I. PLANEAR', 0):.1f}% obtenido
+   - Hacer: Análisis del {phase_percentages.get('II. HACER', 0):.1f}% obtenido
+   - Verificar: Análisis del {phase_percentages.get('III. VERIFICAR', 0):.1f}% obtenido
+   - Actuar: Análisis del {phase_percentages.get('IV. ACTUAR', 0):.1f}% obtenido
+
+3. **FORTALEZAS IDENTIFICADAS**
+   - Listar estándares con cumplimiento total
+   - Destacar buenas prácticas observadas
+
+4. **BRECHAS Y OPORTUNIDADES DE MEJORA**
+   - Análisis de los {len(critical_items)} estándares críticos (no cumple)
+   - Análisis de los {len(partial_items)} estándares parciales
+   - Identificar patrones comunes en los incumplimientos
+
+5. **ANÁLISIS DE RIESGOS**
+   - Riesgos asociados a los incumplimientos críticos
+   - Impacto potencial en la seguridad de los trabajadores
+   - Exposición legal y sanciones posibles
+
+El análisis debe ser profesional, técnico, orientado a la acción y fácil de entender para la gerencia."""
+    
+    report_prompt = f"""Basándote en el análisis anterior, genera un informe ejecutivo profesional con plan de acción detallado para {company['company_name']}.
+
+El informe debe incluir:
+
+1. **PORTADA**
+   - Título: "INFORME DE EVALUACIÓN DEL SISTEMA DE GESTIÓN DE SEGURIDAD Y SALUD EN EL TRABAJO"
+   - Empresa: {company['company_name']}
+   - NIT/Identificación: [Pendiente de completar]
+   - Fecha de evaluación: {datetime.now(timezone.utc).strftime('%d de %B de %Y')}
+   - Responsable: {company['admin_name']}
+   - Dirección: {company['address']}
+   - Teléfono: {company['phone']}
+
+2. **RESUMEN EJECUTIVO**
+   - Puntaje global: {inspection['total_score']:.2f}%
+   - Clasificación: [Crítico/Moderado/Excelente según puntaje]
+   - Desglose por fases PHVA
+   - Principales hallazgos (3-4 bullets)
+   - Recomendación principal
+
+3. **RESULTADOS POR FASE**
+   - **I. PLANEAR ({phase_percentages.get('I. PLANEAR', 0):.1f}%)**: Análisis y hallazgos
+   - **II. HACER ({phase_percentages.get('II. HACER', 0):.1f}%)**: Análisis y hallazgos
+   - **III. VERIFICAR ({phase_percentages.get('III. VERIFICAR', 0):.1f}%)**: Análisis y hallazgos
+   - **IV. ACTUAR ({phase_percentages.get('IV. ACTUAR', 0):.1f}%)**: Análisis y hallazgos
+
+4. **FORTALEZAS IDENTIFICADAS**
+   - Listar estándares que cumplen al 100%
+   - Destacar buenas prácticas
+
+5. **BRECHAS CRÍTICAS Y OPORTUNIDADES**
+   - {len(critical_items)} estándares críticos sin cumplir
+   - {len(partial_items)} estándares con cumplimiento parcial
+   - Análisis de patrones e impacto
+
+6. **ANÁLISIS DE RIESGOS ASOCIADOS**
+   - Riesgos de seguridad identificados
+   - Exposición legal y sanciones potenciales
+   - Impacto en operaciones
+
+7. **PLAN DE ACCIÓN PRIORIZADO**
+
+   **A. ACCIONES INMEDIATAS (0-30 días) - PRIORIDAD CRÍTICA**
+   Para cada acción incluir:
+   - Nombre de la acción
+   - Estándar(es) relacionado(s)
+   - Descripción detallada
+   - Responsable sugerido
+   - Recursos estimados
+   - Resultado esperado
+   
+   **B. ACCIONES A CORTO PLAZO (1-3 meses) - PRIORIDAD ALTA**
+   Para cada acción incluir mismo formato anterior
+   
+   **C. ACCIONES A MEDIANO PLAZO (3-12 meses) - PRIORIDAD MEDIA**
+   Para cada acción incluir mismo formato anterior
+
+8. **CRONOGRAMA SUGERIDO**
+   Tabla mensual con actividades priorizadas
+
+9. **ESTIMACIÓN DE RECURSOS**
+   - Recursos humanos necesarios
+   - Recursos tecnológicos
+   - Presupuesto estimado
+   - Capacitaciones requeridas
+
+10. **INDICADORES DE SEGUIMIENTO**
+    - KPIs para medir progreso
+    - Frecuencia de medición
+    - Responsables
+
+11. **CONCLUSIONES Y RECOMENDACIONES**
+    - Síntesis de situación actual
+    - Ruta crítica para cumplimiento
+    - Beneficios esperados de implementar el plan
+
+12. **ANEXOS SUGERIDOS**
+    - Lista de estándares no conformes
+    - Normatividad aplicable
+    - Formatos recomendados
+
+El informe debe ser formal, accionable y listo para presentar a gerencia. Usa formato markdown con títulos, subtítulos, listas y tablas.
+
+**IMPORTANTE - ANÁLISIS PROFUNDO Y ESPECÍFICO:**
+- Para cada acción del plan, proporciona detalles concretos y específicos para la empresa
+- Los análisis de riesgo deben ser cuantitativos cuando sea posible (ej: "potencial de X accidentes/año")
+- Las recomendaciones deben incluir pasos específicos detallados paso a paso, no generalizaciones
+- Considera el contexto específico de la empresa ({company['company_name']}) y su actividad económica
+- Los cronogramas deben ser realistas y considerar recursos limitados de empresas medianas
+- Incluye estimaciones de costos aproximados en COP (pesos colombianos) cuando sea relevante
+- Los KPIs deben ser SMART (específicos, medibles, alcanzables, relevantes, temporales)
+- Proporciona ejemplos concretos y plantillas cuando sea aplicable
+"""
+    
+    return prompt, report_prompt
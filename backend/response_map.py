@@ -0,0 +1,229 @@
+"""
+Respuestas de auditoría indexadas por estándar.
+
+Las auditorías guardaban `responses` como una lista de dicts, de modo que
+cambiar la respuesta de un estándar obligaba a reescribir la lista completa y
+cada lectura la recorría entera. El esquema nuevo guarda un mapa
+`responses.<clave>` por estándar, con lo que un `$set` puede modificar un solo
+estándar de forma atómica. Los ids de estándar llevan puntos ("1.1.1"), que
+MongoDB interpreta como rutas, así que la clave usa guiones bajos ("1_1_1") y
+cada entrada conserva su `standard_id`.
+
+Sincronización por deltas: cada entrada lleva `rev`, la versión del documento
+en la que cambió por última vez, y las respuestas eliminadas quedan en
+`removed_responses` con su `rev`. Con eso `changes_since()` devuelve solo lo
+modificado desde la versión que tiene el cliente, y las escrituras se
+condicionan a la versión esperada (`version_filter()`) para detectar
+conflictos sin comparar documentos completos.
+
+Mientras la migración no termine conviven ambos formatos: los lectores usan
+`responses_list()`, que acepta los dos, y la API sigue devolviendo una lista.
+La migración (`migrate_responses.py`) rellena los documentos antiguos por
+lotes, registrando el avance en la colección `migrations` para poder
+reanudarla.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from standards_catalog import catalog_for_inspection
+
+MIGRATION_ID = "responses_map"
+MIGRATION_BATCH_SIZE = 500
+
+# Stored on inspections for the server only (see offline_batch.py)
+INTERNAL_FIELDS = ("applied_ops",)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def response_key(standard_id: str) -> str:
+    """Map key for a standard id (dots would be read as a field path)"""
+    return standard_id.replace(".", "_")
+
+
+def responses_map(responses: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Index a list of responses by standard (the last entry wins on duplicates)"""
+    return {response_key(r['standard_id']): r for r in responses if r.get('standard_id')}
+
+
+def responses_list(inspection: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Responses of an inspection as a list in catalog order, whichever format is stored"""
+    responses = inspection.get('responses') or []
+    if isinstance(responses, dict):
+        order = catalog_for_inspection(inspection).order
+        return sorted(responses.values(), key=lambda r: order.get(r.get('standard_id'), len(order)))
+    return list(responses)
+
+
+def stored_map(inspection: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Stored responses as a map, whichever format is stored"""
+    responses = inspection.get('responses') or {}
+    return dict(responses) if isinstance(responses, dict) else responses_map(responses)
+
+
+def with_response_list(inspection: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an inspection with `responses` as a list (the API format, without internal bookkeeping)"""
+    return {**{k: v for k, v in inspection.items() if k not in INTERNAL_FIELDS}, "responses": responses_list(inspection)}
+
+
+def _content(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in entry.items() if k != "rev"}
+
+
+def set_responses(update: Dict[str, Any], inspection: Dict[str, Any], responses: List[Dict[str, Any]],
+                  rev: int) -> Dict[str, Any]:
+    """
+    Add to an update document the fields that store `responses` as the new
+    content of the inspection, which will be at version `rev` after the write.
+
+    Entries whose content changed are stamped with `rev`; unchanged ones keep
+    their revision and are not rewritten. Standards no longer answered are
+    removed and recorded in `removed_responses` so delta sync can report
+    them. Documents already in the map format get one path per standard;
+    legacy documents are converted as a whole.
+    """
+    stored = stored_map(inspection)
+    new_map = responses_map(responses)
+    changed = []
+    for key, entry in new_map.items():
+        old = stored.get(key)
+        if old is not None and _content(old) == _content(entry):
+            new_map[key] = old
+        else:
+            new_map[key] = {**_content(entry), "rev": rev}
+            changed.append(key)
+    removed = set(stored) - set(new_map)
+
+    sets = update.setdefault("$set", {})
+    unsets = update.setdefault("$unset", {})
+    if isinstance(inspection.get('responses'), dict):
+        sets.update({f"responses.{key}": new_map[key] for key in changed})
+        unsets.update({f"responses.{key}": "" for key in removed})
+    else:
+        sets["responses"] = new_map
+    sets.update({
+        f"removed_responses.{key}": {"standard_id": stored[key].get('standard_id'), "rev": rev}
+        for key in removed
+    })
+    readded = set(inspection.get('removed_responses') or {}) & set(changed)
+    unsets.update({f"removed_responses.{key}": "" for key in readded})
+    if not unsets:
+        del update["$unset"]
+    return update
+
+
+def changes_since(inspection: Dict[str, Any], since: int) -> Dict[str, Any]:
+    """
+    Delta of an inspection for a client that last saw version `since`: the
+    responses changed after it and the standards removed after it. Clients
+    with no version, or one the server does not know, get everything.
+    """
+    version = inspection.get('version', 0)
+    full = since <= 0 or since > version
+    responses = [r for r in responses_list(inspection) if full or r.get('rev', 0) > since]
+    removed = [] if full else [
+        entry['standard_id'] for entry in (inspection.get('removed_responses') or {}).values()
+        if entry.get('rev', 0) > since
+    ]
+    return {
+        "version": version,
+        "since": since,
+        "full": full,
+        "responses": responses,
+        "removed": removed,
+        "status": inspection.get('status'),
+        "total_score": inspection.get('total_score', 0),
+        "progress": inspection.get('progress', 0),
+    }
+
+
+def version_filter(version: int) -> Dict[str, Any]:
+    """Filter matching a document still at `version` (unversioned documents count as 0)"""
+    return {"version": version} if version else {"version": {"$in": [None, 0]}}
+
+
+# ====================
+# BACKFILL MIGRATION
+# ====================
+
+async def migration_status(db) -> Dict[str, Any]:
+    state = await db.migrations.find_one({"id": MIGRATION_ID}, {"_id": 0}) or {"id": MIGRATION_ID, "status": "pending"}
+    state["remaining"] = await db.inspections.count_documents({"responses": {"$type": "array"}})
+    return state
+
+
+async def _report(db, **fields):
+    await db.migrations.update_one(
+        {"id": MIGRATION_ID},
+        {"$set": {**fields, "updated_at": _now()}},
+        upsert=True,
+    )
+
+
+async def migrate_batch(db, after_id=None, batch_size: int = MIGRATION_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Convert up to `batch_size` legacy inspections with `_id` greater than
+    `after_id`. Each document is rewritten only if its version is unchanged
+    since it was read, so concurrent autosaves are never overwritten; skipped
+    documents stay in the array format and are picked up by the next run.
+    """
+    query: Dict[str, Any] = {"responses": {"$type": "array"}}
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+
+    migrated = skipped = 0
+    last_id = after_id
+    cursor = db.inspections.find(query, {"_id": 1, "responses": 1, "version": 1}).sort("_id", 1).limit(batch_size)
+    async for inspection in cursor:
+        last_id = inspection["_id"]
+        result = await db.inspections.update_one(
+            {"_id": inspection["_id"], "version": inspection.get("version"), "responses": {"$type": "array"}},
+            {"$set": {"responses": responses_map(inspection.get("responses") or [])}},
+        )
+        if result.modified_count:
+            migrated += 1
+        else:
+            skipped += 1
+    return {"migrated": migrated, "skipped": skipped, "last_id": last_id}
+
+
+async def run_migration(db, batch_size: int = MIGRATION_BATCH_SIZE, max_batches: Optional[int] = None,
+                        restart: bool = False) -> Dict[str, Any]:
+    """
+    Backfill the map format in batches, checkpointing the last `_id` after
+    every batch so an interrupted run resumes where it stopped. Returns the
+    final migration state.
+    """
+    state = await db.migrations.find_one({"id": MIGRATION_ID}, {"_id": 0}) or {}
+    after_id = None if restart else state.get("last_id")
+    if restart or not state:
+        await _report(db, status="running", migrated=0, skipped=0, last_id=None, started_at=_now())
+    else:
+        await _report(db, status="running")
+
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        result = await migrate_batch(db, after_id, batch_size)
+        batches += 1
+        if result["last_id"] == after_id:
+            break
+        after_id = result["last_id"]
+        await db.migrations.update_one(
+            {"id": MIGRATION_ID},
+            {"$inc": {"migrated": result["migrated"], "skipped": result["skipped"]},
+             "$set": {"last_id": after_id, "updated_at": _now()}},
+        )
+        logging.info(f"Migración {MIGRATION_ID}: lote {batches} ({result['migrated']} migradas, {result['skipped']} omitidas)")
+
+    remaining = await db.inspections.count_documents({"responses": {"$type": "array"}})
+    if remaining == 0:
+        await _report(db, status="completed", completed_at=_now())
+    elif after_id is not None and not await db.inspections.count_documents({"responses": {"$type": "array"}, "_id": {"$gt": after_id}}):
+        # Reached the end but some documents were skipped: start over on the next run
+        await _report(db, status="partial", last_id=None)
+    else:
+        await _report(db, status="paused")
+    return await migration_status(db)
@@ -0,0 +1,291 @@
+"""
+Subida de evidencias por trozos, reanudable.
+
+El cliente abre una sesión declarando el tamaño del archivo y envía trozos de
+RESUMABLE_CHUNK_BYTES con la cabecera `Upload-Offset`. Cada trozo se lee del
+cuerpo de la petición por bloques (nunca más de un trozo en memoria), con el
+límite de tamaño comprobado mientras llega, y se pasa de inmediato al
+almacenamiento:
+
+- firebase: sesión de subida reanudable de Firebase Storage (protocolo
+  X-Goog-Upload), a la que se reenvía cada trozo.
+- local: archivo `.part` en UPLOADS_DIR, escrito en su posición, de modo que
+  reenviar un trozo es idempotente.
+
+La sesión (`upload_sessions`) guarda el último desplazamiento confirmado. Si la
+conexión se corta, el cliente consulta la sesión y continúa desde ahí; un
+`Upload-Offset` distinto del confirmado se rechaza con 409 y el valor correcto.
+
+Tras el último trozo la sesión pasa a `finishing` mientras la evidencia se
+registra en el almacenamiento (`register`, que puede moverla a su dirección
+por contenido), y solo queda `completed`, con el resultado registrado, si el
+registro tuvo éxito. Si falla, la sesión vuelve a `uploading` con todos los
+bytes confirmados y el cliente reintenta con un PUT vacío en ese
+desplazamiento. Una sesión que quedó en `finishing` por una caída vuelve a
+`uploading` pasados RESUMABLE_FINISH_TIMEOUT_S.
+
+RESUMABLE_CHUNK_BYTES: tamaño de trozo, múltiplo de 256 KB (1 MB)
+RESUMABLE_SESSION_HOURS: validez de una sesión sin terminar (24)
+RESUMABLE_FINISH_TIMEOUT_S: tiempo tras el que un registro interrumpido se puede reintentar (600)
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from urllib.parse import quote
+
+import requests
+
+from direct_upload import UPLOAD_KINDS, UploadRejected, local_path
+from object_storage import file_sha256, get_backend, storage_backend
+
+GOOG_CHUNK_GRANULARITY = 256 * 1024
+RESUMABLE_CHUNK_BYTES = max(GOOG_CHUNK_GRANULARITY,
+                            int(os.getenv("RESUMABLE_CHUNK_BYTES", str(1024 * 1024))) // GOOG_CHUNK_GRANULARITY * GOOG_CHUNK_GRANULARITY)
+RESUMABLE_SESSION_HOURS = int(os.getenv("RESUMABLE_SESSION_HOURS", "24"))
+RESUMABLE_FINISH_TIMEOUT_S = int(os.getenv("RESUMABLE_FINISH_TIMEOUT_S", "600"))
+
+# Registers the assembled object (object_name, url, filename, size, content_type, sha256, md5)
+# and returns what the client gets as the upload result
+Register = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _firebase_upload_url(object_name: str) -> str:
+    return f"https://firebasestorage.googleapis.com/v0/b/{get_backend().bucket}/o?name={quote(object_name, safe='')}"
+
+
+def _firebase_start(object_name: str, size: int, content_type: str) -> str:
+    response = requests.post(_firebase_upload_url(object_name), headers={
+        "X-Goog-Upload-Protocol": "resumable",
+        "X-Goog-Upload-Command": "start",
+        "X-Goog-Upload-Header-Content-Length": str(size),
+        "X-Goog-Upload-Header-Content-Type": content_type,
+        "Content-Type": "application/json",
+    }, json={"name": object_name, "contentType": content_type}, timeout=30)
+    response.raise_for_status()
+    return response.headers["X-Goog-Upload-URL"]
+
+
+def _firebase_send(session_url: str, offset: int, data: bytes, final: bool) -> Optional[Dict[str, Any]]:
+    response = requests.post(session_url, data=data, headers={
+        "X-Goog-Upload-Protocol": "resumable",
+        "X-Goog-Upload-Command": "upload, finalize" if final else "upload",
+        "X-Goog-Upload-Offset": str(offset),
+    }, timeout=120)
+    response.raise_for_status()
+    return response.json() if final else None
+
+
+def _firebase_received(session_url: str) -> int:
+    response = requests.post(session_url, headers={
+        "X-Goog-Upload-Protocol": "resumable",
+        "X-Goog-Upload-Command": "query",
+    }, timeout=30)
+    response.raise_for_status()
+    return int(response.headers.get("X-Goog-Upload-Size-Received", "0"))
+
+
+def _write_at(path, offset: int, data: bytes):
+    with open(path, "r+b" if path.exists() else "wb") as out:
+        out.seek(offset)
+        out.write(data)
+        out.truncate()
+
+
+def session_view(session: Dict[str, Any]) -> Dict[str, Any]:
+    """What the client needs to resume"""
+    return {key: session.get(key) for key in (
+        "id", "status", "filename", "content_type", "size", "offset", "chunk_size", "expires_at", "result"
+    )}
+
+
+async def open_session(db, kind: str, filename: str, content_type: str, size: int, base_url: str,
+                       target: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    spec = UPLOAD_KINDS[kind]
+    if content_type not in spec["content_types"]:
+        raise UploadRejected("Solo se permiten imágenes JPEG, PNG o WEBP")
+    if size <= 0:
+        raise UploadRejected("El archivo está vacío")
+    if size > spec["max_bytes"]:
+        raise UploadRejected(f"La imagen no puede superar {spec['max_bytes'] // (1024 * 1024)}MB", status=413)
+
+    object_name = f"{spec['prefix']}{uuid.uuid4()}.{spec['content_types'][content_type]}"
+    backend = storage_backend()
+    session = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "backend": backend,
+        "object_name": object_name,
+        "url": get_backend().url(object_name, base_url),
+        "filename": filename,
+        "content_type": content_type,
+        "size": size,
+        "offset": 0,
+        "chunk_size": RESUMABLE_CHUNK_BYTES,
+        "status": "uploading",  # uploading, finishing, completed, aborted
+        "target": target,
+        "created_at": _now().isoformat(),
+        "expires_at": (_now() + timedelta(hours=RESUMABLE_SESSION_HOURS)).isoformat(),
+    }
+    if backend != "local":
+        session["storage_session_url"] = await asyncio.to_thread(_firebase_start, object_name, size, content_type)
+    await db.upload_sessions.insert_one(dict(session))
+    return session
+
+
+async def get_session(db, session_id: str) -> Optional[Dict[str, Any]]:
+    """Session with its confirmed offset reconciled with what storage actually holds"""
+    session = await db.upload_sessions.find_one({"id": session_id}, {"_id": 0})
+    if not session or session["status"] != "uploading" or session["backend"] == "local":
+        return session
+    received = await asyncio.to_thread(_firebase_received, session["storage_session_url"])
+    if received != session["offset"]:
+        await db.upload_sessions.update_one({"id": session_id, "status": "uploading"}, {"$set": {"offset": received}})
+        session["offset"] = received
+    return session
+
+
+async def _read_chunk(body: AsyncIterator[bytes], limit: int) -> bytes:
+    """Read the request body, failing as soon as it passes `limit` bytes"""
+    data = bytearray()
+    async for block in body:
+        data += block
+        if len(data) > limit:
+            raise UploadRejected("El trozo supera el tamaño permitido", status=413)
+    return bytes(data)
+
+
+async def append_chunk(db, session: Dict[str, Any], offset: int, body: AsyncIterator[bytes],
+                       register: Register) -> Dict[str, Any]:
+    """
+    Store the chunk at `offset` and advance the confirmed offset. The last
+    chunk (or an empty PUT once every byte is confirmed, to retry a failed
+    registration) registers the file; the session is returned with `result`
+    when that succeeded.
+    """
+    if session["status"] != "uploading":
+        raise UploadRejected("La sesión de subida ya terminó", status=409)
+    if datetime.fromisoformat(session["expires_at"]) < _now():
+        raise UploadRejected("La sesión de subida expiró", status=410)
+    if offset != session["offset"]:
+        raise UploadRejected(f"Desplazamiento esperado: {session['offset']}", status=409)
+
+    remaining = session["size"] - offset
+    if not remaining:
+        await _read_chunk(body, 0)
+        return await _finish(db, session, register)
+
+    data = await _read_chunk(body, min(session["chunk_size"], remaining))
+    final = len(data) == remaining
+    if not data or (not final and len(data) != session["chunk_size"]):
+        raise UploadRejected(f"Cada trozo debe tener {session['chunk_size']} bytes salvo el último")
+
+    if session["backend"] == "local":
+        partial = local_path(session["object_name"] + ".part")
+        partial.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(_write_at, partial, offset, data)
+    else:
+        await asyncio.to_thread(_firebase_send, session["storage_session_url"], offset, data, final)
+
+    new_offset = offset + len(data)
+    updated = await db.upload_sessions.find_one_and_update(
+        {"id": session["id"], "offset": offset, "status": "uploading"},
+        {"$set": {"offset": new_offset, "updated_at": _now().isoformat()}},
+        projection={"_id": 0}, return_document=True
+    )
+    if not updated:
+        raise UploadRejected("Otro envío avanzó la sesión; consulte el desplazamiento", status=409)
+    if final:
+        return await _finish(db, updated, register)
+    return updated
+
+
+def _assemble_local(object_name: str, content_type: str) -> str:
+    """Move the finished `.part` file into place (already done on a retry) and hash it"""
+    partial = local_path(object_name + ".part")
+    path = local_path(object_name)
+    if partial.exists():
+        partial.replace(path)
+    path.with_suffix(path.suffix + ".type").write_text(content_type)
+    return file_sha256(path)
+
+
+async def _finish(db, session: Dict[str, Any], register: Register) -> Dict[str, Any]:
+    """Register the complete file; only a successful registration completes the session"""
+    claimed = await db.upload_sessions.find_one_and_update(
+        {"id": session["id"], "status": "uploading", "offset": session["size"]},
+        {"$set": {"status": "finishing", "updated_at": _now().isoformat()}},
+        projection={"_id": 0}, return_document=True
+    )
+    if not claimed:
+        raise UploadRejected("La subida ya se está registrando", status=409)
+
+    object_name = session["object_name"]
+    try:
+        if session["backend"] == "local":
+            sha256 = await asyncio.to_thread(_assemble_local, object_name, session["content_type"])
+        else:
+            sha256 = None
+        result = await register({
+            "object_name": object_name,
+            "url": session["url"],
+            "filename": session["filename"],
+            "size": session["size"],
+            "content_type": session["content_type"],
+            "sha256": sha256,
+            "md5": None,
+        })
+    except BaseException:
+        # Every byte stays confirmed: an empty PUT at the final offset retries
+        await db.upload_sessions.update_one(
+            {"id": session["id"], "status": "finishing"},
+            {"$set": {"status": "uploading", "updated_at": _now().isoformat()}}
+        )
+        raise
+
+    completed = await db.upload_sessions.find_one_and_update(
+        {"id": session["id"], "status": "finishing"},
+        {"$set": {"status": "completed", "result": result, "completed_at": _now().isoformat()},
+         "$unset": {"storage_session_url": ""}},
+        projection={"_id": 0}, return_document=True
+    )
+    return completed or {**claimed, "status": "completed", "result": result}
+
+
+async def abort_session(db, session: Dict[str, Any]):
+    if session["status"] != "uploading":
+        return
+    await db.upload_sessions.update_one({"id": session["id"]}, {"$set": {"status": "aborted"}})
+    if session["backend"] == "local":
+        local_path(session["object_name"] + ".part").unlink(missing_ok=True)
+    else:
+        try:
+            await asyncio.to_thread(requests.post, session["storage_session_url"], headers={
+                "X-Goog-Upload-Protocol": "resumable", "X-Goog-Upload-Command": "cancel"}, timeout=30)
+        except Exception as e:
+            logging.warning(f"No se pudo cancelar la subida {session['id']} en el almacenamiento: {e}")
+
+
+async def expire_sessions(db) -> int:
+    """
+    Abort unfinished sessions past their validity (their partial data is
+    dropped) and reopen registrations interrupted by a crash for retrying
+    """
+    await db.upload_sessions.update_many(
+        {"status": "finishing",
+         "updated_at": {"$lt": (_now() - timedelta(seconds=RESUMABLE_FINISH_TIMEOUT_S)).isoformat()}},
+        {"$set": {"status": "uploading"}}
+    )
+    expired = 0
+    async for session in db.upload_sessions.find(
+        {"status": "uploading", "expires_at": {"$lt": _now().isoformat()}}, {"_id": 0}
+    ):
+        await abort_session(db, session)
+        expired += 1
+    return expired
@@ -0,0 +1,67 @@
+"""
+Calificación de auditorías según los pesos del catálogo de estándares con el
+que se crearon (ver standards_catalog.py).
+"""
+from typing import Any, Dict, List, Tuple
+
+from standards_catalog import Catalog
+
+
+def response_score(standard: Dict[str, Any], response: str) -> float:
+    """Score of a single answer while the audit is in progress"""
+    if response == "cumple":
+        return standard['weight']
+    if response == "no_aplica":
+        return standard['weight']  # No aplica cuenta como cumple
+    return 0  # no_cumple
+
+
+def score_responses(responses: List[Dict[str, Any]], catalog: Catalog) -> Tuple[List[Dict[str, Any]], float, float, int]:
+    """
+    Score the answered standards of an audit against its catalog (answers to
+    standards outside the catalog are dropped).
+
+    Returns the normalized responses with their score, the total percentage,
+    the progress percentage and the number of answered standards.
+    """
+    total_score = 0.0
+    answered_count = 0
+    responses_with_score = []
+
+    for response in responses:
+        standard = catalog.by_id.get(response.get('standard_id'))
+        if standard and response.get('response'):
+            answered_count += 1
+            score = response_score(standard, response['response'])
+            total_score += score
+            responses_with_score.append({
+                "standard_id": response['standard_id'],
+                "response": response['response'],
+                "observations": response.get('observations', ''),
+                "ai_recommendation": response.get('ai_recommendation', ''),
+                "evidence_images": response.get('evidence_images', []),
+                "score": score
+            })
+
+    percentage = (total_score / catalog.total_weight) * 100 if catalog.total_weight > 0 else 0
+    progress = (answered_count / len(catalog)) * 100 if len(catalog) else 0
+    return responses_with_score, percentage, progress, answered_count
+
+
+def phase_percentages(responses: List[Dict[str, Any]], catalog: Catalog) -> Dict[str, float]:
+    """Percentage obtained per PHVA phase (I. PLANEAR, II. HACER, ...)"""
+    phase_stats = {}
+    for resp in responses:
+        standard = catalog.by_id.get(resp['standard_id'])
+        if standard:
+            phase = standard['category'].split(' - ')[0]
+            if phase not in phase_stats:
+                phase_stats[phase] = {'total': 0, 'obtained': 0, 'count': 0}
+            phase_stats[phase]['total'] += standard['weight']
+            phase_stats[phase]['obtained'] += resp['score']
+            phase_stats[phase]['count'] += 1
+
+    return {
+        phase: (stats['obtained'] / stats['total'] * 100) if stats['total'] > 0 else 0
+        for phase, stats in phase_stats.items()
+    }
@@ -1,38 +1,77 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Request, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import hashlib
 import logging
 from pathlib import Path
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
-from emergentintegrations.llm.chat import LlmChat, UserMessage, ImageContent
+from llm_provider import get_llm_provider
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, StreamingResponse
 import io
 import shutil
 import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+import time
+from metrics import (
+    MongoCommandMetrics, EMAIL_SENDS, PDF_RENDER_DURATION, PDF_SIZE,
+    observed_llm_call, observe_storage_upload, http_metrics_middleware, metrics_response
+)
+from tracing import MongoCommandTracer, span, tracing_middleware
+from database import CAUSAL_TOKEN_HEADER, MongoConnection
+from pymongo.errors import DuplicateKeyError
+from object_storage import ObjectStore
+from upload_serving import router as upload_router
+from direct_upload import UPLOAD_KINDS, UPLOAD_TOKEN_HEADER, DirectUploads, UploadRejected, storage_backend, write_emulated_object
+from resumable_upload import (
+    RESUMABLE_CHUNK_BYTES, abort_session as abort_upload_session, append_chunk as append_upload_chunk,
+    expire_sessions as expire_upload_sessions, get_session as get_upload_session, open_session as open_upload_session,
+    session_view,
+)
+from cache import get_cache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection (the client itself is created in the app lifespan)
+mongo = MongoConnection(
+    os.environ['MONGO_URL'],
+    os.environ['DB_NAME'],
+    event_listeners=[MongoCommandMetrics(), MongoCommandTracer()],
+    token_secret=os.environ["JWT_SECRET"]
+)
+db = mongo.db
+# Streaming exports read from secondaries when MONGO_SECONDARY_READS is enabled
+db_secondary = mongo.secondary_db
+
+# Read-only routes that tolerate replication lag (causally consistent with X-Causal-Token)
+SECONDARY_READS = [Depends(mongo.prefer_secondary)]
+
+# Caches shared by all workers when CACHE_BACKEND=redis (see cache.py)
+cache = get_cache()
+principal_cache = cache.namespace("principal", ttl=60)
+company_cache = cache.namespace("companies", ttl=300)
+normative_context_cache = cache.namespace("normative_context", ttl=3600)
+recommendation_cache = cache.namespace("recommendations", ttl=24 * 3600)
+
+async def get_company_cached(company_id: str) -> Optional[dict]:
+    return await company_cache.get_or_set(
+        company_id, lambda: db.companies.find_one({"id": company_id}, {"_id": 0})
+    )
 
 # JWT Configuration
 JWT_SECRET = os.environ["JWT_SECRET"]  # Required - no default for security
@@ -41,8 +80,32 @@ JWT_EXPIRATION_HOURS = 24
 
 # Security
 security = HTTPBearer()
-
-app = FastAPI()
+optional_security = HTTPBearer(auto_error=False)
+
+# Short-lived grants for browser uploads straight to storage (see direct_upload.py)
+direct_uploads = DirectUploads(JWT_SECRET, JWT_ALGORITHM)
+
+# Content-addressed, reference-counted storage for logos and evidence (see object_storage.py)
+object_store = ObjectStore(db)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await mongo.start()
+    await cache.start()
+    await create_superadmin()
+    await resume_interrupted_purges()
+    await expire_upload_sessions(db)
+    norma_migration = asyncio.create_task(migrate_inline_contents(db))
+    storage_sweep = asyncio.create_task(object_store.run_sweeper())
+    await resume_ingestions(db, on_complete=normative_context_cache.clear)
+    yield
+    norma_migration.cancel()
+    storage_sweep.cancel()
+    await cache.close()
+    mongo.close()
+    shutdown_pdf_pool()
+
+app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 
 # ====================
@@ -111,6 +174,7 @@ class Company(BaseModel):
     numero_trabajadores: Optional[int] = None
     numero_sedes: Optional[int] = 1
     sedes_adicionales: Optional[List[Dict[str, Any]]] = []
+    catalogo_estandares: Optional[str] = None  # Catálogo fijo (p. ej. "iso45001"); si no, según tamaño y riesgo
 
 class StandardResponse(BaseModel):
     standard_id: str
@@ -128,10 +192,12 @@ class Inspection(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     company_id: str
     user_id: str
-    responses: List[Dict[str, Any]]
+    responses: Dict[str, Dict[str, Any]]  # keyed by response_map.response_key(standard_id)
     total_score: float
     status: str = "en_desarrollo"  # en_desarrollo, cerrada
     config_id: Optional[str] = None  # ID de la configuración de auditoría
+    catalog_id: Optional[str] = None  # Catálogo de estándares y versión con que se califica
+    catalog_version: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     closed_at: Optional[str] = None
 
@@ -168,7 +234,8 @@ class NormaGeneral(BaseModel):
     nombre: str  # Ej: "Resolución 0312 de 2019"
     categoria: str  # SST, Laboral, Calidad, Medio Ambiente, etc.
     descripcion: str  # Descripción breve
-    contenido: str  # Texto completo/resumen de la norma (soporta gran cantidad de texto)
+    contenido_chars: int = 0  # El texto completo está en norma_content (colección normas_contenido)
+    ingestion_status: Optional[str] = None  # procesando, completado, error (solo normas cargadas desde archivo)
     vigente: bool = True
     fecha_expedicion: Optional[str] = None
     entidad_emisora: Optional[str] = None  # Ej: "Ministerio del Trabajo"
@@ -183,7 +250,8 @@ class NormaEspecifica(BaseModel):
     nombre: str  # Ej: "Reglamento Interno de Trabajo"
     tipo: str  # politica, reglamento, manual, instructivo, procedimiento
     descripcion: str
-    contenido: str  # Texto completo
+    contenido_chars: int = 0  # El texto completo está en norma_content (colección normas_contenido)
+    ingestion_status: Optional[str] = None  # procesando, completado, error (solo normas cargadas desde archivo)
     vigente: bool = True
     version: Optional[str] = "1.0"
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -272,7 +340,33 @@ class AIImageAnalysisRequest(BaseModel):
 # STANDARDS DATA
 # ====================
 
-from standards_data import STANDARDS
+from standards_catalog import CATALOGS, UnknownCatalog, catalog_for_inspection
+from scoring import score_responses
+from response_map import (
+    changes_since, response_key, responses_list, responses_map, set_responses, stored_map, version_filter,
+    with_response_list,
+)
+from norma_content import METADATA_PROJECTION, NORMA_STAMP_FIELD, load_content, load_contents, migrate_inline_contents, store_content
+from document_ingestion import (
+    NORMA_UPLOAD_MAX_BYTES, UploadTooLarge, create_ingestion_job, detect_format, resume_ingestions, save_upload,
+    start_ingestion,
+)
+from offline_batch import (
+    BATCH_LLM_CONCURRENCY, BATCH_MAX_OPERATIONS, OPERATION_TYPES, apply_batch, outcome as batch_outcome, replayed_outcomes,
+)
+from prompts import build_analysis_prompts
+from http_cache import PrecomputedJSON, STAMP_PROJECTION, SelectiveGZipMiddleware, initial_stamp, versioned_update, conditional_json
+from cascade_purge import create_purge_job, dropped_evidence_urls, evidence_urls, release_urls, resume_purge_jobs, run_purge_job
+from pdf_export import (
+    PDF_EXPORT_MAX_REPORTS, attachment_header, iter_spooled, render_report_spooled, shutdown_pdf_pool, stream_reports_zip
+)
+from tabular_export import EXPORT_FORMATS, iter_response_rows
+
+# Los catálogos son inmutables: cada versión se serializa y comprime una sola vez al arrancar
+STANDARDS_PAYLOADS = {catalog.key: PrecomputedJSON(catalog.as_list()) for catalog in CATALOGS}
+CATALOGS_PAYLOAD = PrecomputedJSON([
+    {**catalog.summary(), "versions": CATALOGS.versions(catalog.id)} for catalog in CATALOGS.latest()
+])
 
 # ====================
 # UTILITY FUNCTIONS
@@ -306,11 +400,18 @@ def verify_jwt_token(token: str) -> Dict[str, Any]:
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     payload = verify_jwt_token(token)
-    user = await db.users.find_one({"id": payload["user_id"]}, {"_id": 0})
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
+    user = await principal_cache.get(payload["user_id"])
+    if user is None:
+        user = await db.users.find_one({"id": payload["user_id"]}, {"_id": 0, "password": 0})
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
+        await principal_cache.set(payload["user_id"], user)
     return user
 
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Current user when a token is sent (registration uploads happen before login)"""
+    return await get_current_user(credentials) if credentials else None
+
 async def send_email(to_email: str, subject: str, body: str):
     """Send real email via Gmail SMTP"""
     try:
@@ -324,6 +425,7 @@ async def send_email(to_email: str, subject: str, body: str):
         
         if not smtp_password or not smtp_email:
             logging.error("SMTP_PASSWORD or SMTP_EMAIL not configured")
+            EMAIL_SENDS.labels("not_configured").inc()
             return
         
         # Create message
@@ -336,19 +438,22 @@ async def send_email(to_email: str, subject: str, body: str):
         message.attach(MIMEText(body, "plain"))
         
         # Send email using the main account for authentication
-        await aiosmtplib.send(
-            message,
-            hostname=smtp_server,
-            port=smtp_port,
-            start_tls=True,
-            username=smtp_email,  # Autenticación con cuenta principal
-            password=smtp_password,
-        )
+        with span("email.send", smtp_server=smtp_server):
+            await aiosmtplib.send(
+                message,
+                hostname=smtp_server,
+                port=smtp_port,
+                start_tls=True,
+                username=smtp_email,  # Autenticación con cuenta principal
+                password=smtp_password,
+            )
         
         logging.info(f"Email sent successfully to {to_email} from {smtp_from_email}")
+        EMAIL_SENDS.labels("sent").inc()
         
     except Exception as e:
         logging.error(f"Error sending email to {to_email}: {str(e)}")
+        EMAIL_SENDS.labels("failed").inc()
         # Log error but don't raise exception to avoid breaking the flow
 
 # ====================
@@ -356,8 +461,8 @@ async def send_email(to_email: str, subject: str, body: str):
 # ====================
 
 @api_router.post("/upload-logo")
-async def upload_logo(file: UploadFile = File(...)):
-    """Upload company logo to Firebase Storage"""
+async def upload_logo(request: Request, file: UploadFile = File(...)):
+    """Upload company logo to storage (identical logos are stored once)"""
     try:
         # Validate file type
         allowed_types = ["image/jpeg", "image/png", "image/jpg", "image/webp"]
@@ -367,20 +472,198 @@ async def upload_logo(file: UploadFile = File(...)):
         # Read file content
         file_content = await file.read()
         
-        # Upload to Firebase Storage
-        from firebase_storage import upload_file_to_firebase
-        logo_url = upload_file_to_firebase(
-            file_content=file_content,
-            filename=file.filename,
-            content_type=file.content_type
-        )
-        
-        return {"logo_url": logo_url}
+        with observe_storage_upload("logo", len(file_content)):
+            stored = await object_store.put_bytes(file_content, file.content_type)
+        url = object_store.url(stored["key"], public_base_url(request))
+        return await record_upload("logo", stored, url, file.filename, {"user_id": None, "company_id": None})
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error uploading logo to Firebase: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error al subir imagen: {str(e)}")
 
+class DirectUploadRequest(BaseModel):
+    kind: str  # logo, evidence
+    filename: str
+    content_type: str
+    size: int
+    company_id: Optional[str] = None  # logo of an existing company
+    inspection_id: Optional[str] = None  # evidence: audit and standard it belongs to
+    standard_id: Optional[str] = None
+
+class CompleteUploadRequest(BaseModel):
+    token: str
+    sha256: Optional[str] = None  # computed by the browser; verified when the backend can read the object
+
+def upload_error(e: UploadRejected) -> HTTPException:
+    return HTTPException(status_code=e.status, detail=str(e))
+
+def public_base_url(request: Request) -> str:
+    return os.getenv("PUBLIC_BACKEND_URL") or str(request.base_url).rstrip("/")
+
+async def record_upload(kind: str, stored: Dict[str, Any], url: str, filename: str,
+                        target: Dict[str, Optional[str]], md5: Optional[str] = None) -> Dict[str, Any]:
+    """Record who uploaded a stored object (one reference of it) and attach a logo to its company"""
+    await db.stored_objects.insert_one({
+        "id": str(uuid.uuid4()),
+        "key": stored["key"],
+        "url": url,
+        "kind": kind,
+        "filename": filename,
+        "backend": storage_backend(),
+        "size": stored["size"],
+        "content_type": stored["content_type"],
+        "sha256": stored["sha256"],
+        "md5": md5,
+        "deduplicated": stored["deduplicated"],
+        **target,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+    result = {"url": url, "filename": filename, "size": stored["size"],
+              "content_type": stored["content_type"], "sha256": stored["sha256"]}
+    if kind == "logo":
+        result["logo_url"] = url
+        if target.get("company_id"):
+            await set_company_logo(target["company_id"], url)
+    elif target.get("inspection_id") and target.get("standard_id"):
+        result["version"] = await attach_evidence(target["inspection_id"], target["standard_id"], url, filename)
+    return result
+
+async def attach_evidence(inspection_id: str, standard_id: str, url: str, filename: str) -> Optional[int]:
+    """
+    Add an uploaded image to the evidence of its response, which then holds the
+    upload's storage reference. Returns the new inspection version, or None if
+    the audit is gone, closed or does not have that standard.
+    """
+    for _ in range(SAVE_CONFLICT_RETRIES):
+        inspection = await db.inspections.find_one({"id": inspection_id}, {"_id": 0})
+        if not inspection or inspection.get('status') == 'cerrada':
+            return None
+        if standard_id not in catalog_for_inspection(inspection).by_id:
+            return None
+        merged = stored_map(inspection)
+        key = response_key(standard_id)
+        entry = dict(merged.get(key) or {"standard_id": standard_id})
+        entry['evidence_images'] = [*(entry.get('evidence_images') or []), {"url": url, "filename": filename}]
+        merged[key] = entry
+
+        version = inspection.get('version', 0)
+        update = set_responses(versioned_update({}), inspection, list(merged.values()), rev=version + 1)
+        result = await db.inspections.update_one({"id": inspection_id, **version_filter(version)}, update)
+        if result.matched_count:
+            return version + 1
+    logging.warning(f"No se pudo adjuntar la evidencia {url} a la auditoría {inspection_id}: modificada en otra sesión")
+    return None
+
+async def register_stored_object(kind: str, object_name: str, url: str, filename: str,
+                                 info: Dict[str, Any], target: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """Take over an object written straight to storage (moved to its content address when it could be verified)"""
+    verified = storage_backend() == "local" and bool(info.get("sha256"))
+    stored = await object_store.adopt(object_name, info["size"], info["content_type"], info.get("sha256"), verified)
+    if stored["key"] != object_name and url.endswith(object_name):
+        url = url[:-len(object_name)] + stored["key"]
+    return await record_upload(kind, stored, url, filename, target, md5=info.get("md5"))
+
+async def set_company_logo(company_id: str, logo_url: Optional[str]):
+    """Point the company at a new logo and release the reference held by the previous one"""
+    company = await db.companies.find_one_and_update(
+        {"id": company_id}, versioned_update({"logo_url": logo_url}), projection={"_id": 0, "logo_url": 1}
+    )
+    await company_cache.invalidate(company_id)
+    if company and company.get('logo_url') and company['logo_url'] != logo_url:
+        await object_store.release_url(company['logo_url'])
+
+@api_router.post("/uploads/sign")
+async def sign_upload(request: DirectUploadRequest, http_request: Request, current_user: Optional[dict] = Depends(get_optional_user)):
+    """
+    Short-lived grant to upload a logo or evidence image straight to storage.
+    The browser sends the file to the returned URL and then calls /uploads/complete.
+    """
+    if request.kind == "evidence":
+        if not current_user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autenticado")
+        if not request.inspection_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Falta la auditoría de la evidencia")
+        await get_editable_auditoria(request.inspection_id, current_user)
+    elif request.kind == "logo":
+        if request.company_id:
+            company = await get_company_cached(request.company_id)
+            if not company:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Empresa no encontrada")
+            if not current_user or (current_user['role'] == 'client' and company['user_id'] != current_user['id']):
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
+    else:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tipo de archivo no válido")
+
+    target = {
+        "user_id": current_user['id'] if current_user else None,
+        "company_id": request.company_id,
+        "inspection_id": request.inspection_id,
+        "standard_id": request.standard_id,
+    }
+    base_url = public_base_url(http_request)
+    try:
+        return await direct_uploads.issue(request.kind, request.filename, request.content_type, request.size, base_url, target)
+    except UploadRejected as e:
+        raise upload_error(e)
+
+@api_router.post("/uploads/complete")
+async def complete_upload(request: CompleteUploadRequest, current_user: Optional[dict] = Depends(get_optional_user)):
+    """
+    Register an object uploaded with a grant from /uploads/sign (size, hash,
+    content type) on its company or response: a logo becomes the company's,
+    evidence is added to the response of the granted standard (the result
+    carries the new audit `version`). Grants issued to a session
+    can only be completed by that user. Completing the same grant again
+    returns the first result instead of taking another storage reference.
+    """
+    try:
+        claims = direct_uploads.verify(request.token)
+    except UploadRejected as e:
+        raise upload_error(e)
+    owner = claims["target"].get("user_id")
+    if owner and (not current_user or current_user['id'] != owner):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="El permiso de subida pertenece a otra sesión")
+
+    # One completion per grant: the object name is unique per grant and serves as the key
+    try:
+        await db.upload_completions.insert_one({"_id": claims["object"], "status": "running",
+                                                "created_at": datetime.now(timezone.utc).isoformat()})
+    except DuplicateKeyError:
+        previous = await db.upload_completions.find_one({"_id": claims["object"]})
+        if previous and previous.get("result"):
+            return previous["result"]
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La subida ya se está registrando")
+
+    try:
+        info = await direct_uploads.inspect(claims, request.sha256)
+        result = await register_stored_object(claims["kind"], claims["object"], claims["url"], claims["filename"], info, claims["target"])
+    except BaseException as e:
+        # Not registered: let the client try again with the same grant
+        await db.upload_completions.delete_one({"_id": claims["object"], "status": "running"})
+        if isinstance(e, UploadRejected):
+            raise upload_error(e)
+        raise
+    await db.upload_completions.update_one({"_id": claims["object"]}, {"$set": {"status": "completed", "result": result}})
+    return result
+
+@api_router.put("/storage-emulator/{object_name:path}")
+async def storage_emulator_put(object_name: str, request: Request):
+    """Local stand-in for the bucket (STORAGE_BACKEND=local): receives the body of a granted upload"""
+    if storage_backend() != "local":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No disponible")
+    try:
+        claims = direct_uploads.verify(request.headers.get(UPLOAD_TOKEN_HEADER, ""))
+        if claims["object"] != object_name:
+            raise UploadRejected("El permiso no corresponde a este objeto", status=403)
+        with observe_storage_upload(claims["kind"], int(request.headers.get("content-length") or 0)):
+            size = await write_emulated_object(claims, request.headers.get("content-type"), request.stream())
+    except UploadRejected as e:
+        raise upload_error(e)
+    return {"object_name": object_name, "size": size}
+
 # ====================
 # AUTH ENDPOINTS
 # ====================
@@ -430,6 +713,7 @@ async def register(user_data: UserCreate):
     
     company_doc = company.model_dump()
     company_doc['created_at'] = company_doc['created_at'].isoformat()
+    company_doc.update(initial_stamp())
     
     await db.users.insert_one(user_doc)
     await db.companies.insert_one(company_doc)
@@ -618,7 +902,7 @@ async def change_password(request: ChangePassword, current_user: dict = Depends(
 # ADMIN ENDPOINTS
 # ====================
 
-@api_router.get("/admin/pending-companies")
+@api_router.get("/admin/pending-companies", dependencies=SECONDARY_READS)
 async def get_pending_companies(current_user: dict = Depends(get_current_user)):
     if current_user['role'] != 'superadmin':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
@@ -637,7 +921,7 @@ async def get_pending_companies(current_user: dict = Depends(get_current_user)):
     
     return result
 
-@api_router.get("/admin/companies")
+@api_router.get("/admin/companies", dependencies=SECONDARY_READS)
 async def get_all_companies(current_user: dict = Depends(get_current_user)):
     if current_user['role'] != 'superadmin':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
@@ -665,8 +949,10 @@ async def activate_company(company_id: str, current_user: dict = Depends(get_cur
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Empresa no encontrada")
     
     # Activate company and user
-    await db.companies.update_one({"id": company_id}, {"$set": {"is_active": True}})
+    await db.companies.update_one({"id": company_id}, versioned_update({"is_active": True}))
     await db.users.update_one({"id": company['user_id']}, {"$set": {"is_active": True}})
+    await company_cache.invalidate(company_id)
+    await principal_cache.invalidate(company['user_id'])
     
     # Get user email
     user = await db.users.find_one({"id": company['user_id']}, {"_id": 0})
@@ -688,8 +974,10 @@ async def deactivate_company(company_id: str, current_user: dict = Depends(get_c
     if not company:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Empresa no encontrada")
     
-    await db.companies.update_one({"id": company_id}, {"$set": {"is_active": False}})
+    await db.companies.update_one({"id": company_id}, versioned_update({"is_active": False}))
     await db.users.update_one({"id": company['user_id']}, {"$set": {"is_active": False}})
+    await company_cache.invalidate(company_id)
+    await principal_cache.invalidate(company['user_id'])
     
     return {"message": "Empresa desactivada"}
 
@@ -697,15 +985,15 @@ async def deactivate_company(company_id: str, current_user: dict = Depends(get_c
 # COMPANY ENDPOINTS
 # ====================
 
-@api_router.get("/my-companies")
-async def get_my_companies(current_user: dict = Depends(get_current_user)):
+@api_router.get("/my-companies", dependencies=SECONDARY_READS)
+async def get_my_companies(request: Request, current_user: dict = Depends(get_current_user)):
     """Get companies for the current user"""
     companies = await db.companies.find({"user_id": current_user['id']}, {"_id": 0}).to_list(1000)
-    return companies
+    return conditional_json(request, companies, *companies, listing=True)
 
 @api_router.delete("/admin/delete-company/{company_id}")
-async def delete_company(company_id: str, current_user: dict = Depends(get_current_user)):
-    """Delete an inactive company and its associated user"""
+async def delete_company(company_id: str, background_tasks: BackgroundTasks, current_user: dict = Depends(get_current_user)):
+    """Delete an inactive company and its associated user; dependent data is purged in the background"""
     if current_user['role'] != 'superadmin':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
     
@@ -718,16 +1006,38 @@ async def delete_company(company_id: str, current_user: dict = Depends(get_curre
     if company.get('is_active', False):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Solo se pueden eliminar empresas inactivas")
     
-    # Delete company's inspections first
-    await db.inspections.delete_many({"company_id": company_id})
+    # The job keeps everything needed to finish the purge once the company is gone
+    job_id = await create_purge_job(
+        db,
+        kind="company",
+        target_id=company_id,
+        company_id=company_id,
+        user_id=company['user_id'],
+        storage_urls=[company['logo_url']] if company.get('logo_url') else []
+    )
     
-    # Delete company
+    # Delete company and associated user now so they disappear from listings
     await db.companies.delete_one({"id": company_id})
-    
-    # Delete associated user
     await db.users.delete_one({"id": company['user_id']})
+    await company_cache.invalidate(company_id)
+    await principal_cache.invalidate(company['user_id'])
+    
+    # Inspections, analyses, configurations, internal norms and files are purged in the background
+    background_tasks.add_task(run_purge_job, db, job_id)
+    
+    return {"message": "Empresa eliminada exitosamente", "purge_job_id": job_id}
+
+@api_router.get("/admin/purge-jobs/{job_id}")
+async def get_purge_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Consultar el avance de un borrado en cascada"""
+    job = await db.purge_jobs.find_one({"id": job_id}, {"_id": 0, "storage_urls": 0, "storage_refs": 0, "released": 0, "inspection_ids": 0})
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tarea no encontrada")
     
-    return {"message": "Empresa eliminada exitosamente"}
+    if current_user['role'] != 'superadmin' and job.get('user_id') != current_user['id']:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
+    
+    return job
 
 @api_router.put("/company/{company_id}")
 async def update_company(company_id: str, company_data: dict, current_user: dict = Depends(get_current_user)):
@@ -745,9 +1055,17 @@ async def update_company(company_id: str, company_data: dict, current_user: dict
     company_data.pop('id', None)
     company_data.pop('user_id', None)
     company_data.pop('created_at', None)
+    company_data.pop('version', None)
+    company_data.pop('updated_at', None)
+    new_logo = company_data.pop('logo_url', company.get('logo_url'))
+    if company_data.get('catalogo_estandares'):
+        get_catalog_or_404(company_data['catalogo_estandares'])
     
     # Update company
-    await db.companies.update_one({"id": company_id}, {"$set": company_data})
+    await db.companies.update_one({"id": company_id}, versioned_update(company_data))
+    await company_cache.invalidate(company_id)
+    if new_logo != company.get('logo_url'):
+        await set_company_logo(company_id, new_logo)
     
     return {"message": "Empresa actualizada exitosamente"}
 
@@ -755,28 +1073,70 @@ async def update_company(company_id: str, company_data: dict, current_user: dict
 # STANDARDS ENDPOINTS
 # ====================
 
+def get_catalog_or_404(catalog_id: str, version: Optional[str] = None):
+    try:
+        return CATALOGS.get(catalog_id, version)
+    except UnknownCatalog:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Catálogo de estándares no encontrado")
+
+def company_catalog(company: Dict[str, Any], catalog_id: Optional[str] = None):
+    """Catalog a new inspection of the company is scored against"""
+    try:
+        return CATALOGS.for_company(company, catalog_id)
+    except UnknownCatalog:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Catálogo de estándares no encontrado")
+
 @api_router.get("/standards")
-async def get_standards(current_user: dict = Depends(get_current_user)):
-    return STANDARDS
+async def get_standards(request: Request, catalog: Optional[str] = None, version: Optional[str] = None,
+                        company_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """
+    Estándares de un catálogo: el indicado (`catalog` y `version`, como los
+    guarda cada auditoría), el que aplica a `company_id`, o el catálogo por defecto
+    """
+    if catalog:
+        selected = get_catalog_or_404(catalog, version)
+    elif company_id:
+        company = await get_company_cached(company_id)
+        if not company:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Empresa no encontrada")
+        if current_user['role'] == 'client' and company['user_id'] != current_user['id']:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
+        selected = company_catalog(company)
+    else:
+        selected = CATALOGS.default
+    return STANDARDS_PAYLOADS[selected.key].response(request)
+
+@api_router.get("/catalogs")
+async def get_catalogs(request: Request, current_user: dict = Depends(get_current_user)):
+    """Catálogos de estándares disponibles (versión vigente de cada uno)"""
+    return CATALOGS_PAYLOAD.response(request)
 
 # ====================
 # REPOSITORIO NORMATIVO - NORMAS GENERALES (Solo Superadmin)
 # ====================
 
-@api_router.get("/normas-generales")
+@api_router.get("/normas-generales", dependencies=SECONDARY_READS)
 async def get_normas_generales(current_user: dict = Depends(get_current_user)):
     """Obtener todas las normas generales"""
-    normas = await db.normas_generales.find({"vigente": True}, {"_id": 0}).to_list(1000)
+    normas = await db.normas_generales.find({"vigente": True}, METADATA_PROJECTION).to_list(1000)
     return normas
 
-@api_router.get("/normas-generales/all")
+@api_router.get("/normas-generales/all", dependencies=SECONDARY_READS)
 async def get_all_normas_generales(current_user: dict = Depends(get_current_user)):
     """Obtener todas las normas generales (incluyendo no vigentes) - Solo Superadmin"""
     if current_user['role'] != 'superadmin':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
-    normas = await db.normas_generales.find({}, {"_id": 0}).to_list(1000)
+    normas = await db.normas_generales.find({}, METADATA_PROJECTION).to_list(1000)
     return normas
 
+@api_router.get("/normas-generales/{norma_id}/contenido", dependencies=SECONDARY_READS)
+async def get_norma_general_contenido(norma_id: str, current_user: dict = Depends(get_current_user)):
+    """Texto completo de una norma general"""
+    contenido = await load_content(db, "general", norma_id)
+    if contenido is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Norma no encontrada")
+    return {"id": norma_id, "contenido": contenido}
+
 @api_router.post("/normas-generales")
 async def create_norma_general(request: CreateNormaGeneralRequest, current_user: dict = Depends(get_current_user)):
     """Crear una nueva norma general - Solo Superadmin"""
@@ -787,12 +1147,14 @@ async def create_norma_general(request: CreateNormaGeneralRequest, current_user:
         nombre=request.nombre,
         categoria=request.categoria,
         descripcion=request.descripcion,
-        contenido=request.contenido,
         fecha_expedicion=request.fecha_expedicion,
         entidad_emisora=request.entidad_emisora
     )
     
-    await db.normas_generales.insert_one(norma.model_dump())
+    # Body first, so a listed norm always has its content
+    summary = await store_content(db, "general", norma.id, request.contenido)
+    await db.normas_generales.insert_one({**norma.model_dump(), **summary, **initial_stamp(NORMA_STAMP_FIELD)})
+    await normative_context_cache.clear()
     return {"message": "Norma general creada exitosamente", "id": norma.id}
 
 @api_router.put("/normas-generales/{norma_id}")
@@ -801,7 +1163,7 @@ async def update_norma_general(norma_id: str, request: CreateNormaGeneralRequest
     if current_user['role'] != 'superadmin':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo el superadministrador puede actualizar normas generales")
     
-    norma = await db.normas_generales.find_one({"id": norma_id}, {"_id": 0})
+    norma = await db.normas_generales.find_one({"id": norma_id}, METADATA_PROJECTION)
     if not norma:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Norma no encontrada")
     
@@ -809,13 +1171,15 @@ async def update_norma_general(norma_id: str, request: CreateNormaGeneralRequest
         "nombre": request.nombre,
         "categoria": request.categoria,
         "descripcion": request.descripcion,
-        "contenido": request.contenido,
         "fecha_expedicion": request.fecha_expedicion,
         "entidad_emisora": request.entidad_emisora,
-        "updated_at": datetime.now(timezone.utc)
+        **await store_content(db, "general", norma_id, request.contenido)
     }
     
-    await db.normas_generales.update_one({"id": norma_id}, {"$set": update_data})
+    await db.normas_generales.update_one(
+        {"id": norma_id}, {**versioned_update(update_data, NORMA_STAMP_FIELD), "$unset": {"contenido": ""}}
+    )
+    await normative_context_cache.clear()
     return {"message": "Norma general actualizada exitosamente"}
 
 @api_router.delete("/normas-generales/{norma_id}")
@@ -824,18 +1188,19 @@ async def delete_norma_general(norma_id: str, current_user: dict = Depends(get_c
     if current_user['role'] != 'superadmin':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo el superadministrador puede eliminar normas generales")
     
-    norma = await db.normas_generales.find_one({"id": norma_id}, {"_id": 0})
+    norma = await db.normas_generales.find_one({"id": norma_id}, METADATA_PROJECTION)
     if not norma:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Norma no encontrada")
     
-    await db.normas_generales.update_one({"id": norma_id}, {"$set": {"vigente": False}})
+    await db.normas_generales.update_one({"id": norma_id}, versioned_update({"vigente": False}, NORMA_STAMP_FIELD))
+    await normative_context_cache.clear()
     return {"message": "Norma general desactivada exitosamente"}
 
 # ====================
 # REPOSITORIO NORMATIVO - NORMAS ESPECÍFICAS (Por empresa)
 # ====================
 
-@api_router.get("/normas-especificas/{company_id}")
+@api_router.get("/normas-especificas/{company_id}", dependencies=SECONDARY_READS)
 async def get_normas_especificas(company_id: str, current_user: dict = Depends(get_current_user)):
     """Obtener normas específicas de una empresa"""
     # Verify access
@@ -846,9 +1211,24 @@ async def get_normas_especificas(company_id: str, current_user: dict = Depends(g
     if current_user['role'] == 'client' and company['user_id'] != current_user['id']:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
     
-    normas = await db.normas_especificas.find({"company_id": company_id, "vigente": True}, {"_id": 0}).to_list(1000)
+    normas = await db.normas_especificas.find({"company_id": company_id, "vigente": True}, METADATA_PROJECTION).to_list(1000)
     return normas
 
+@api_router.get("/normas-especificas/{norma_id}/contenido", dependencies=SECONDARY_READS)
+async def get_norma_especifica_contenido(norma_id: str, current_user: dict = Depends(get_current_user)):
+    """Texto completo de una norma específica"""
+    norma = await db.normas_especificas.find_one({"id": norma_id}, {"_id": 0, "company_id": 1})
+    if not norma:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Norma no encontrada")
+    
+    # Verify access
+    company = await get_company_cached(norma['company_id'])
+    if current_user['role'] == 'client' and (not company or company['user_id'] != current_user['id']):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
+    
+    contenido = await load_content(db, "especifica", norma_id)
+    return {"id": norma_id, "contenido": contenido or ""}
+
 @api_router.post("/normas-especificas")
 async def create_norma_especifica(request: CreateNormaEspecificaRequest, current_user: dict = Depends(get_current_user)):
     """Crear una nueva norma específica para una empresa"""
@@ -865,17 +1245,18 @@ async def create_norma_especifica(request: CreateNormaEspecificaRequest, current
         nombre=request.nombre,
         tipo=request.tipo,
         descripcion=request.descripcion,
-        contenido=request.contenido,
         version=request.version
     )
     
-    await db.normas_especificas.insert_one(norma.model_dump())
+    summary = await store_content(db, "especifica", norma.id, request.contenido)
+    await db.normas_especificas.insert_one({**norma.model_dump(), **summary, **initial_stamp(NORMA_STAMP_FIELD)})
+    await normative_context_cache.clear()
     return {"message": "Norma específica creada exitosamente", "id": norma.id}
 
 @api_router.put("/normas-especificas/{norma_id}")
 async def update_norma_especifica(norma_id: str, request: CreateNormaEspecificaRequest, current_user: dict = Depends(get_current_user)):
     """Actualizar una norma específica"""
-    norma = await db.normas_especificas.find_one({"id": norma_id}, {"_id": 0})
+    norma = await db.normas_especificas.find_one({"id": norma_id}, METADATA_PROJECTION)
     if not norma:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Norma no encontrada")
     
@@ -888,18 +1269,20 @@ async def update_norma_especifica(norma_id: str, request: CreateNormaEspecificaR
         "nombre": request.nombre,
         "tipo": request.tipo,
         "descripcion": request.descripcion,
-        "contenido": request.contenido,
         "version": request.version,
-        "updated_at": datetime.now(timezone.utc)
+        **await store_content(db, "especifica", norma_id, request.contenido)
     }
     
-    await db.normas_especificas.update_one({"id": norma_id}, {"$set": update_data})
+    await db.normas_especificas.update_one(
+        {"id": norma_id}, {**versioned_update(update_data, NORMA_STAMP_FIELD), "$unset": {"contenido": ""}}
+    )
+    await normative_context_cache.clear()
     return {"message": "Norma específica actualizada exitosamente"}
 
 @api_router.delete("/normas-especificas/{norma_id}")
 async def delete_norma_especifica(norma_id: str, current_user: dict = Depends(get_current_user)):
     """Eliminar (desactivar) una norma específica"""
-    norma = await db.normas_especificas.find_one({"id": norma_id}, {"_id": 0})
+    norma = await db.normas_especificas.find_one({"id": norma_id}, METADATA_PROJECTION)
     if not norma:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Norma no encontrada")
     
@@ -908,15 +1291,98 @@ async def delete_norma_especifica(norma_id: str, current_user: dict = Depends(ge
     if current_user['role'] == 'client' and company['user_id'] != current_user['id']:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
     
-    await db.normas_especificas.update_one({"id": norma_id}, {"$set": {"vigente": False}})
+    await db.normas_especificas.update_one({"id": norma_id}, versioned_update({"vigente": False}, NORMA_STAMP_FIELD))
+    await normative_context_cache.clear()
     return {"message": "Norma específica desactivada exitosamente"}
 
+# ====================
+# CARGA DE NORMAS DESDE ARCHIVO (PDF, DOCX, TXT)
+# ====================
+
+@api_router.post("/normas/upload", status_code=status.HTTP_202_ACCEPTED)
+async def upload_norma(
+    file: UploadFile = File(...),
+    kind: str = Form(...),
+    nombre: str = Form(...),
+    descripcion: str = Form(""),
+    categoria: Optional[str] = Form(None),
+    tipo: Optional[str] = Form(None),
+    company_id: Optional[str] = Form(None),
+    version: Optional[str] = Form("1.0"),
+    fecha_expedicion: Optional[str] = Form(None),
+    entidad_emisora: Optional[str] = Form(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create a norm from a document. The text is extracted in the background;
+    the norm is listed at once with ingestion_status "procesando" and the
+    progress can be followed at /normas/ingestions/{id}.
+    """
+    if kind == "general":
+        if current_user['role'] != 'superadmin':
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo el superadministrador puede crear normas generales")
+        if not categoria:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La categoría es obligatoria")
+    elif kind == "especifica":
+        if not company_id or not tipo:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La empresa y el tipo son obligatorios")
+        company = await get_company_cached(company_id)
+        if not company:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Empresa no encontrada")
+        if current_user['role'] == 'client' and company['user_id'] != current_user['id']:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
+    else:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tipo de norma no válido")
+
+    document_format = detect_format(file.filename, file.content_type)
+    if not document_format:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato no soportado. Use PDF, DOCX o TXT")
+
+    try:
+        path, size = await save_upload(file)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"El archivo supera el máximo de {NORMA_UPLOAD_MAX_BYTES // (1024 * 1024)} MB"
+        )
+
+    if kind == "general":
+        norma = NormaGeneral(nombre=nombre, categoria=categoria, descripcion=descripcion,
+                             fecha_expedicion=fecha_expedicion, entidad_emisora=entidad_emisora,
+                             ingestion_status="procesando")
+    else:
+        norma = NormaEspecifica(company_id=company_id, nombre=nombre, tipo=tipo, descripcion=descripcion,
+                                version=version, ingestion_status="procesando")
+
+    ingestion_id = await create_ingestion_job(db, kind, norma.id, path, size, file.filename or "", document_format)
+    collection = db.normas_generales if kind == "general" else db.normas_especificas
+    await collection.insert_one({**norma.model_dump(), "ingestion_id": ingestion_id, "archivo_origen": file.filename,
+                                 **initial_stamp(NORMA_STAMP_FIELD)})
+    start_ingestion(db, ingestion_id, on_complete=normative_context_cache.clear)
+    return {"message": "Documento recibido, extrayendo texto", "id": norma.id, "ingestion_id": ingestion_id}
+
+@api_router.get("/normas/ingestions/{ingestion_id}")
+async def get_norma_ingestion(ingestion_id: str, current_user: dict = Depends(get_current_user)):
+    """Status and progress of a document ingestion"""
+    job = await db.normas_ingestas.find_one({"id": ingestion_id}, {"_id": 0, "path": 0})
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Carga no encontrada")
+
+    if job['kind'] == "especifica" and current_user['role'] == 'client':
+        norma = await db.normas_especificas.find_one({"id": job['norma_id']}, {"_id": 0, "company_id": 1})
+        company = await get_company_cached(norma['company_id']) if norma else None
+        if not company or company['user_id'] != current_user['id']:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
+    elif job['kind'] == "general" and current_user['role'] != 'superadmin':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
+    return job
+
 # ====================
 # CONFIGURACIÓN DE AUDITORÍA
 # ====================
 
-@api_router.get("/configuraciones-auditoria/{company_id}")
-async def get_configuraciones_auditoria(company_id: str, current_user: dict = Depends(get_current_user)):
+@api_router.get("/configuraciones-auditoria/{company_id}", dependencies=SECONDARY_READS)
+async def get_configuraciones_auditoria(company_id: str, request: Request, current_user: dict = Depends(get_current_user)):
     """Obtener configuraciones de auditoría de una empresa"""
     company = await db.companies.find_one({"id": company_id}, {"_id": 0})
     if not company:
@@ -926,10 +1392,10 @@ async def get_configuraciones_auditoria(company_id: str, current_user: dict = De
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado")
     
     configs = await db.configuraciones_auditoria.find({"company_id": company_id}, {"_id": 0}).to_list(1000)
-    return configs
+    return conditional_json(request, configs, *configs, listing=True)
 
-@api_router.get("/configuracion-auditoria/{config_id}")
-async def get_configuracion_auditoria(config_id: str, current_user: dict = Depends(get_current_user)):
+@api_router.get("/configuracion-auditoria/{config_id}", dependencies=SECONDARY_READS)
+async def get_configuracion_auditoria(config_id: str, request: Request, current_user: dict = Depends(get_current_user)):
     """Obtener una configuración de auditoría específica"""
     config = await db.configuraciones_auditoria.find_one({"id": config_id}, {"_id": 0})
     if not config:
@@ -938,20 +1404,20 @@ async def get_configuracion_auditoria(config_id: str, current_user: dict = Depen
     # Get full normas data
     normas_generales = []
     for norma_id in config.get('normas_generales_ids', []):
-        norma = await db.normas_generales.find_one({"id": norma_id}, {"_id": 0})
+        norma = await db.normas_generales.find_one({"id": norma_id}, METADATA_PROJECTION)
         if norma:
             normas_generales.append(norma)
     
     normas_especificas = []
     for norma_id in config.get('normas_especificas_ids', []):
-        norma = await db.normas_especificas.find_one({"id": norma_id}, {"_id": 0})
+        norma = await db.normas_especificas.find_one({"id": norma_id}, METADATA_PROJECTION)
         if norma:
             normas_especificas.append(norma)
     
     config['normas_generales'] = normas_generales
     config['normas_especificas'] = normas_especificas
     
-    return config
+    return conditional_json(request, config, config, *normas_generales, *normas_especificas)
 
 @api_router.post("/configuraciones-auditoria")
 async def create_configuracion_auditoria(request: CreateConfiguracionRequest, current_user: dict = Depends(get_current_user)):
@@ -978,7 +1444,10 @@ async def create_configuracion_auditoria(request: CreateConfiguracionRequest, cu
         criterios_adicionales=request.criterios_adicionales
     )
     
-    await db.configuraciones_auditoria.insert_one(config.model_dump())
+    config_doc = config.model_dump()
+    config_doc.update(initial_stamp())
+    
+    await db.configuraciones_auditoria.insert_one(config_doc)
     return {"message": "Configuración de auditoría creada exitosamente", "id": config.id}
 
 @api_router.put("/configuraciones-auditoria/{config_id}")
@@ -1006,7 +1475,8 @@ async def update_configuracion_auditoria(config_id: str, request: CreateConfigur
         "criterios_adicionales": request.criterios_adicionales
     }
     
-    await db.configuraciones_auditoria.update_one({"id": config_id}, {"$set": update_data})
+    await db.configuraciones_auditoria.update_one({"id": config_id}, versioned_update(update_data))
+    await normative_context_cache.invalidate(config_id)
     return {"message": "Configuración actualizada exitosamente"}
 
 # ====================
@@ -1017,6 +1487,7 @@ class CreateAuditoriaRequest(BaseModel):
     company_id: str
     config_id: str
     responses: List[Dict[str, Any]] = []
+    catalog_id: Optional[str] = None  # por defecto, el catálogo que aplica a la empresa
 
 @api_router.post("/auditorias")
 async def create_auditoria(request: CreateAuditoriaRequest, current_user: dict = Depends(get_current_user)):
@@ -1029,26 +1500,36 @@ async def create_auditoria(request: CreateAuditoriaRequest, current_user: dict =
     if current_user['role'] == 'client' and company['user_id'] != current_user['id']:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso para esta empresa")
     
-    # Create inspection in en_proceso state
+    catalog = company_catalog(company, request.catalog_id)
+    
+    # Create inspection in en_proceso state, pinned to the catalog version it is scored against
     inspection = Inspection(
         company_id=request.company_id,
         user_id=current_user['id'],
-        responses=request.responses,
+        responses=responses_map(request.responses),
         total_score=0.0,
         status="en_proceso",
-        config_id=request.config_id
+        config_id=request.config_id,
+        **catalog.pin()
     )
     
     inspection_doc = inspection.model_dump()
     inspection_doc['created_at'] = inspection_doc['created_at'].isoformat()
+    inspection_doc.update(initial_stamp())
     
     await db.inspections.insert_one(inspection_doc)
     
-    return {"message": "Auditoría creada exitosamente", "id": inspection.id}
+    return {"message": "Auditoría creada exitosamente", "id": inspection.id, **catalog.pin(), "total": len(catalog)}
 
-@api_router.put("/auditorias/{auditoria_id}/save")
-async def save_auditoria_progress(auditoria_id: str, responses: List[Dict[str, Any]], current_user: dict = Depends(get_current_user)):
-    """Guardar progreso de una auditoría sin cerrarla"""
+SAVE_CONFLICT_RETRIES = 3
+
+class SyncResponsesRequest(BaseModel):
+    base_version: int
+    responses: List[Dict[str, Any]]  # only the changed standards: {standard_id, response?, observations?, ...}
+
+SYNC_RESPONSE_FIELDS = ("response", "observations", "ai_recommendation", "evidence_images")
+
+async def get_editable_auditoria(auditoria_id: str, current_user: dict) -> Dict[str, Any]:
     inspection = await db.inspections.find_one({"id": auditoria_id}, {"_id": 0})
     if not inspection:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Auditoría no encontrada")
@@ -1058,55 +1539,101 @@ async def save_auditoria_progress(auditoria_id: str, responses: List[Dict[str, A
     
     if inspection.get('status') == 'cerrada':
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La auditoría está cerrada y no se puede modificar")
+    return inspection
+
+@api_router.put("/auditorias/{auditoria_id}/save")
+async def save_auditoria_progress(auditoria_id: str, responses: List[Dict[str, Any]], current_user: dict = Depends(get_current_user)):
+    """Guardar progreso de una auditoría sin cerrarla (envía todas las respuestas; la última escritura gana)"""
+    # Conditional on the version read, so the revision stamped on changed responses is exact
+    for _ in range(SAVE_CONFLICT_RETRIES):
+        inspection = await get_editable_auditoria(auditoria_id, current_user)
+        catalog = catalog_for_inspection(inspection)
+        responses_with_score, percentage, progress, answered_count = score_responses(responses, catalog)
+        version = inspection.get('version', 0)
+        update = versioned_update({"total_score": percentage, "progress": progress})
+        set_responses(update, inspection, responses_with_score, rev=version + 1)
+        result = await db.inspections.update_one({"id": auditoria_id, **version_filter(version)}, update)
+        if result.matched_count:
+            break
+    else:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La auditoría se está modificando en otra sesión, intente de nuevo")
     
-    # Calculate current score
-    total_score = 0.0
-    total_weight = sum([s['weight'] for s in STANDARDS])
-    answered_count = 0
-    
-    responses_with_score = []
-    for response in responses:
-        standard = next((s for s in STANDARDS if s['id'] == response.get('standard_id')), None)
-        if standard and response.get('response'):
-            answered_count += 1
-            if response['response'] == "cumple":
-                score = standard['weight']
-            elif response['response'] == "no_aplica":
-                score = standard['weight']  # No aplica cuenta como cumple
-            else:  # no_cumple
-                score = 0
-            
-            total_score += score
-            responses_with_score.append({
-                "standard_id": response['standard_id'],
-                "response": response['response'],
-                "observations": response.get('observations', ''),
-                "ai_recommendation": response.get('ai_recommendation', ''),
-                "evidence_images": response.get('evidence_images', []),
-                "score": score
-            })
-    
-    percentage = (total_score / total_weight) * 100 if total_weight > 0 else 0
-    progress = (answered_count / len(STANDARDS)) * 100 if STANDARDS else 0
-    
-    await db.inspections.update_one(
-        {"id": auditoria_id},
-        {"$set": {
-            "responses": responses_with_score,
-            "total_score": percentage,
-            "progress": progress,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    # Evidence images no longer referenced give back their storage reference
+    await release_urls(db, dropped_evidence_urls(inspection, responses_with_score))
     
     return {
         "message": "Progreso guardado exitosamente",
         "total_score": percentage,
         "progress": progress,
         "answered": answered_count,
-        "total": len(STANDARDS)
+        "total": len(catalog),
+        "version": version + 1
     }
 
+@api_router.get("/auditorias/{auditoria_id}/sync", dependencies=SECONDARY_READS)
+async def sync_auditoria(auditoria_id: str, since: int = 0, current_user: dict = Depends(get_current_user)):
+    """Respuestas modificadas desde la versión `since` que tiene el cliente"""
+    head = await db.inspections.find_one({"id": auditoria_id}, {"_id": 0, "user_id": 1, "version": 1, "status": 1,
+                                                                 "total_score": 1, "progress": 1})
+    if not head:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Auditoría no encontrada")
+    
+    if current_user['role'] == 'client' and head['user_id'] != current_user['id']:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso")
+    
+    # Up to date: answer from the small projection without reading the responses
+    if since and since == head.get('version', 0):
+        return changes_since(head, since)
+    
+    inspection = await db.inspections.find_one({"id": auditoria_id}, {"_id": 0})
+    if not inspection:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Auditoría no encontrada")
+    return changes_since(inspection, since)
+
+@api_router.patch("/auditorias/{auditoria_id}/responses")
+async def sync_auditoria_responses(auditoria_id: str, request: SyncResponsesRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Guardar solo las respuestas modificadas. La escritura se aplica si la
+    auditoría sigue en `base_version`; si no, responde 409 con los cambios
+    hechos desde esa versión para que el cliente los combine y reintente.
+    """
+    inspection = await get_editable_auditoria(auditoria_id, current_user)
+    
+    version = inspection.get('version', 0)
+    if version == request.base_version:
+        catalog = catalog_for_inspection(inspection)
+        merged = stored_map(inspection)
+        for change in request.responses:
+            standard_id = change.get('standard_id')
+            if standard_id not in catalog.by_id:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Estándar desconocido: {standard_id}")
+            key = response_key(standard_id)
+            merged[key] = {
+                **merged.get(key, {}),
+                **{field: change[field] for field in SYNC_RESPONSE_FIELDS if field in change},
+                "standard_id": standard_id,
+            }
+        
+        responses_with_score, percentage, progress, answered_count = score_responses(list(merged.values()), catalog)
+        update = versioned_update({"total_score": percentage, "progress": progress})
+        set_responses(update, inspection, responses_with_score, rev=version + 1)
+        result = await db.inspections.update_one({"id": auditoria_id, **version_filter(version)}, update)
+        if result.matched_count:
+            await release_urls(db, dropped_evidence_urls(inspection, responses_with_score))
+            return {
+                "version": version + 1,
+                "total_score": percentage,
+                "progress": progress,
+                "answered": answered_count,
+                "total": len(catalog)
+            }
+        inspection = await db.inspections.find_one({"id": auditoria_id}, {"_id": 0}) or inspection
+    
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": "La auditoría cambió desde la versión enviada", **changes_since(inspection, request.base_version)}
+    )
+
 @api_router.post("/inspections")
 async def create_inspection(inspection_data: InspectionCreate, current_user: dict = Depends(get_current_user)):
     # Verify company belongs to user
@@ -1117,13 +1644,14 @@ async def create_inspection(inspection_data: InspectionCreate, current_user: dic
     if current_user['role'] == 'client' and company['user_id'] != current_user['id']:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso para esta empresa")
     
+    catalog = company_catalog(company)
+    
     # Calculate score
     total_score = 0.0
-    total_weight = sum([s['weight'] for s in STANDARDS])
     
     responses_with_score = []
     for response in inspection_data.responses:
-        standard = next((s for s in STANDARDS if s['id'] == response.standard_id), None)
+        standard = catalog.by_id.get(response.standard_id)
         if standard:
             if response.response == "cumple":
                 score = standard['weight']
@@ -1140,52 +1668,70 @@ async def create_inspection(inspection_data: InspectionCreate, current_user: dic
                 "score": score
             })
     
-    percentage = (total_score / total_weight) * 100 if total_weight > 0 else 0
+    percentage = (total_score / catalog.total_weight) * 100 if catalog.total_weight > 0 else 0
     
     inspection = Inspection(
         company_id=inspection_data.company_id,
         user_id=current_user['id'],
-        responses=responses_with_score,
-        total_score=percentage
+        responses=responses_map(responses_with_score),
+        total_score=percentage,
+        **catalog.pin()
     )
     
     inspection_doc = inspection.model_dump()
     inspection_doc['created_at'] = inspection_doc['created_at'].isoformat()
+    inspection_doc.update(initial_stamp())
     
     await db.inspections.insert_one(inspection_doc)
     
     return {"message": "Inspección creada exitosamente", "inspection_id": inspection.id, "total_score": percentage}
 
-@api_router.get("/inspections")
-async def get_inspections(current_user: dict = Depends(get_current_user)):
-    if current_user['role'] == 'superadmin':
-        inspections = await db.inspections.find({}, {"_id": 0}).to_list(1000)
-    else:
-        inspections = await db.inspections.find({"user_id": current_user['id']}, {"_id": 0}).to_list(1000)
+def inspections_listing_stamps(inspections: List[Dict[str, Any]], companies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Documents whose version stamps determine the /inspections listing, in a stable order"""
+    return sorted(inspections, key=lambda i: i['id']) + sorted((c for c in companies if c), key=lambda c: c['id'])
+
+@api_router.get("/inspections", dependencies=SECONDARY_READS)
+async def get_inspections(request: Request, current_user: dict = Depends(get_current_user)):
+    query = {} if current_user['role'] == 'superadmin' else {"user_id": current_user['id']}
+    
+    # Cheap pre-check: compare version stamps before fetching the full documents
+    if request.headers.get("if-none-match"):
+        stamps = await db.inspections.find(query, {**STAMP_PROJECTION, "company_id": 1}).to_list(1000)
+        company_ids = list({s['company_id'] for s in stamps})
+        company_stamps = await db.companies.find({"id": {"$in": company_ids}}, STAMP_PROJECTION).to_list(1000)
+        response = conditional_json(request, None, *inspections_listing_stamps(stamps, company_stamps), listing=True)
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            return response
+    
+    inspections = await db.inspections.find(query, {"_id": 0, "applied_ops": 0}).to_list(1000)
     
     # Add company info and calculate progress
     result = []
+    companies = {}
     for inspection in inspections:
-        company = await db.companies.find_one({"id": inspection['company_id']}, {"_id": 0})
+        if inspection['company_id'] not in companies:
+            companies[inspection['company_id']] = await get_company_cached(inspection['company_id'])
+        company = companies[inspection['company_id']]
         if company:
             # Calculate progress if not stored
             progress = inspection.get('progress', 0)
             if not progress and inspection.get('responses'):
-                answered = len([r for r in inspection['responses'] if r.get('response')])
-                total = len(STANDARDS)
+                answered = len([r for r in responses_list(inspection) if r.get('response')])
+                total = len(catalog_for_inspection(inspection))
                 progress = (answered / total) * 100 if total > 0 else 0
             
             result.append({
-                **inspection,
+                **with_response_list(inspection),
                 "company_name": company['company_name'],
                 "progress": progress,
                 "status": inspection.get('status', 'en_proceso')
             })
     
-    return result
+    stamps = inspections_listing_stamps(inspections, list(companies.values()))
+    return conditional_json(request, result, *stamps, listing=True)
 
-@api_router.get("/inspections/{inspection_id}")
-async def get_inspection(inspection_id: str, current_user: dict = Depends(get_current_user)):
+@api_router.get("/inspections/{inspection_id}", dependencies=SECONDARY_READS)
+async def get_inspection(inspection_id: str, request: Request, current_user: dict = Depends(get_current_user)):
     inspection = await db.inspections.find_one({"id": inspection_id}, {"_id": 0})
     if not inspection:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inspección no encontrada")
@@ -1193,12 +1739,12 @@ async def get_inspection(inspection_id: str, current_user: dict = Depends(get_cu
     if current_user['role'] == 'client' and inspection['user_id'] != current_user['id']:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso")
     
-    company = await db.companies.find_one({"id": inspection['company_id']}, {"_id": 0})
+    company = await get_company_cached(inspection['company_id'])
     
-    return {
-        **inspection,
+    return conditional_json(request, {
+        **with_response_list(inspection),
         "company": company
-    }
+    }, inspection, company)
 
 @api_router.put("/inspections/{inspection_id}/close")
 async def close_inspection(inspection_id: str, current_user: dict = Depends(get_current_user)):
@@ -1215,13 +1761,13 @@ async def close_inspection(inspection_id: str, current_user: dict = Depends(get_
     
     await db.inspections.update_one(
         {"id": inspection_id},
-        {"$set": {"status": "cerrada", "closed_at": datetime.now(timezone.utc).isoformat()}}
+        versioned_update({"status": "cerrada", "closed_at": datetime.now(timezone.utc).isoformat()})
     )
     
     return {"message": "Auditoría cerrada exitosamente"}
 
 @api_router.delete("/inspections/{inspection_id}")
-async def delete_inspection(inspection_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_inspection(inspection_id: str, background_tasks: BackgroundTasks, current_user: dict = Depends(get_current_user)):
     """Eliminar una auditoría completamente"""
     inspection = await db.inspections.find_one({"id": inspection_id}, {"_id": 0})
     if not inspection:
@@ -1230,13 +1776,21 @@ async def delete_inspection(inspection_id: str, current_user: dict = Depends(get
     if current_user['role'] == 'client' and inspection['user_id'] != current_user['id']:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso")
     
-    # Delete related AI analysis
-    await db.ai_analyses.delete_many({"inspection_id": inspection_id})
+    job_id = await create_purge_job(
+        db,
+        kind="inspection",
+        target_id=inspection_id,
+        company_id=inspection['company_id'],
+        user_id=inspection['user_id'],
+        inspection_ids=[inspection_id],
+        storage_urls=evidence_urls(inspection)
+    )
     
-    # Delete the inspection
+    # Delete the inspection now; related AI analyses and evidence files are purged in the background
     await db.inspections.delete_one({"id": inspection_id})
+    background_tasks.add_task(run_purge_job, db, job_id)
     
-    return {"message": "Auditoría eliminada exitosamente"}
+    return {"message": "Auditoría eliminada exitosamente", "purge_job_id": job_id}
 
 # ====================
 # AI ANALYSIS ENDPOINTS
@@ -1251,196 +1805,21 @@ async def analyze_inspection(request: AIAnalysisRequest, current_user: dict = De
     if current_user['role'] == 'client' and inspection['user_id'] != current_user['id']:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso")
     
-    company = await db.companies.find_one({"id": inspection['company_id']}, {"_id": 0})
+    company = await get_company_cached(inspection['company_id'])
     
-    # Calculate statistics by phase
-    phase_stats = {}
-    for resp in inspection['responses']:
-        standard = next((s for s in STANDARDS if s['id'] == resp['standard_id']), None)
-        if standard:
-            phase = standard['category'].split(' - ')[0]  # Get phase (I. PLANEAR, II. HACER, etc.)
-            if phase not in phase_stats:
-                phase_stats[phase] = {'total': 0, 'obtained': 0, 'count': 0}
-            phase_stats[phase]['total'] += standard['weight']
-            phase_stats[phase]['obtained'] += resp['score']
-            phase_stats[phase]['count'] += 1
-    
-    phase_percentages = {}
-    for phase, stats in phase_stats.items():
-        phase_percentages[phase] = (stats['obtained'] / stats['total'] * 100) if stats['total'] > 0 else 0
-    
-    # Build detailed responses text
-    responses_text = ""
-    critical_items = []
-    partial_items = []
-    
-    for resp in inspection['responses']:
-        standard = next((s for s in STANDARDS if s['id'] == resp['standard_id']), None)
-        if standard:
-            responses_text += f"\n\nEstándar {standard['id']}: {standard['title']}\n"
-            responses_text += f"Categoría: {standard['category']}\n"
-            responses_text += f"Descripción: {standard['description']}\n"
-            responses_text += f"Respuesta: {resp['response']}\n"
-            responses_text += f"Observaciones: {resp['observations']}\n"
-            responses_text += f"Puntaje obtenido: {resp['score']}/{standard['weight']}\n"
-            
-            if resp['response'] == 'no_cumple':
-                critical_items.append(f"{standard['id']} - {standard['title']}")
-            elif resp['response'] == 'cumple_parcial':
-                partial_items.append(f"{standard['id']} - {standard['title']}")
+    prompt, report_prompt = build_analysis_prompts(inspection, company)
     
-    prompt = f"""Eres un experto consultor en Seguridad y Salud en el Trabajo en Colombia, especializado en la Resolución 0312 de 2019.
-
-INFORMACIÓN DE LA EMPRESA:
-Empresa: {company['company_name']}
-Puntaje Total: {inspection['total_score']:.2f}%
-
-DESGLOSE POR FASES:
-{chr(10).join([f"- {phase}: {pct:.1f}%" for phase, pct in phase_percentages.items()])}
-
-ESTÁNDARES CRÍTICOS (No Cumple): {len(critical_items)}
-ESTÁNDARES PARCIALES (Cumple Parcial): {len(partial_items)}
-
-RESPUESTAS DETALLADAS A LOS ESTÁNDARES:
-{responses_text}
-
-Por favor, proporciona un análisis profesional y estructurado con:
-
-1. **RESUMEN EJECUTIVO**
-   - Nivel de cumplimiento global y clasificación (Crítico <60%, Moderado 60-84%, Excelente ≥85%)
-   - Principales hallazgos en 3-4 puntos clave
-   - Riesgo general identificado
-
-2. **ANÁLISIS POR FASES (PHVA)**
-   - Planear: Análisis del {phase_percentages.get('I. PLANEAR', 0):.1f}% obtenido
-   - Hacer: Análisis del {phase_percentages.get('II. HACER', 0):.1f}% obtenido
-   - Verificar: Análisis del {phase_percentages.get('III. VERIFICAR', 0):.1f}% obtenido
-   - Actuar: Análisis del {phase_percentages.get('IV. ACTUAR', 0):.1f}% obtenido
-
-3. **FORTALEZAS IDENTIFICADAS**
-   - Listar estándares con cumplimiento total
-   - Destacar buenas prácticas observadas
-
-4. **BRECHAS Y OPORTUNIDADES DE MEJORA**
-   - Análisis de los {len(critical_items)} estándares críticos (no cumple)
-   - Análisis de los {len(partial_items)} estándares parciales
-   - Identificar patrones comunes en los incumplimientos
-
-5. **ANÁLISIS DE RIESGOS**
-   - Riesgos asociados a los incumplimientos críticos
-   - Impacto potencial en la seguridad de los trabajadores
-   - Exposición legal y sanciones posibles
-
-El análisis debe ser profesional, técnico, orientado a la acción y fácil de entender para la gerencia."""
-    
-    # Call OpenAI via Emergent Integration
+    # Call the configured LLM provider (gpt-4o via Emergent by default)
     try:
-        chat = LlmChat(
-            api_key=os.getenv("EMERGENT_LLM_KEY"),
+        chat = get_llm_provider().conversation(
             session_id=f"inspection_{request.inspection_id}",
-            system_message="Eres un experto consultor en Seguridad y Salud en el Trabajo en Colombia, especializado en la Resolución 0312 de 2019."
-        ).with_model("openai", "gpt-4o")
-        
-        user_message = UserMessage(text=prompt)
-        analysis_result = await chat.send_message(user_message)
+            system_message="Eres un experto consultor en Seguridad y Salud en el Trabajo en Colombia, especializado en la Resolución 0312 de 2019.",
+            purpose="analyze-inspection"
+        )
         
-        # Generate editable report with action plan
-        report_prompt = f"""Basándote en el análisis anterior, genera un informe ejecutivo profesional con plan de acción detallado para {company['company_name']}.
-
-El informe debe incluir:
-
-1. **PORTADA**
-   - Título: "INFORME DE EVALUACIÓN DEL SISTEMA DE GESTIÓN DE SEGURIDAD Y SALUD EN EL TRABAJO"
-   - Empresa: {company['company_name']}
-   - NIT/Identificación: [Pendiente de completar]
-   - Fecha de evaluación: {datetime.now(timezone.utc).strftime('%d de %B de %Y')}
-   - Responsable: {company['admin_name']}
-   - Dirección: {company['address']}
-   - Teléfono: {company['phone']}
-
-2. **RESUMEN EJECUTIVO**
-   - Puntaje global: {inspection['total_score']:.2f}%
-   - Clasificación: [Crítico/Moderado/Excelente según puntaje]
-   - Desglose por fases PHVA
-   - Principales hallazgos (3-4 bullets)
-   - Recomendación principal
-
-3. **RESULTADOS POR FASE**
-   - **I. PLANEAR ({phase_percentages.get('I. PLANEAR', 0):.1f}%)**: Análisis y hallazgos
-   - **II. HACER ({phase_percentages.get('II. HACER', 0):.1f}%)**: Análisis y hallazgos
-   - **III. VERIFICAR ({phase_percentages.get('III. VERIFICAR', 0):.1f}%)**: Análisis y hallazgos
-   - **IV. ACTUAR ({phase_percentages.get('IV. ACTUAR', 0):.1f}%)**: Análisis y hallazgos
-
-4. **FORTALEZAS IDENTIFICADAS**
-   - Listar estándares que cumplen al 100%
-   - Destacar buenas prácticas
-
-5. **BRECHAS CRÍTICAS Y OPORTUNIDADES**
-   - {len(critical_items)} estándares críticos sin cumplir
-   - {len(partial_items)} estándares con cumplimiento parcial
-   - Análisis de patrones e impacto
-
-6. **ANÁLISIS DE RIESGOS ASOCIADOS**
-   - Riesgos de seguridad identificados
-   - Exposición legal y sanciones potenciales
-   - Impacto en operaciones
-
-7. **PLAN DE ACCIÓN PRIORIZADO**
-
-   **A. ACCIONES INMEDIATAS (0-30 días) - PRIORIDAD CRÍTICA**
-   Para cada acción incluir:
-   - Nombre de la acción
-   - Estándar(es) relacionado(s)
-   - Descripción detallada
-   - Responsable sugerido
-   - Recursos estimados
-   - Resultado esperado
-   
-   **B. ACCIONES A CORTO PLAZO (1-3 meses) - PRIORIDAD ALTA**
-   Para cada acción incluir mismo formato anterior
-   
-   **C. ACCIONES A MEDIANO PLAZO (3-12 meses) - PRIORIDAD MEDIA**
-   Para cada acción incluir mismo formato anterior
-
-8. **CRONOGRAMA SUGERIDO**
-   Tabla mensual con actividades priorizadas
-
-9. **ESTIMACIÓN DE RECURSOS**
-   - Recursos humanos necesarios
-   - Recursos tecnológicos
-   - Presupuesto estimado
-   - Capacitaciones requeridas
-
-10. **INDICADORES DE SEGUIMIENTO**
-    - KPIs para medir progreso
-    - Frecuencia de medición
-    - Responsables
-
-11. **CONCLUSIONES Y RECOMENDACIONES**
-    - Síntesis de situación actual
-    - Ruta crítica para cumplimiento
-    - Beneficios esperados de implementar el plan
-
-12. **ANEXOS SUGERIDOS**
-    - Lista de estándares no conformes
-    - Normatividad aplicable
-    - Formatos recomendados
-
-El informe debe ser formal, accionable y listo para presentar a gerencia. Usa formato markdown con títulos, subtítulos, listas y tablas.
-
-**IMPORTANTE - ANÁLISIS PROFUNDO Y ESPECÍFICO:**
-- Para cada acción del plan, proporciona detalles concretos y específicos para la empresa
-- Los análisis de riesgo deben ser cuantitativos cuando sea posible (ej: "potencial de X accidentes/año")
-- Las recomendaciones deben incluir pasos específicos detallados paso a paso, no generalizaciones
-- Considera el contexto específico de la empresa ({company['company_name']}) y su actividad económica
-- Los cronogramas deben ser realistas y considerar recursos limitados de empresas medianas
-- Incluye estimaciones de costos aproximados en COP (pesos colombianos) cuando sea relevante
-- Los KPIs deben ser SMART (específicos, medibles, alcanzables, relevantes, temporales)
-- Proporciona ejemplos concretos y plantillas cuando sea aplicable
-"""
+        analysis_result = await observed_llm_call("analyze-inspection", chat, prompt)
         
-        report_message = UserMessage(text=report_prompt)
-        report_result = await chat.send_message(report_message)
+        report_result = await observed_llm_call("analyze-inspection", chat, report_prompt)
         
         # Save analysis
         ai_analysis = AIAnalysis(
@@ -1451,6 +1830,7 @@ El informe debe ser formal, accionable y listo para presentar a gerencia. Usa fo
         
         analysis_doc = ai_analysis.model_dump()
         analysis_doc['created_at'] = analysis_doc['created_at'].isoformat()
+        analysis_doc.update(initial_stamp())
         
         await db.ai_analyses.insert_one(analysis_doc)
         
@@ -1464,8 +1844,8 @@ El informe debe ser formal, accionable y listo para presentar a gerencia. Usa fo
         logging.error(f"Error calling AI: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error al generar análisis: {str(e)}")
 
-@api_router.get("/analysis/{inspection_id}")
-async def get_analysis(inspection_id: str, current_user: dict = Depends(get_current_user)):
+@api_router.get("/analysis/{inspection_id}", dependencies=SECONDARY_READS)
+async def get_analysis(inspection_id: str, request: Request, current_user: dict = Depends(get_current_user)):
     analysis = await db.ai_analyses.find_one({"inspection_id": inspection_id}, {"_id": 0})
     if not analysis:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Análisis no encontrado")
@@ -1474,7 +1854,7 @@ async def get_analysis(inspection_id: str, current_user: dict = Depends(get_curr
     if current_user['role'] == 'client' and inspection['user_id'] != current_user['id']:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso")
     
-    return analysis
+    return conditional_json(request, analysis, analysis)
 
 class UpdateReportRequest(BaseModel):
     report: str
@@ -1485,7 +1865,7 @@ async def update_analysis(analysis_id: str, request: UpdateReportRequest, curren
     if not analysis:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Análisis no encontrado")
     
-    await db.ai_analyses.update_one({"id": analysis_id}, {"$set": {"report": request.report}})
+    await db.ai_analyses.update_one({"id": analysis_id}, versioned_update({"report": request.report}))
     
     return {"message": "Informe actualizado exitosamente"}
 
@@ -1493,48 +1873,62 @@ async def update_analysis(analysis_id: str, request: UpdateReportRequest, curren
 # AI RECOMMENDATIONS PER STANDARD
 # ====================
 
-@api_router.post("/ai/standard-recommendation")
-async def get_standard_recommendation(request: AIRecommendationRequest, current_user: dict = Depends(get_current_user)):
-    """Generate AI recommendations for a specific standard based on the response and normative context"""
-    try:
-        api_key = os.getenv("EMERGENT_LLM_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="API key no configurada")
-        
-        # Build context-aware prompt
-        response_text = {
-            "cumple": "CUMPLE con el estándar",
-            "no_cumple": "NO CUMPLE con el estándar",
-            "no_aplica": "NO APLICA a la empresa"
-        }.get(request.response, request.response)
-        
-        # Get normative context if audit_config_id is provided
-        normative_context = ""
-        if request.audit_config_id:
-            config = await db.configuraciones_auditoria.find_one({"id": request.audit_config_id}, {"_id": 0})
-            if config:
-                # Get normas generales
-                normas_gen_texts = []
-                for norma_id in config.get('normas_generales_ids', []):
-                    norma = await db.normas_generales.find_one({"id": norma_id}, {"_id": 0})
-                    if norma:
-                        normas_gen_texts.append(f"**{norma['nombre']}** ({norma['categoria']}): {norma['contenido'][:2000]}...")
-                
-                # Get normas específicas
-                normas_esp_texts = []
-                for norma_id in config.get('normas_especificas_ids', []):
-                    norma = await db.normas_especificas.find_one({"id": norma_id}, {"_id": 0})
-                    if norma:
-                        normas_esp_texts.append(f"**{norma['nombre']}** ({norma['tipo']}): {norma['contenido'][:1500]}...")
-                
-                if normas_gen_texts or normas_esp_texts:
-                    normative_context = "\n\n**CONTEXTO NORMATIVO APLICABLE:**\n"
-                    if normas_gen_texts:
-                        normative_context += "\n*Normas Generales:*\n" + "\n".join(normas_gen_texts)
-                    if normas_esp_texts:
-                        normative_context += "\n\n*Normas Internas de la Empresa:*\n" + "\n".join(normas_esp_texts)
-        
-        system_message = """Eres un experto auditor en Sistemas de Gestión con especialización en Seguridad y Salud en el Trabajo (SST), Calidad (ISO 9001), Medio Ambiente (ISO 14001) y normativa laboral colombiana.
+async def build_normative_context(config_id: str) -> str:
+    """Prompt section with the general and company norms selected in an audit configuration"""
+    config = await db.configuraciones_auditoria.find_one({"id": config_id}, {"_id": 0})
+    if not config:
+        return ""
+    
+    # Metadata and bodies in one query each; bodies are decompressed only here
+    gen_ids = config.get('normas_generales_ids', [])
+    esp_ids = config.get('normas_especificas_ids', [])
+    normas_gen = {n['id']: n for n in await db.normas_generales.find({"id": {"$in": gen_ids}}, METADATA_PROJECTION).to_list(len(gen_ids))}
+    normas_esp = {n['id']: n for n in await db.normas_especificas.find({"id": {"$in": esp_ids}}, METADATA_PROJECTION).to_list(len(esp_ids))}
+    contenidos_gen = await load_contents(db, "general", normas_gen, max_chars=2000)
+    contenidos_esp = await load_contents(db, "especifica", normas_esp, max_chars=1500)
+    
+    normas_gen_texts = []
+    for norma_id in gen_ids:
+        norma = normas_gen.get(norma_id)
+        if norma:
+            normas_gen_texts.append(f"**{norma['nombre']}** ({norma['categoria']}): {contenidos_gen.get(norma_id, '')}...")
+    
+    normas_esp_texts = []
+    for norma_id in esp_ids:
+        norma = normas_esp.get(norma_id)
+        if norma:
+            normas_esp_texts.append(f"**{norma['nombre']}** ({norma['tipo']}): {contenidos_esp.get(norma_id, '')}...")
+    
+    if not normas_gen_texts and not normas_esp_texts:
+        return ""
+    normative_context = "\n\n**CONTEXTO NORMATIVO APLICABLE:**\n"
+    if normas_gen_texts:
+        normative_context += "\n*Normas Generales:*\n" + "\n".join(normas_gen_texts)
+    if normas_esp_texts:
+        normative_context += "\n\n*Normas Internas de la Empresa:*\n" + "\n".join(normas_esp_texts)
+    return normative_context
+
+async def generate_standard_recommendation(request: AIRecommendationRequest) -> Dict[str, Any]:
+    """Recommendation for one standard (cached by prompt); raises HTTPException if the LLM is not configured"""
+    llm = get_llm_provider()
+    if not llm.is_configured():
+        raise HTTPException(status_code=500, detail="API key no configurada")
+    
+    # Build context-aware prompt
+    response_text = {
+        "cumple": "CUMPLE con el estándar",
+        "no_cumple": "NO CUMPLE con el estándar",
+        "no_aplica": "NO APLICA a la empresa"
+    }.get(request.response, request.response)
+    
+    # Get normative context if audit_config_id is provided
+    normative_context = ""
+    if request.audit_config_id:
+        normative_context = await normative_context_cache.get_or_set(
+            request.audit_config_id, lambda: build_normative_context(request.audit_config_id)
+        )
+    
+    system_message = """Eres un experto auditor en Sistemas de Gestión con especialización en Seguridad y Salud en el Trabajo (SST), Calidad (ISO 9001), Medio Ambiente (ISO 14001) y normativa laboral colombiana.
 
 Tu conocimiento incluye:
 - Resolución 0312 de 2019 (Estándares Mínimos del SG-SST)
@@ -1554,7 +1948,7 @@ DIRECTRICES PARA TUS RECOMENDACIONES:
 7. Proporciona evidencias sugeridas para demostrar cumplimiento
 8. Indica plazos realistas para implementación"""
 
-        user_prompt = f"""**ESTÁNDAR A EVALUAR:**
+    user_prompt = f"""**ESTÁNDAR A EVALUAR:**
 - ID: {request.standard_id}
 - Título: {request.standard_title}
 - Descripción: {request.standard_description}
@@ -1594,33 +1988,45 @@ ESTRUCTURA TU RESPUESTA ASÍ:
 ## 💡 Mejores Prácticas
 - [Recomendaciones adicionales basadas en estándares internacionales]"""
 
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"rec_{request.standard_id}_{uuid.uuid4()}",
-            system_message=system_message
-        ).with_model("openai", "gpt-4o")
-        
-        response = await chat.send_message(UserMessage(text=user_prompt))
-        
-        return {
-            "standard_id": request.standard_id,
-            "recommendation": response,
-            "generated_at": datetime.now(timezone.utc).isoformat()
-        }
-        
+    # Identical prompts (same standard, answer, company context and norms) reuse the previous answer
+    prompt_key = hashlib.sha256(f"{system_message}\n{user_prompt}".encode("utf-8")).hexdigest()
+    cached = await recommendation_cache.get(prompt_key)
+    if cached is not None:
+        return {"standard_id": request.standard_id, **cached}
+    
+    chat = llm.conversation(
+        session_id=f"rec_{request.standard_id}_{uuid.uuid4()}",
+        system_message=system_message,
+        purpose="standard-recommendation"
+    )
+    
+    response = await observed_llm_call("standard-recommendation", chat, user_prompt)
+    
+    result = {
+        "recommendation": response,
+        "generated_at": datetime.now(timezone.utc).isoformat()
+    }
+    await recommendation_cache.set(prompt_key, result)
+    return {"standard_id": request.standard_id, **result}
+
+@api_router.post("/ai/standard-recommendation")
+async def get_standard_recommendation(request: AIRecommendationRequest, current_user: dict = Depends(get_current_user)):
+    """Generate AI recommendations for a specific standard based on the response and normative context"""
+    try:
+        return await generate_standard_recommendation(request)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error generating recommendation: {e}")
         raise HTTPException(status_code=500, detail=f"Error al generar recomendación: {str(e)}")
 
-@api_router.post("/ai/analyze-image")
-async def analyze_inspection_image(request: AIImageAnalysisRequest, current_user: dict = Depends(get_current_user)):
-    """Analyze an image for SST compliance and evidence extraction"""
-    try:
-        api_key = os.getenv("EMERGENT_LLM_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="API key no configurada")
-        
-        system_message = """Eres un experto en Seguridad y Salud en el Trabajo (SST) analizando evidencia fotográfica para una auditoría basada en la Resolución 0312 de 2019 de Colombia.
+async def generate_image_analysis(request: AIImageAnalysisRequest) -> Dict[str, Any]:
+    """Evidence analysis of one image; raises HTTPException if the LLM is not configured"""
+    llm = get_llm_provider()
+    if not llm.is_configured():
+        raise HTTPException(status_code=500, detail="API key no configurada")
+    
+    system_message = """Eres un experto en Seguridad y Salud en el Trabajo (SST) analizando evidencia fotográfica para una auditoría basada en la Resolución 0312 de 2019 de Colombia.
 
 Tu objetivo es analizar la imagen y extraer información relevante para el informe de inspección.
 
@@ -1634,7 +2040,7 @@ DEBES PROPORCIONAR:
 
 Sé objetivo, técnico y específico. Basa tu análisis en evidencia visible."""
 
-        user_prompt = f"""Analiza esta imagen como evidencia para el siguiente estándar de auditoría SST:
+    user_prompt = f"""Analiza esta imagen como evidencia para el siguiente estándar de auditoría SST:
 
 **ESTÁNDAR:**
 - ID: {request.standard_id}
@@ -1645,71 +2051,131 @@ Sé objetivo, técnico y específico. Basa tu análisis en evidencia visible."""
 
 Por favor proporciona un análisis detallado de la imagen en relación con este estándar."""
 
-        # Create image content from base64
-        image_content = ImageContent(image_base64=request.image_base64)
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"img_{request.standard_id}_{uuid.uuid4()}",
-            system_message=system_message
-        ).with_model("openai", "gpt-4o")
-        
-        response = await chat.send_message(UserMessage(
-            text=user_prompt,
-            file_contents=[image_content]
-        ))
-        
-        return {
-            "standard_id": request.standard_id,
-            "analysis": response,
-            "analyzed_at": datetime.now(timezone.utc).isoformat()
-        }
-        
+    chat = llm.conversation(
+        session_id=f"img_{request.standard_id}_{uuid.uuid4()}",
+        system_message=system_message,
+        purpose="analyze-image"
+    )
+    
+    response = await observed_llm_call("analyze-image", chat, user_prompt, image_base64=request.image_base64)
+    
+    return {
+        "standard_id": request.standard_id,
+        "analysis": response,
+        "analyzed_at": datetime.now(timezone.utc).isoformat()
+    }
+
+@api_router.post("/ai/analyze-image")
+async def analyze_inspection_image(request: AIImageAnalysisRequest, current_user: dict = Depends(get_current_user)):
+    """Analyze an image for SST compliance and evidence extraction"""
+    try:
+        return await generate_image_analysis(request)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error analyzing image: {e}")
         raise HTTPException(status_code=500, detail=f"Error al analizar imagen: {str(e)}")
 
+# ====================
+# OFFLINE BATCH SUBMISSION
+# ====================
+
+class BatchOperation(BaseModel):
+    op_id: str
+    type: str  # "responses", "recommendation", "image_analysis"
+    auditoria_id: str
+    base_version: Optional[int] = None
+    responses: List[Dict[str, Any]] = []  # type=responses: changed standards
+    recommendation: Optional[AIRecommendationRequest] = None  # type=recommendation
+    image_analysis: Optional[AIImageAnalysisRequest] = None  # type=image_analysis
+    image_url: Optional[str] = None  # evidence already uploaded for the analyzed image
+    filename: Optional[str] = None
+
+class BatchSubmission(BaseModel):
+    operations: List[BatchOperation]
+
+async def run_batch_llm_operations(operations: List[BatchOperation]) -> Dict[str, Dict[str, Any]]:
+    """Recommendations and image analyses of a batch, with bounded concurrency; failures are kept per operation"""
+    semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+    
+    async def run(operation: BatchOperation) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                if operation.type == "recommendation":
+                    return await generate_standard_recommendation(operation.recommendation)
+                return await generate_image_analysis(operation.image_analysis)
+            except HTTPException as e:
+                return {"error": e.detail}
+            except Exception as e:
+                logging.error(f"Error en operación {operation.op_id} del lote: {e}")
+                return {"error": str(e)}
+    
+    llm_operations = [op for op in operations if op.type in ("recommendation", "image_analysis")]
+    results = await asyncio.gather(*(run(op) for op in llm_operations))
+    return {op.op_id: result for op, result in zip(llm_operations, results)}
+
+@api_router.post("/auditorias/batch")
+async def submit_auditoria_batch(batch: BatchSubmission, current_user: dict = Depends(get_current_user)):
+    """
+    Aplicar una cola de operaciones guardadas sin conexión (respuestas,
+    recomendaciones de IA y análisis de evidencias) de una o varias auditorías.
+    Devuelve el resultado de cada operación y el estado final de cada auditoría.
+    """
+    operations = batch.operations
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Máximo {BATCH_MAX_OPERATIONS} operaciones por lote")
+    if len({op.op_id for op in operations}) != len(operations):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Los op_id deben ser únicos")
+    for op in operations:
+        if op.type not in OPERATION_TYPES:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Tipo de operación desconocido: {op.type}")
+        if (op.type == "recommendation" and not op.recommendation) or (op.type == "image_analysis" and not op.image_analysis):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Operación {op.op_id} sin datos para {op.type}")
+    
+    auditoria_ids = list({op.auditoria_id for op in operations})
+    inspections = {
+        inspection['id']: inspection
+        for inspection in await db.inspections.find({"id": {"$in": auditoria_ids}}, {"_id": 0}).to_list(len(auditoria_ids))
+    }
+    
+    rejected = {}
+    for op in operations:
+        inspection = inspections.get(op.auditoria_id)
+        if not inspection:
+            rejected[op.op_id] = batch_outcome(op, "not_found", error="Auditoría no encontrada")
+        elif current_user['role'] == 'client' and inspection['user_id'] != current_user['id']:
+            rejected[op.op_id] = batch_outcome(op, "forbidden", error="No tiene permiso")
+        elif inspection.get('status') == 'cerrada':
+            rejected[op.op_id] = batch_outcome(op, "closed", error="La auditoría está cerrada y no se puede modificar")
+    
+    # Resent after a lost response: operations already applied answer with their stored outcome
+    replayed = replayed_outcomes(inspections, [op for op in operations if op.op_id not in rejected])
+    rejected.update(replayed)
+    
+    llm_results = await run_batch_llm_operations([op for op in operations if op.op_id not in rejected])
+    return await apply_batch(db, inspections, operations, llm_results, rejected)
+
 @api_router.post("/upload-evidence")
-async def upload_evidence(file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
-    """Upload evidence image to Firebase Storage"""
+async def upload_evidence(request: Request, file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
+    """Upload evidence image to storage (identical images are stored once)"""
     try:
-        from firebase_storage import upload_file_to_firebase
-        
         # Validate file type
         allowed_types = ["image/jpeg", "image/png", "image/webp"]
         if file.content_type not in allowed_types:
             raise HTTPException(status_code=400, detail="Solo se permiten imágenes JPEG, PNG o WEBP")
         
-        # Read file content
-        file_content = await file.read()
-        
-        # Max size 5MB
-        if len(file_content) > 5 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="La imagen no puede superar 5MB")
-        
-        # Upload to Firebase using same folder as logos (already has permissions)
-        file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-        unique_filename = f"logos/evidence_{uuid.uuid4()}.{file_extension}"
-        
-        config = {
-            'storage_bucket': os.getenv('FIREBASE_STORAGE_BUCKET')
-        }
-        
-        import requests as http_requests
-        upload_url = f"https://firebasestorage.googleapis.com/v0/b/{config['storage_bucket']}/o?uploadType=media&name={unique_filename}"
-        
-        response = http_requests.post(
-            upload_url,
-            data=file_content,
-            headers={'Content-Type': file.content_type}
-        )
-        
-        if response.status_code not in [200, 201]:
-            raise Exception(f"Firebase upload failed: {response.status_code}")
+        # Read in blocks, stopping as soon as the 5MB limit is passed
+        max_bytes = UPLOAD_KINDS["evidence"]["max_bytes"]
+        content = bytearray()
+        while block := await file.read(RESUMABLE_CHUNK_BYTES):
+            content += block
+            if len(content) > max_bytes:
+                raise HTTPException(status_code=400, detail="La imagen no puede superar 5MB")
         
-        public_url = f"https://firebasestorage.googleapis.com/v0/b/{config['storage_bucket']}/o/{unique_filename.replace('/', '%2F')}?alt=media"
-        
-        return {"url": public_url, "filename": file.filename}
+        with observe_storage_upload("evidence", len(content)):
+            stored = await object_store.put_bytes(bytes(content), file.content_type)
+        url = object_store.url(stored["key"], public_base_url(request))
+        return await record_upload("evidence", stored, url, file.filename, {"user_id": current_user['id']})
         
     except HTTPException:
         raise
@@ -1717,11 +2183,96 @@ async def upload_evidence(file: UploadFile = File(...), current_user: dict = Dep
         logging.error(f"Error uploading evidence: {e}")
         raise HTTPException(status_code=500, detail=f"Error al subir imagen: {str(e)}")
 
+class ResumableUploadRequest(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+    inspection_id: Optional[str] = None
+    standard_id: Optional[str] = None
+
+async def get_owned_upload_session(session_id: str, current_user: dict) -> Dict[str, Any]:
+    try:
+        session = await get_upload_session(db, session_id)
+    except Exception as e:
+        logging.error(f"Error querying upload session {session_id}: {e}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="No se pudo consultar el almacenamiento")
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sesión de subida no encontrada")
+    if current_user['role'] == 'client' and session['target']['user_id'] != current_user['id']:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso")
+    return session
+
+@api_router.post("/uploads/evidence/sessions")
+async def open_evidence_upload(request: ResumableUploadRequest, http_request: Request, current_user: dict = Depends(get_current_user)):
+    """Start a chunked, resumable evidence upload; chunks go to PUT /uploads/evidence/sessions/{id}"""
+    if request.inspection_id:
+        await get_editable_auditoria(request.inspection_id, current_user)
+    target = {
+        "user_id": current_user['id'],
+        "company_id": None,
+        "inspection_id": request.inspection_id,
+        "standard_id": request.standard_id,
+    }
+    base_url = public_base_url(http_request)
+    try:
+        session = await open_upload_session(db, "evidence", request.filename, request.content_type, request.size, base_url, target)
+    except UploadRejected as e:
+        raise upload_error(e)
+    return session_view(session)
+
+@api_router.get("/uploads/evidence/sessions/{session_id}")
+async def get_evidence_upload(session_id: str, current_user: dict = Depends(get_current_user)):
+    """Confirmed offset of an upload, to resume after a dropped connection"""
+    return session_view(await get_owned_upload_session(session_id, current_user))
+
+@api_router.put("/uploads/evidence/sessions/{session_id}")
+async def put_evidence_chunk(session_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Append the chunk starting at the Upload-Offset header; the last chunk registers the evidence.
+    If registering fails, an empty PUT at the final offset retries it.
+    """
+    session = await db.upload_sessions.find_one({"id": session_id}, {"_id": 0})
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sesión de subida no encontrada")
+    if current_user['role'] == 'client' and session['target']['user_id'] != current_user['id']:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso")
+    try:
+        offset = int(request.headers.get("upload-offset", ""))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Falta la cabecera Upload-Offset")
+
+    target = session['target']
+
+    async def register(assembled: Dict[str, Any]) -> Dict[str, Any]:
+        info = {key: assembled[key] for key in ("size", "content_type", "sha256", "md5")}
+        return await register_stored_object(
+            "evidence", assembled["object_name"], assembled["url"], assembled["filename"], info, target
+        )
+
+    try:
+        with observe_storage_upload("evidence_chunk", int(request.headers.get("content-length") or 0)):
+            session = await append_upload_chunk(db, session, offset, request.stream(), register)
+    except UploadRejected as e:
+        if e.status == 409:
+            current = await db.upload_sessions.find_one({"id": session_id}, {"_id": 0})
+            return JSONResponse(status_code=e.status, content={"detail": str(e), **session_view(current)})
+        raise upload_error(e)
+    except Exception as e:
+        logging.error(f"Error storing chunk of upload {session_id}: {e}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Error al enviar el trozo al almacenamiento; reintente desde el último desplazamiento confirmado")
+    return session_view(session)
+
+@api_router.delete("/uploads/evidence/sessions/{session_id}")
+async def abort_evidence_upload(session_id: str, current_user: dict = Depends(get_current_user)):
+    session = await get_owned_upload_session(session_id, current_user)
+    await abort_upload_session(db, session)
+    return {"message": "Subida cancelada"}
+
 # ====================
 # PDF GENERATION
 # ====================
 
-@api_router.get("/generate-pdf/{inspection_id}")
+@api_router.get("/generate-pdf/{inspection_id}", dependencies=SECONDARY_READS)
 async def generate_pdf(inspection_id: str, current_user: dict = Depends(get_current_user)):
     """Generate PDF report with professional design"""
     try:
@@ -1735,36 +2286,105 @@ async def generate_pdf(inspection_id: str, current_user: dict = Depends(get_curr
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tiene permiso")
         
         # Get company
-        company = await db.companies.find_one({"id": inspection['company_id']}, {"_id": 0})
+        company = await get_company_cached(inspection['company_id'])
         
         # Get AI analysis
         analysis = await db.ai_analyses.find_one({"inspection_id": inspection_id}, {"_id": 0})
         
-        # Create PDF with professional design
-        from pdf_generator import generate_professional_pdf
-        
         pdf_filename = f"informe_{company['company_name'].replace(' ', '_')}.pdf"
-        pdf_path = f"/tmp/{pdf_filename}"
         
-        # Generate professional PDF
-        generate_professional_pdf(
-            pdf_path=pdf_path,
-            company_data=company,
-            inspection_data=inspection,
-            analysis_data=analysis
-        )
+        # Render into memory (spilling to an anonymous temp file if large) off the event loop
+        render_start = time.perf_counter()
+        with span("pdf.render", inspection_id=inspection_id):
+            spool, size = await asyncio.to_thread(render_report_spooled, company, inspection, analysis)
+        PDF_RENDER_DURATION.observe(time.perf_counter() - render_start)
+        PDF_SIZE.observe(size)
         
-        return FileResponse(pdf_path, media_type='application/pdf', filename=pdf_filename)
+        return StreamingResponse(
+            iter_spooled(spool),
+            media_type='application/pdf',
+            headers={"Content-Disposition": attachment_header(pdf_filename), "Content-Length": str(size)}
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error generating PDF: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error al generar PDF: {str(e)}")
 
+def parse_export_date(value: str, field: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Fecha inválida en {field}, use AAAA-MM-DD")
+
+def export_query(current_user: dict, company_id: Optional[str], date_from: Optional[str], date_to: Optional[str]) -> dict:
+    """Inspections visible to the user, optionally narrowed to a company and/or a closing date range (inclusive)"""
+    query = {} if current_user['role'] == 'superadmin' else {"user_id": current_user['id']}
+    if company_id:
+        query["company_id"] = company_id
+    if date_from or date_to:
+        closed_at = {}
+        if date_from:
+            closed_at["$gte"] = parse_export_date(date_from, "date_from").date().isoformat()
+        if date_to:
+            closed_at["$lt"] = (parse_export_date(date_to, "date_to").date() + timedelta(days=1)).isoformat()
+        query["closed_at"] = closed_at
+    return query
+
+@api_router.get("/export/pdfs", dependencies=SECONDARY_READS)
+async def export_pdfs(
+    company_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Descargar en un ZIP los informes de una empresa y/o de las auditorías cerradas entre dos fechas (inclusive)"""
+    if not company_id and not (date_from or date_to):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Indique una empresa o un rango de fechas")
+    
+    query = export_query(current_user, company_id, date_from, date_to)
+    total = await db.inspections.count_documents(query)
+    if total == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No hay auditorías para exportar")
+    if total > PDF_EXPORT_MAX_REPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"La exportación incluye {total} auditorías; el máximo es {PDF_EXPORT_MAX_REPORTS}. Reduzca el rango"
+        )
+    
+    filename = f"informes_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_reports_zip(db_secondary, query),
+        media_type="application/zip",
+        headers={"Content-Disposition": attachment_header(filename)}
+    )
+
+@api_router.get("/export/responses")
+async def export_responses(
+    format: str = "csv",
+    company_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Exportar en CSV o XLSX una fila por estándar respondido (empresa, auditoría, respuesta, puntaje, peso, fechas)"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato no soportado, use csv o xlsx")
+    
+    media_type, stream = EXPORT_FORMATS[format]
+    query = export_query(current_user, company_id, date_from, date_to)
+    filename = f"respuestas_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        stream(iter_response_rows(db_secondary, query)),
+        media_type=media_type,
+        headers={"Content-Disposition": attachment_header(filename)}
+    )
+
 # ====================
 # INITIALIZE SUPERADMIN
 # ====================
 
-@app.on_event("startup")
 async def create_superadmin():
     superadmin_email = os.getenv("SUPERADMIN_EMAIL", "nelson@sanchezcya.com")
     existing = await db.users.find_one({"email": superadmin_email}, {"_id": 0})
@@ -1783,12 +2403,33 @@ async def create_superadmin():
         await db.users.insert_one(superadmin_doc)
         logging.info(f"Superadmin created: {superadmin_email} / admin123")
 
+async def resume_interrupted_purges():
+    await resume_purge_jobs(db)
+
 # ====================
 # INCLUDE ROUTER
 # ====================
 
-# Mount static files for uploads
-app.mount("/uploads", StaticFiles(directory="/app/backend/uploads"), name="uploads")
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: MongoDB ping latency and connection pool statistics"""
+    try:
+        return await mongo.readiness()
+    except Exception as e:
+        logging.error(f"Readiness check failed: {str(e)}")
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "unavailable", "error": str(e)})
+
+app.middleware("http")(http_metrics_middleware)
+app.middleware("http")(tracing_middleware)
+app.middleware("http")(mongo.causal_token_middleware)
+
+# Uploaded files: immutable caching for content-addressed keys, ranges, resized variants (see upload_serving.py)
+app.include_router(upload_router)
 
 app.include_router(api_router)
 
@@ -1798,14 +2439,15 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", CAUSAL_TOKEN_HEADER],
 )
 
+# Compress large responses; already-encoded ones and compressed formats (PDF, ZIP,
+# XLSX, images) are passed through, keeping their Content-Length and ranges
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""
+Catálogos de estándares versionados.
+
+Cada catálogo es un archivo JSON de backend/catalogs/ (o de
+STANDARDS_CATALOGS_DIR, para catálogos propios de un cliente) con `id`,
+`version`, `name`, `framework` y la lista `standards` ({id, category, title,
+description, weight, metodo_verificacion, criterio}). Un catálogo con `base`
+({id, version} de otro catálogo) puede listar solo ids del catálogo base, o
+dicts que sobrescriben campos de esos estándares.
+
+Los archivos se compilan una sola vez al importar el módulo en estructuras
+inmutables: estándares en orden, índice por id, posición y peso total. Un
+catálogo publicado no se modifica; los cambios van en una versión nueva. Cada
+auditoría guarda `catalog_id` y `catalog_version` al crearse y se califica
+siempre con esa versión; las anteriores a los catálogos corresponden a
+LEGACY_CATALOG (la tabla de 60 estándares).
+
+Selección: `applies_to` es una lista de reglas {min_workers, max_workers,
+risk_levels}; un catálogo aplica si cumple alguna. Con la Resolución 0312 de
+2019: hasta 10 trabajadores con riesgo I a III, 7 estándares (art. 3); de 11 a
+50 con riesgo I a III, 21 (art. 9); el resto, 60 (art. 16), que también es el
+catálogo `default` cuando faltan datos de la empresa. Una empresa puede fijar
+otro catálogo (ISO 45001, listas propias) en `catalogo_estandares`.
+
+STANDARDS_CATALOGS_DIR: directorio adicional de catálogos (opcional)
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+CATALOGS_DIR = Path(__file__).parent / "catalogs"
+LEGACY_CATALOG = ("res0312-60", "2019.1")
+REQUIRED_FIELDS = ("id", "category", "title", "weight")
+OPTIONAL_FIELDS = ("description", "metodo_verificacion", "criterio")
+RULE_FIELDS = ("min_workers", "max_workers", "risk_levels")
+
+
+class CatalogError(ValueError):
+    """A catalog file is malformed or references a catalog that does not exist"""
+
+
+class UnknownCatalog(LookupError):
+    """No catalog with that id (or version)"""
+
+
+def version_key(version: str) -> Tuple:
+    """Sort key for versions like "2019.1" (numeric parts compare as numbers)"""
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in version.split("."))
+
+
+def _freeze_rule(rule: Dict[str, Any], source: str) -> Mapping[str, Any]:
+    unknown = set(rule) - set(RULE_FIELDS)
+    if unknown:
+        raise CatalogError(f"{source}: campos de applies_to desconocidos {sorted(unknown)}")
+    frozen = dict(rule)
+    if "risk_levels" in frozen:
+        frozen["risk_levels"] = frozenset(str(level) for level in frozen["risk_levels"])
+    return MappingProxyType(frozen)
+
+
+class Catalog:
+    """One compiled, read-only catalog version"""
+
+    def __init__(self, raw: Dict[str, Any], standards: List[Dict[str, Any]], source: str):
+        self.id: str = raw["id"]
+        self.version: str = str(raw["version"])
+        self.name: str = raw.get("name", self.id)
+        self.framework: str = raw.get("framework", self.name)
+        self.description: str = raw.get("description", "")
+        self.default: bool = bool(raw.get("default", False))
+        self.applies_to = tuple(_freeze_rule(rule, source) for rule in raw.get("applies_to", ()))
+        self.source = source
+
+        self.standards = tuple(MappingProxyType(standard) for standard in standards)
+        self.by_id: Mapping[str, Mapping[str, Any]] = MappingProxyType({s["id"]: s for s in self.standards})
+        self.order: Mapping[str, int] = MappingProxyType({s["id"]: index for index, s in enumerate(self.standards)})
+        self.total_weight: float = sum(s["weight"] for s in self.standards)
+
+    @property
+    def key(self) -> str:
+        return f"{self.id}@{self.version}"
+
+    def __len__(self) -> int:
+        return len(self.standards)
+
+    def __repr__(self) -> str:
+        return f"<Catalog {self.key} ({len(self)} estándares)>"
+
+    def pin(self) -> Dict[str, str]:
+        """Fields an inspection stores to stay scored against this version"""
+        return {"catalog_id": self.id, "catalog_version": self.version}
+
+    def applies(self, numero_trabajadores: Optional[int], nivel_riesgo: Optional[str]) -> bool:
+        """Whether any applicability rule matches the company size and risk class"""
+        return any(_rule_matches(rule, numero_trabajadores, nivel_riesgo) for rule in self.applies_to)
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        """Standards as plain dicts (the /standards payload)"""
+        return [dict(standard) for standard in self.standards]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "version": self.version,
+            "name": self.name,
+            "framework": self.framework,
+            "description": self.description,
+            "total": len(self),
+            "total_weight": self.total_weight,
+            "default": self.default,
+            "applies_to": [
+                {**rule, **({"risk_levels": sorted(rule["risk_levels"])} if "risk_levels" in rule else {})}
+                for rule in self.applies_to
+            ],
+        }
+
+
+def _rule_matches(rule: Mapping[str, Any], numero_trabajadores: Optional[int], nivel_riesgo: Optional[str]) -> bool:
+    if "min_workers" in rule or "max_workers" in rule:
+        if numero_trabajadores is None:
+            return False
+        if numero_trabajadores < rule.get("min_workers", 0):
+            return False
+        if "max_workers" in rule and numero_trabajadores > rule["max_workers"]:
+            return False
+    if "risk_levels" in rule and str(nivel_riesgo or "").strip() not in rule["risk_levels"]:
+        return False
+    return True
+
+
+def _compile_standards(raw: Dict[str, Any], base: Optional[Catalog], source: str) -> List[Dict[str, Any]]:
+    standards = []
+    seen = set()
+    for entry in raw.get("standards") or []:
+        if isinstance(entry, str):
+            entry = {"id": entry}
+        if base is not None and entry.get("id") in base.by_id:
+            standard = {**base.by_id[entry["id"]], **entry}
+        elif isinstance(entry, dict) and all(field in entry for field in REQUIRED_FIELDS):
+            standard = dict(entry)
+        else:
+            raise CatalogError(f"{source}: estándar incompleto o inexistente en la base: {entry!r}")
+
+        if standard["id"] in seen:
+            raise CatalogError(f"{source}: estándar repetido {standard['id']}")
+        seen.add(standard["id"])
+        standard["weight"] = float(standard["weight"])
+        if standard["weight"] < 0:
+            raise CatalogError(f"{source}: peso negativo en {standard['id']}")
+        for field in OPTIONAL_FIELDS:
+            standard.setdefault(field, "")
+        standards.append(standard)
+
+    if not standards:
+        raise CatalogError(f"{source}: el catálogo no tiene estándares")
+    return standards
+
+
+def compile_catalogs(raws: Iterable[Tuple[Dict[str, Any], str]]) -> List[Catalog]:
+    """Compile raw catalog documents (with their source path), resolving `base` references"""
+    pending: Dict[Tuple[str, str], Tuple[Dict[str, Any], str]] = {}
+    for raw, source in raws:
+        if not raw.get("id") or not raw.get("version"):
+            raise CatalogError(f"{source}: falta id o version")
+        key = (raw["id"], str(raw["version"]))
+        if key in pending:
+            raise CatalogError(f"{source}: {key[0]}@{key[1]} ya está definido en {pending[key][1]}")
+        pending[key] = (raw, source)
+
+    compiled: Dict[Tuple[str, str], Catalog] = {}
+
+    def build(key: Tuple[str, str], chain: Tuple[Tuple[str, str], ...] = ()) -> Catalog:
+        if key in compiled:
+            return compiled[key]
+        if key in chain:
+            raise CatalogError(f"Referencia circular entre catálogos: {' -> '.join('@'.join(k) for k in chain + (key,))}")
+        raw, source = pending[key]
+        base = None
+        if raw.get("base"):
+            base_key = (raw["base"]["id"], str(raw["base"]["version"]))
+            if base_key not in pending:
+                raise CatalogError(f"{source}: el catálogo base {'@'.join(base_key)} no existe")
+            base = build(base_key, chain + (key,))
+        compiled[key] = Catalog(raw, _compile_standards(raw, base, source), source)
+        return compiled[key]
+
+    return [build(key) for key in pending]
+
+
+def read_catalog_files(directories: Iterable[Path]) -> List[Tuple[Dict[str, Any], str]]:
+    raws = []
+    for directory in directories:
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                with open(path, encoding="utf-8") as source:
+                    raws.append((json.load(source), str(path)))
+            except json.JSONDecodeError as e:
+                raise CatalogError(f"{path}: JSON inválido ({e})")
+    return raws
+
+
+class CatalogRegistry:
+    """All compiled catalogs, by id and version"""
+
+    def __init__(self, catalogs: Iterable[Catalog]):
+        self._versions: Dict[str, Dict[str, Catalog]] = {}
+        for catalog in catalogs:
+            self._versions.setdefault(catalog.id, {})[catalog.version] = catalog
+        self._latest: Dict[str, Catalog] = {
+            catalog_id: versions[max(versions, key=version_key)]
+            for catalog_id, versions in sorted(self._versions.items())
+        }
+        defaults = [catalog for catalog in self._latest.values() if catalog.default]
+        if len(defaults) != 1:
+            raise CatalogError(f"Debe haber exactamente un catálogo por defecto (hay {len(defaults)})")
+        self.default = defaults[0]
+
+    def __iter__(self):
+        """Every version of every catalog"""
+        for versions in self._versions.values():
+            yield from versions.values()
+
+    def latest(self) -> List[Catalog]:
+        """Current version of each catalog, by id"""
+        return list(self._latest.values())
+
+    def versions(self, catalog_id: str) -> List[str]:
+        return sorted(self._versions.get(catalog_id, {}), key=version_key)
+
+    def get(self, catalog_id: str, version: Optional[str] = None) -> Catalog:
+        """A catalog version, or the current one when `version` is None"""
+        if catalog_id not in self._versions:
+            raise UnknownCatalog(catalog_id)
+        if version is None:
+            return self._latest[catalog_id]
+        try:
+            return self._versions[catalog_id][version]
+        except KeyError:
+            raise UnknownCatalog(f"{catalog_id}@{version}")
+
+    def select(self, numero_trabajadores: Optional[int], nivel_riesgo: Optional[str]) -> Catalog:
+        """Current catalog whose applicability rules match, or the default one"""
+        for catalog in self._latest.values():
+            if catalog.applies(numero_trabajadores, nivel_riesgo):
+                return catalog
+        return self.default
+
+    def for_company(self, company: Dict[str, Any], catalog_id: Optional[str] = None) -> Catalog:
+        """Catalog for a new inspection: the requested one, the company's own, or the applicable one"""
+        catalog_id = catalog_id or company.get("catalogo_estandares")
+        if catalog_id:
+            return self.get(catalog_id)
+        try:
+            workers = int(company["numero_trabajadores"]) if company.get("numero_trabajadores") is not None else None
+        except (TypeError, ValueError):
+            workers = None
+        return self.select(workers, company.get("nivel_riesgo"))
+
+    def for_inspection(self, inspection: Dict[str, Any]) -> Catalog:
+        """Catalog version an inspection was created with"""
+        if not inspection.get("catalog_id"):
+            return self.get(*LEGACY_CATALOG)
+        return self.get(inspection["catalog_id"], inspection.get("catalog_version"))
+
+
+def load_catalogs() -> CatalogRegistry:
+    directories = [CATALOGS_DIR]
+    if os.getenv("STANDARDS_CATALOGS_DIR"):
+        directories.append(Path(os.environ["STANDARDS_CATALOGS_DIR"]))
+    registry = CatalogRegistry(compile_catalogs(read_catalog_files(directories)))
+    logging.info("Catálogos de estándares: " + ", ".join(f"{c.key} ({len(c)})" for c in registry.latest()))
+    return registry
+
+
+CATALOGS = load_catalogs()
+
+
+def catalog_for_inspection(inspection: Dict[str, Any]) -> Catalog:
+    return CATALOGS.for_inspection(inspection)
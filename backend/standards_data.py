@@ -1,545 +0,0 @@
-# Array completo de estándares con métodos de verificación
-# Basado en Resolución 0312 de 2019
-
-STANDARDS = [
-    {
-        "id": "1.1.1",
-        "category": "I. PLANEAR - Recursos",
-        "title": "Responsable del Sistema de Gestión de Seguridad y Salud en el Trabajo SG-SST",
-        "description": "Debe designarse un responsable del SG-SST con las competencias necesarias.",
-        "weight": 0.5,
-        "metodo_verificacion": "Solicitar el soporte que contenga la asignación y documentación de las responsabilidades en SST a todos los niveles de la organización.",
-        "criterio": "Para la implementación y mejora continua del SG SST."
-    },
-    {
-        "id": "1.1.2",
-        "category": "I. PLANEAR - Recursos",
-        "title": "Responsabilidades en el Sistema de Gestión de Seguridad y Salud en el Trabajo – SG-SST",
-        "description": "Se deben asignar roles y responsabilidades en el SG-SST de manera clara y documentada.",
-        "weight": 0.5,
-        "metodo_verificacion": "Solicitar el soporte que contenga la asignación y documentación de las responsabilidades en SST a todos los niveles de la organización.",
-        "criterio": "Para la implementación y mejora continua del SG SST."
-    },
-    {
-        "id": "1.1.3",
-        "category": "I. PLANEAR - Recursos",
-        "title": "Asignación de recursos para el Sistema de Gestión en Seguridad y Salud en el Trabajo – SG-SST",
-        "description": "La empresa debe asignar recursos financieros, técnicos y humanos necesarios para implementar el SG-SST.",
-        "weight": 0.5,
-        "metodo_verificacion": "Constatar la existencia de evidencias físicas y/o documentales que demuestren la definición y asignación de los recursos financieros, humanos, técnicos y de otra índole para la implementación, mantenimiento y continuidad del SG SST, evidenciando la asignación de recursos con base en el plan de trabajo anual.",
-        "criterio": "Recursos financieros, humanos, técnicos y tecnológicos."
-    },
-    {
-        "id": "1.1.4",
-        "category": "I. PLANEAR - Recursos",
-        "title": "Afiliación al Sistema General de Riesgos Laborales",
-        "description": "Todos los trabajadores deben estar afiliados al Sistema General de Riesgos Laborales.",
-        "weight": 0.5,
-        "metodo_verificacion": "Todos los trabajadores, independientemente de su forma de vinculación o contratación están afiliados al Sistema General de Riesgos Laborales y el pago de los aportes se realiza conforme a la normativa y en la respectiva clase de riesgo.",
-        "criterio": "Asegurar la cobertura de riesgos laborales para todos los trabajadores."
-    },
-    {
-        "id": "1.1.5",
-        "category": "I. PLANEAR - Recursos",
-        "title": "Pago de pensión trabajadores alto riesgo",
-        "description": "Se debe garantizar el pago de pensión especial para trabajadores en actividades de alto riesgo.",
-        "weight": 0.5,
-        "metodo_verificacion": "Verificar si la empresa con la asistencia de la Administradora de Riesgos Laborales está cumpliendo con lo establecido en la presente resolución para actividades de alto riesgo.",
-        "criterio": "Cubrir los riesgos laborales específicos para actividades de alto riesgo según Decreto 2090 de 2003."
-    },
-    {
-        "id": "1.1.6",
-        "category": "I. PLANEAR - Recursos",
-        "title": "Conformación COPASST / Vigía",
-        "description": "Debe conformarse el Comité Paritario de Seguridad y Salud en el Trabajo o Vigía según el número de trabajadores.",
-        "weight": 0.5,
-        "metodo_verificacion": "Solicitar registros que constaten la capacitación y evaluación tanto para el Vigía en SST o para los miembros del COPASST según aplique que estén vigentes.",
-        "criterio": "Asegurar la formación y competencia de los representantes de SST."
-    },
-    {
-        "id": "1.1.7",
-        "category": "I. PLANEAR - Recursos",
-        "title": "Capacitación COPASST / Vigía",
-        "description": "Los miembros del COPASST o Vigía deben recibir capacitación en SST.",
-        "weight": 0.5,
-        "metodo_verificacion": "Solicitar registros que constaten la capacitación y evaluación tanto para el Vigía en SST o para los miembros del COPASST según aplique que estén vigentes.",
-        "criterio": "Asegurar la formación y competencia de los representantes de SST."
-    },
-    {
-        "id": "1.1.8",
-        "category": "I. PLANEAR - Recursos",
-        "title": "Conformación Comité de Convivencia",
-        "description": "Debe conformarse el Comité de Convivencia Laboral según normativa vigente.",
-        "weight": 0.5,
-        "metodo_verificacion": "La empresa conformó el Comité de Convivencia Laboral y este funciona de acuerdo con la normativa vigente.",
-        "criterio": "Promover un ambiente laboral sano y prevenir el acoso laboral."
-    },
-    {
-        "id": "1.2.1",
-        "category": "I. PLANEAR - Capacitación SG-SST",
-        "title": "Programa Capacitación promoción y prevención PYP",
-        "description": "Debe existir un programa de capacitación documentado en promoción y prevención en SST.",
-        "weight": 2.0,
-        "metodo_verificacion": "Se cuenta con un programa de capacitación anual en promoción y prevención, que incluye los peligros/riesgos prioritarios, extensivo a todos los niveles de la organización y el mismo se ejecuta.",
-        "criterio": "Fomentar la cultura de prevención y el conocimiento de los riesgos."
-    },
-    {
-        "id": "1.2.2",
-        "category": "I. PLANEAR - Capacitación SG-SST",
-        "title": "Capacitación, Inducción y Reinducción en Sistema de Gestión de Seguridad y Salud en el Trabajo SG-SST",
-        "description": "Todo trabajador debe recibir inducción y reinducción periódica en el SG-SST.",
-        "weight": 2.0,
-        "metodo_verificacion": "Solicitar el certificado de aprobación del curso de capacitación virtual de cincuenta (50) horas definido por el Ministerio de Trabajo, expedido a nombre del responsable del SG SST.",
-        "criterio": "Requisito de formación para el responsable del SG SST."
-    },
-    {
-        "id": "1.2.3",
-        "category": "I. PLANEAR - Capacitación SG-SST",
-        "title": "Responsables del Sistema de Gestión de Seguridad y Salud en el Trabajo SG-SST con curso (50 horas)",
-        "description": "El responsable del SG-SST debe tener certificación de curso de 50 horas en SST.",
-        "weight": 2.0,
-        "metodo_verificacion": "Solicitar el certificado de aprobación del curso de capacitación virtual de cincuenta (50) horas definido por el Ministerio de Trabajo, expedido a nombre del responsable del SG SST.",
-        "criterio": "Requisito de formación para el responsable del SG SST."
-    },
-    {
-        "id": "2.1.1",
-        "category": "II. HACER - Política SG-SST",
-        "title": "Política del Sistema de Gestión de Seguridad y Salud en el Trabajo SG-SST firmada, fechada y comunicada",
-        "description": "La política de SST debe estar firmada por el representante legal, fechada y comunicada a todos los trabajadores.",
-        "weight": 1.0,
-        "metodo_verificacion": "Revisar si los objetivos se encuentran definidos, cumplen con las condiciones mencionadas en el criterio y existen evidencias del proceso de difusión.",
-        "criterio": "Establecer metas claras para la gestión de SST."
-    },
-    {
-        "id": "2.2.1",
-        "category": "II. HACER - Objetivos SG-SST",
-        "title": "Objetivos definidos, claros, medibles, cuantificables, con metas, documentados, revisados del SG-SST",
-        "description": "Los objetivos del SG-SST deben ser SMART (específicos, medibles, alcanzables, relevantes y con plazo).",
-        "weight": 1.0,
-        "metodo_verificacion": "Revisar si los objetivos se encuentran definidos, cumplen con las condiciones mencionadas en el criterio y existen evidencias del proceso de difusión.",
-        "criterio": "Establecer metas claras para la gestión de SST."
-    },
-    {
-        "id": "2.3.1",
-        "category": "II. HACER - Evaluación Inicial SG-SST",
-        "title": "Evaluación e identificación de prioridades",
-        "description": "Se debe realizar evaluación inicial del SG-SST para identificar prioridades de intervención.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar el plan de trabajo anual para alcanzar los objetivos propuestos en el SG SST, el cual identifica metas, responsabilidades, recursos, cronograma de actividades, firmado por el empleador y el responsable del SG SST.",
-        "criterio": "Planificar las actividades para la consecución de los objetivos."
-    },
-    {
-        "id": "2.4.1",
-        "category": "II. HACER - Plan Anual Trabajo",
-        "title": "Plan que identifica objetivos, metas, responsabilidad, recursos con cronograma y firmado",
-        "description": "Debe existir un plan anual de trabajo con objetivos, metas, responsables, recursos y cronograma firmado.",
-        "weight": 2.0,
-        "metodo_verificacion": "Verificar el cumplimiento del mismo. En caso de desviaciones en el cumplimiento, solicitar los planes de mejora para el logro del plan inicial.",
-        "criterio": "Asegurar la ejecución efectiva del plan de trabajo."
-    },
-    {
-        "id": "2.5.1",
-        "category": "II. HACER - Conservación Documental",
-        "title": "Archivo o retención documental del Sistema de Gestión en Seguridad y Salud en el Trabajo SG-SST",
-        "description": "Se debe establecer un sistema de archivo y retención documental del SG-SST.",
-        "weight": 2.0,
-        "metodo_verificacion": "La empresa define la matriz legal actualizada.",
-        "criterio": "Identificar y cumplir con la normativa legal aplicable en SST."
-    },
-    {
-        "id": "2.6.1",
-        "category": "II. HACER - Rendición de Cuentas",
-        "title": "Rendición sobre el desempeño",
-        "description": "La alta dirección debe rendir cuentas sobre el desempeño del SG-SST.",
-        "weight": 1.0,
-        "metodo_verificacion": "La empresa define la matriz legal actualizada.",
-        "criterio": "Identificar y cumplir con la normativa legal aplicable en SST."
-    },
-    {
-        "id": "2.7.1",
-        "category": "II. HACER - Normatividad Vigente",
-        "title": "Matriz legal",
-        "description": "Debe mantenerse actualizada una matriz de requisitos legales aplicables en SST.",
-        "weight": 2.0,
-        "metodo_verificacion": "Constatar la existencia de mecanismos de comunicación interna y externa que tiene la empresa en materia de SST y comprobar que las acciones que se desarrollaron para dar respuesta a las comunicaciones recibidas son eficaces.",
-        "criterio": "Mantener una comunicación fluida sobre SST."
-    },
-    {
-        "id": "2.8.1",
-        "category": "II. HACER - Comunicación",
-        "title": "Mecanismos de comunicación, auto reporte en Sistema de Gestión de Seguridad y Salud en el Trabajo SG-SST",
-        "description": "Deben establecerse mecanismos de comunicación y auto-reporte en el SG-SST.",
-        "weight": 1.0,
-        "metodo_verificacion": "Constatar la existencia de mecanismos de comunicación interna y externa que tiene la empresa en materia de SST y comprobar que las acciones que se desarrollaron para dar respuesta a las comunicaciones recibidas son eficaces.",
-        "criterio": "Mantener una comunicación fluida sobre SST."
-    },
-    {
-        "id": "2.9.1",
-        "category": "II. HACER - Adquisiciones",
-        "title": "Identificación, evaluación, para adquisición de productos y servicios en SG-SST",
-        "description": "Se debe evaluar el impacto en SST de las adquisiciones de productos y servicios.",
-        "weight": 1.0,
-        "metodo_verificacion": "Constatar que para la selección y evaluación de proveedores y/o contratistas, se tienen en cuenta los aspectos de SST.",
-        "criterio": "Asegurar que terceros que interactúan con la empresa cumplan con estándares de SST."
-    },
-    {
-        "id": "2.10.1",
-        "category": "II. HACER - Contratación",
-        "title": "Evaluación y selección de proveedores y contratistas",
-        "description": "Debe existir un procedimiento para evaluar y seleccionar proveedores y contratistas en temas de SST.",
-        "weight": 2.0,
-        "metodo_verificacion": "Constatar que para la selección y evaluación de proveedores y/o contratistas, se tienen en cuenta los aspectos de SST.",
-        "criterio": "Asegurar que terceros que interactúan con la empresa cumplan con estándares de SST."
-    },
-    {
-        "id": "2.11.1",
-        "category": "II. HACER - Gestión del Cambio",
-        "title": "Evaluación del impacto de cambios internos y externos en el SG-SST",
-        "description": "Se debe evaluar el impacto de los cambios organizacionales en el SG-SST.",
-        "weight": 1.0,
-        "metodo_verificacion": "La empresa dispone de un sistema documental para el SG SST.",
-        "criterio": "Organizar y mantener la información del SG SST."
-    },
-    {
-        "id": "3.1.1",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Evaluación Médica Ocupacional",
-        "description": "Debe realizarse evaluación médica ocupacional según los riesgos a los que están expuestos los trabajadores.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar el documento consolidado que evidencie el cumplimiento de lo requerido en el criterio.",
-        "criterio": "Demostrar el cumplimiento de los requisitos del SG SST."
-    },
-    {
-        "id": "3.1.2",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Actividades de Promoción y Prevención en Salud",
-        "description": "Se deben implementar actividades de promoción y prevención de la salud de los trabajadores.",
-        "weight": 1.0,
-        "metodo_verificacion": "Verificar que al médico que realiza las evaluaciones ocupacionales, se le remitieron los soportes documentales respecto de los perfiles del cargo, descripción de las tareas y el medio en el cual desarrollará la labor los trabajadores.",
-        "criterio": "Facilitar al médico la evaluación integral de la salud del trabajador."
-    },
-    {
-        "id": "3.1.3",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Información al médico de los perfiles de cargo",
-        "description": "Se debe proporcionar al médico ocupacional información sobre los perfiles de cargo y exposiciones.",
-        "weight": 1.0,
-        "metodo_verificacion": "Verificar que al médico que realiza las evaluaciones ocupacionales, se le remitieron los soportes documentales respecto de los perfiles del cargo, descripción de las tareas y el medio en el cual desarrollará la labor los trabajadores.",
-        "criterio": "Facilitar al médico la evaluación integral de la salud del trabajador."
-    },
-    {
-        "id": "3.1.4",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Realización de los exámenes médicos ocupacionales: preingreso, periódicos",
-        "description": "Deben realizarse exámenes médicos de preingreso, periódicos, de retiro y post-incapacidad.",
-        "weight": 1.0,
-        "metodo_verificacion": "Evidenciar los soportes que demuestren que la custodia de las historias clínicas esté a cargo de una institución prestadora de servicios en SST o del médico que practica los exámenes laborales en la empresa.",
-        "criterio": "Garantizar la confidencialidad y seguridad de la información médica."
-    },
-    {
-        "id": "3.1.5",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Custodia de Historias Clínicas",
-        "description": "Las historias clínicas ocupacionales deben custodiarse garantizando confidencialidad.",
-        "weight": 1.0,
-        "metodo_verificacion": "Evidenciar los soportes que demuestren que la custodia de las historias clínicas esté a cargo de una institución prestadora de servicios en SST o del médico que practica los exámenes laborales en la empresa.",
-        "criterio": "Garantizar la confidencialidad y seguridad de la información médica."
-    },
-    {
-        "id": "3.1.6",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Restricciones y recomendaciones médico laborales",
-        "description": "Se deben implementar las restricciones y recomendaciones médico-laborales.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar documento de recomendaciones y restricciones a trabajadores y revisar que la empresa ha acatado todas las recomendaciones y restricciones médico-laborales prescritas a todos los trabajadores.",
-        "criterio": "Implementar las medidas necesarias para proteger la salud de los trabajadores."
-    },
-    {
-        "id": "3.1.7",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Estilos de vida y entornos saludables (controles tabaquismo, alcoholismo, farmacodependencia y otros)",
-        "description": "Deben implementarse programas de estilos de vida saludable y prevención de adicciones.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar el programa respectivo y los documentos y registros que evidencien el cumplimiento del mismo.",
-        "criterio": "Gestionar y ejecutar actividades para la salud de los trabajadores."
-    },
-    {
-        "id": "3.1.8",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Agua potable, servicios sanitarios y disposición de basuras",
-        "description": "Se debe garantizar agua potable, servicios sanitarios adecuados y disposición de residuos.",
-        "weight": 1.0,
-        "metodo_verificacion": "Mediante observación directa, verificar si se cumple lo que se exige en el criterio, dejando prueba fotográfica o fílmica al respecto.",
-        "criterio": "Asegurar condiciones básicas de higiene y salubridad en el lugar de trabajo."
-    },
-    {
-        "id": "3.1.9",
-        "category": "II. HACER - Condiciones de Salud",
-        "title": "Eliminación adecuada de residuos sólidos, líquidos o gaseosos",
-        "description": "Debe existir un programa de gestión integral de residuos sólidos, líquidos y gaseosos.",
-        "weight": 1.0,
-        "metodo_verificacion": "Mediante observación directa, constatar las evidencias en las que se dé cuenta de los procesos de eliminación de residuos conforme al criterio y solicitar contrato de empresa que elimina y dispone de los residuos peligrosos.",
-        "criterio": "Prevenir riesgos para la salud y el medio ambiente por manejo de residuos."
-    },
-    {
-        "id": "3.2.1",
-        "category": "II. HACER - Registro/Reporte/Investigación",
-        "title": "Reporte de los accidentes de trabajo y enfermedad laboral a la ARL, EPS y Dirección Territorial",
-        "description": "Todo accidente de trabajo y enfermedad laboral debe reportarse a las entidades competentes.",
-        "weight": 2.0,
-        "metodo_verificacion": "Realizar un muestreo del reporte de registro de accidente de trabajo (Furat) y el registro de enfermedades laborales (Furel) respectivo, verificando si el reporte se hizo dentro de los dos (2) días hábiles siguientes al evento.",
-        "criterio": "Asegurar el reporte oportuno de los eventos laborales."
-    },
-    {
-        "id": "3.2.2",
-        "category": "II. HACER - Registro/Reporte/Investigación",
-        "title": "Investigación de Accidentes, Incidentes y Enfermedad Laboral",
-        "description": "Se deben investigar todos los accidentes, incidentes y enfermedades laborales.",
-        "weight": 2.0,
-        "metodo_verificacion": "La empresa investiga todos los accidentes e incidentes de trabajo y las enfermedades cuando sean diagnosticadas como laborales, determinando las causas básicas e inmediatas.",
-        "criterio": "Identificar las causas raíz y prevenir la recurrencia de eventos."
-    },
-    {
-        "id": "3.2.3",
-        "category": "II. HACER - Registro/Reporte/Investigación",
-        "title": "Registro y análisis estadístico de Incidentes, Accidentes de Trabajo y Enfermedad Laboral",
-        "description": "Debe llevarse registro y análisis estadístico de incidentes, accidentes y enfermedades laborales.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar el registro estadístico actualizado de lo corrido del año y el año inmediatamente anterior al de la visita, así como la evidencia que contiene el análisis y las conclusiones derivadas.",
-        "criterio": "Monitorear la siniestralidad y utilizar los datos para la mejora."
-    },
-    {
-        "id": "3.3.1",
-        "category": "II. HACER - Vigilancia Condiciones Salud",
-        "title": "Medición de la severidad de los Accidentes de Trabajo y Enfermedad Laboral",
-        "description": "Se debe medir y analizar la severidad de los accidentes de trabajo y enfermedades laborales.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar los resultados de la medición para lo corrido del año y/o el año inmediatamente anterior y constatar el comportamiento de la severidad.",
-        "criterio": "Evaluar el impacto de los accidentes en términos de tiempo perdido."
-    },
-    {
-        "id": "3.3.2",
-        "category": "II. HACER - Vigilancia Condiciones Salud",
-        "title": "Medición de la frecuencia de los Incidentes, Accidentes de Trabajo y Enfermedad Laboral",
-        "description": "Debe calcularse el índice de frecuencia de incidentes, accidentes y enfermedades laborales.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar los resultados de la medición para lo corrido del año y/o el año inmediatamente anterior y constatar el comportamiento de la frecuencia de los accidentes.",
-        "criterio": "Evaluar la cantidad de accidentes ocurridos en un periodo."
-    },
-    {
-        "id": "3.3.3",
-        "category": "II. HACER - Vigilancia Condiciones Salud",
-        "title": "Medición de la mortalidad de Accidentes de Trabajo y Enfermedad Laboral",
-        "description": "Se debe llevar registro de la mortalidad por accidentes de trabajo y enfermedad laboral.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar los resultados de la medición para lo corrido del año y/o el año inmediatamente anterior y constatar el comportamiento de la mortalidad.",
-        "criterio": "Evaluar las fatalidades causadas por accidentes laborales."
-    },
-    {
-        "id": "3.3.4",
-        "category": "II. HACER - Vigilancia Condiciones Salud",
-        "title": "Medición de la prevalencia de incidentes, Accidentes de Trabajo y Enfermedad Laboral",
-        "description": "Debe medirse la prevalencia de incidentes, accidentes y enfermedades laborales.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar los resultados de la medición para lo corrido del año y/o el año inmediatamente anterior y constatar el comportamiento de la prevalencia de las enfermedades laborales.",
-        "criterio": "Evaluar la proporción de casos existentes de enfermedades laborales en un momento dado."
-    },
-    {
-        "id": "3.3.5",
-        "category": "II. HACER - Vigilancia Condiciones Salud",
-        "title": "Medición de la incidencia de Incidentes, Accidentes de Trabajo y Enfermedad Laboral",
-        "description": "Se debe calcular la incidencia de incidentes, accidentes y enfermedades laborales.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar los resultados de la medición para lo corrido del año y/o el año inmediatamente anterior y constatar el comportamiento de la incidencia de las enfermedades laborales.",
-        "criterio": "Evaluar la tasa de nuevos casos de enfermedades laborales en un periodo."
-    },
-    {
-        "id": "3.3.6",
-        "category": "II. HACER - Vigilancia Condiciones Salud",
-        "title": "Medición del ausentismo por incidentes, Accidentes de Trabajo y Enfermedad Laboral",
-        "description": "Debe medirse y analizarse el ausentismo relacionado con SST.",
-        "weight": 1.0,
-        "metodo_verificacion": "Solicitar los resultados de la medición para lo corrido del año y/o el año inmediatamente anterior y constatar el comportamiento del ausentismo.",
-        "criterio": "Evaluar el impacto del ausentismo en la productividad y la salud."
-    },
-    {
-        "id": "4.1.1",
-        "category": "II. HACER - Identificación Peligros y Riesgos",
-        "title": "Metodología para la identificación, evaluación y valoración de peligros",
-        "description": "Debe adoptarse una metodología sistemática para identificar, evaluar y valorar peligros (ej: GTC 45).",
-        "weight": 4.0,
-        "metodo_verificacion": "Verificar que se realiza la identificación de peligros, evaluación y valoración de los riesgos conforme a la metodología definida.",
-        "criterio": "Proceso sistemático para reconocer y cuantificar los riesgos."
-    },
-    {
-        "id": "4.1.2",
-        "category": "II. HACER - Identificación Peligros y Riesgos",
-        "title": "Identificación de peligros con participación de todos los niveles de la empresa",
-        "description": "La identificación de peligros debe hacerse con participación de todos los niveles.",
-        "weight": 4.0,
-        "metodo_verificacion": "La identificación de peligros se desarrolló con la participación de trabajadores de todos los niveles y es actualizada como mínimo una vez al año.",
-        "criterio": "Asegurar que la evaluación de riesgos se mantenga vigente y actualizada."
-    },
-    {
-        "id": "4.1.3",
-        "category": "II. HACER - Identificación Peligros y Riesgos",
-        "title": "Identificación y priorización de la naturaleza de los peligros (Metodología adicional, cancerígenos y otros)",
-        "description": "Deben identificarse y priorizarse peligros especiales como cancerígenos.",
-        "weight": 3.0,
-        "metodo_verificacion": "Verificar los soportes documentales de las mediciones ambientales realizadas y la remisión de estos resultados al COPASST o al Vigía de SST.",
-        "criterio": "Cuantificar la exposición a riesgos ambientales."
-    },
-    {
-        "id": "4.1.4",
-        "category": "II. HACER - Identificación Peligros y Riesgos",
-        "title": "Realización mediciones ambientales, químicos, físicos y biológicos",
-        "description": "Se deben realizar mediciones higiénicas de agentes químicos, físicos y biológicos según exposición.",
-        "weight": 4.0,
-        "metodo_verificacion": "Verificar los soportes documentales de las mediciones ambientales realizadas y la remisión de estos resultados al COPASST o al Vigía de SST.",
-        "criterio": "Cuantificar la exposición a riesgos ambientales."
-    },
-    {
-        "id": "4.2.1",
-        "category": "II. HACER - Medidas Prevención y Control",
-        "title": "Se implementan las medidas de prevención y control de peligros",
-        "description": "Deben implementarse controles siguiendo la jerarquía: eliminación, sustitución, ingeniería, administrativos, EPP.",
-        "weight": 2.5,
-        "metodo_verificacion": "Se implementan las medidas de prevención y control con base en el resultado de la identificación de peligros, acorde con el esquema de jerarquización.",
-        "criterio": "Aplicar medidas para eliminar o minimizar los riesgos."
-    },
-    {
-        "id": "4.2.2",
-        "category": "II. HACER - Medidas Prevención y Control",
-        "title": "Se verifica aplicación de las medidas de prevención y control",
-        "description": "Se debe verificar periódicamente la efectividad de las medidas de control implementadas.",
-        "weight": 2.5,
-        "metodo_verificacion": "Se verifica la aplicación por parte de los trabajadores de las medidas de prevención y control de los peligros/riesgos.",
-        "criterio": "Asegurar que los trabajadores siguen las directrices de seguridad."
-    },
-    {
-        "id": "4.2.3",
-        "category": "II. HACER - Medidas Prevención y Control",
-        "title": "Hay procedimientos, instructivos, fichas, protocolos",
-        "description": "Deben existir procedimientos, instructivos y protocolos de trabajo seguro documentados.",
-        "weight": 2.5,
-        "metodo_verificacion": "Solicitar los procedimientos, instructivos, fichas técnicas cuando aplique y protocolos de SST.",
-        "criterio": "Establecer un marco estructurado para la gestión de la seguridad."
-    },
-    {
-        "id": "4.2.4",
-        "category": "II. HACER - Medidas Prevención y Control",
-        "title": "Inspección con el COPASST o Vigía",
-        "description": "El COPASST o Vigía debe realizar inspecciones periódicas de seguridad.",
-        "weight": 2.5,
-        "metodo_verificacion": "Solicitar la evidencia de las inspecciones realizadas a las instalaciones, maquinaria y equipos, incluidos los relacionados con la prevención y atención de emergencias.",
-        "criterio": "Identificar condiciones inseguras y prevenir incidentes."
-    },
-    {
-        "id": "4.2.5",
-        "category": "II. HACER - Medidas Prevención y Control",
-        "title": "Mantenimiento periódico de instalaciones, equipos, máquinas, herramientas",
-        "description": "Debe existir programa de mantenimiento preventivo y correctivo de equipos e instalaciones.",
-        "weight": 2.5,
-        "metodo_verificacion": "Solicitar la evidencia del mantenimiento preventivo y/o correctivo en las instalaciones, equipos y herramientas de acuerdo con los manuales de uso.",
-        "criterio": "Garantizar el buen estado y funcionamiento de los elementos de trabajo."
-    },
-    {
-        "id": "4.2.6",
-        "category": "II. HACER - Medidas Prevención y Control",
-        "title": "Entrega de Elementos de Protección Personal EPP, se verifica con contratistas y subcontratistas",
-        "description": "Se debe entregar, capacitar y verificar uso de EPP, incluyendo contratistas.",
-        "weight": 2.5,
-        "metodo_verificacion": "Solicitar los soportes que evidencien la entrega y reposición de los Elementos de Protección Personal a los trabajadores. Verificar los soportes que evidencien la realización de la capacitación en el uso de los EPP.",
-        "criterio": "Proteger a los trabajadores de riesgos residuales mediante el uso de EPP."
-    },
-    {
-        "id": "5.1.1",
-        "category": "II. HACER - Plan de Emergencias",
-        "title": "Se cuenta con el Plan de Prevención y Preparación ante emergencias",
-        "description": "Debe existir un plan de prevención, preparación y respuesta ante emergencias documentado.",
-        "weight": 5.0,
-        "metodo_verificacion": "Solicitar el plan de prevención, preparación y respuesta ante emergencias, constatar su divulgación. Verificar si existen los planos de las instalaciones que identifican áreas y salidas de emergencia.",
-        "criterio": "Establecer procedimientos para responder a situaciones de emergencia."
-    },
-    {
-        "id": "5.1.2",
-        "category": "II. HACER - Plan de Emergencias",
-        "title": "Brigada de prevención conformada, capacitada y dotada",
-        "description": "Debe conformarse, capacitarse y dotarse una brigada de emergencias.",
-        "weight": 5.0,
-        "metodo_verificacion": "Solicitar el documento de conformación de la brigada de prevención, preparación y respuesta ante emergencias y verificar los soportes de la capacitación y entrega de la dotación.",
-        "criterio": "Contar con personal capacitado y equipado para atender emergencias."
-    },
-    {
-        "id": "6.1.1",
-        "category": "III. VERIFICAR - Verificación SG-SST",
-        "title": "Indicadores estructura, proceso y resultado",
-        "description": "Deben definirse y medirse indicadores de estructura, proceso y resultado del SG-SST.",
-        "weight": 1.25,
-        "metodo_verificacion": "Solicitar los indicadores de estructura, proceso y resultado del SG SST que se encuentren alineados al plan estratégico de la empresa.",
-        "criterio": "Medir el desempeño y la efectividad del SG SST."
-    },
-    {
-        "id": "6.1.2",
-        "category": "III. VERIFICAR - Verificación SG-SST",
-        "title": "La empresa adelanta auditoría por lo menos una vez al año",
-        "description": "Debe realizarse auditoría interna del SG-SST al menos una vez al año.",
-        "weight": 1.25,
-        "metodo_verificacion": "Solicitar el programa de la auditoría, el alcance, la periodicidad, la metodología y la presentación de informes y verificar que se haya planificado con la participación del COPASST o Vigía de SST.",
-        "criterio": "Evaluar el cumplimiento y la eficacia del SG SST."
-    },
-    {
-        "id": "6.1.3",
-        "category": "III. VERIFICAR - Verificación SG-SST",
-        "title": "Revisión anual por la alta dirección, resultados y alcance de la auditoría",
-        "description": "La alta dirección debe revisar anualmente el SG-SST y los resultados de la auditoría.",
-        "weight": 1.25,
-        "metodo_verificacion": "Se debe solicitar a la empresa los documentos, pruebas de la realización de actividades y obligaciones establecidas en el artículo 2.2.4.6.30 del Decreto 1072/2015.",
-        "criterio": "Verificar la integralidad del SG SST según la normativa."
-    },
-    {
-        "id": "6.1.4",
-        "category": "III. VERIFICAR - Verificación SG-SST",
-        "title": "Planificar auditoría con el COPASST",
-        "description": "La planificación de la auditoría debe hacerse con participación del COPASST o Vigía.",
-        "weight": 1.25,
-        "metodo_verificacion": "Solicitar el documento donde conste la revisión anual por la Alta Dirección, así como la comunicación de los resultados al COPASST o al Vigía de SST.",
-        "criterio": "Asegurar el compromiso de la alta dirección con la mejora continua."
-    },
-    {
-        "id": "7.1.1",
-        "category": "IV. ACTUAR - Mejoramiento",
-        "title": "Definir acciones de Promoción y Prevención con base en resultados del SG-SST",
-        "description": "Se deben definir acciones de mejora con base en los resultados del SG-SST.",
-        "weight": 2.5,
-        "metodo_verificacion": "Solicitar la evidencia documental de la implementación de las acciones preventivas y/o correctivas provenientes de los resultados y/o recomendaciones.",
-        "criterio": "Corregir deficiencias y mejorar el desempeño del SG SST."
-    },
-    {
-        "id": "7.1.2",
-        "category": "IV. ACTUAR - Mejoramiento",
-        "title": "Toma de medidas correctivas, preventivas y de mejora",
-        "description": "Deben implementarse acciones correctivas, preventivas y de mejora identificadas.",
-        "weight": 2.5,
-        "metodo_verificacion": "Solicitar la evidencia documental de las acciones correctivas, preventivas y/o de mejora que se implementaron según lo detectado en la revisión por la Alta Dirección.",
-        "criterio": "Implementar mejoras ante la ineficacia de las medidas de control."
-    },
-    {
-        "id": "7.1.3",
-        "category": "IV. ACTUAR - Mejoramiento",
-        "title": "Ejecución de acciones preventivas, correctivas y de mejora de la investigación de incidentes, accidentes y enfermedad laboral",
-        "description": "Las acciones derivadas de investigaciones deben implementarse y verificarse.",
-        "weight": 2.5,
-        "metodo_verificacion": "Solicitar la evidencia documental de las acciones preventivas, correctivas y/o de mejora planteadas como resultado de las investigaciones y verificar si han sido efectivas.",
-        "criterio": "Aplicar lecciones aprendidas de incidentes y accidentes."
-    },
-    {
-        "id": "7.1.4",
-        "category": "IV. ACTUAR - Mejoramiento",
-        "title": "Implementar medidas y acciones correctivas de autoridades y de ARL",
-        "description": "Deben implementarse las medidas ordenadas por autoridades y recomendadas por la ARL.",
-        "weight": 2.5,
-        "metodo_verificacion": "Solicitar la evidencia documental de las acciones correctivas realizadas en respuesta a los requerimientos o recomendaciones de las autoridades administrativas y ARL.",
-        "criterio": "Cumplir con las directrices y recomendaciones de entes de control."
-    }
-]
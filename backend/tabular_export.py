@@ -0,0 +1,201 @@
+"""
+Exportación tabular (CSV / XLSX) de las respuestas de auditoría.
+
+Una fila por estándar respondido. Las filas se leen de un cursor de MongoDB y
+se escriben en streaming, de modo que la memoria no crece con el número de
+auditorías: el CSV se envía por bloques de filas y el XLSX se genera como un
+ZIP en streaming con la hoja escrita incrementalmente (celdas inlineStr, sin
+tabla de cadenas compartidas).
+"""
+import codecs
+import csv
+import io
+import re
+import zipfile
+from typing import Any, AsyncIterator, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from pdf_export import ZipStreamSink
+from response_map import responses_list
+from standards_catalog import catalog_for_inspection
+
+EXPORT_COLUMNS = [
+    "empresa", "nit", "auditoria_id", "estado", "estandar_id", "categoria", "estandar",
+    "respuesta", "puntaje", "peso", "observaciones", "fecha_creacion", "fecha_cierre",
+]
+NUMERIC_COLUMNS = {"puntaje", "peso"}
+
+CURSOR_BATCH_SIZE = 200
+ROWS_PER_CHUNK = 500
+
+INSPECTION_EXPORT_PROJECTION = {
+    "_id": 0, "id": 1, "company_id": 1, "status": 1, "created_at": 1, "closed_at": 1,
+    "responses": 1, "catalog_id": 1, "catalog_version": 1,
+}
+
+# Characters that are not allowed in XML 1.0 (Excel refuses the file if present)
+_XML_ILLEGAL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+XLSX_MAX_CELL_CHARS = 32767
+
+# Spreadsheet apps evaluate CSV cells starting with these as formulas
+_CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+async def iter_response_rows(db, query: Dict[str, Any]) -> AsyncIterator[List[Any]]:
+    """Yield one row (in EXPORT_COLUMNS order) per answered standard of the matching inspections"""
+    companies: Dict[str, Optional[Dict[str, Any]]] = {}
+    cursor = db.inspections.find(query, INSPECTION_EXPORT_PROJECTION).sort("created_at", 1).batch_size(CURSOR_BATCH_SIZE)
+    async for inspection in cursor:
+        company_id = inspection.get('company_id')
+        if company_id not in companies:
+            companies[company_id] = await db.companies.find_one(
+                {"id": company_id}, {"_id": 0, "company_name": 1, "nit": 1}
+            )
+        company = companies[company_id] or {}
+
+        catalog = catalog_for_inspection(inspection)
+        for response in responses_list(inspection):
+            if not response.get('response'):
+                continue
+            standard = catalog.by_id.get(response.get('standard_id'), {})
+            yield [
+                company.get('company_name', ''),
+                company.get('nit', ''),
+                inspection['id'],
+                inspection.get('status', ''),
+                response.get('standard_id', ''),
+                standard.get('category', ''),
+                standard.get('title', ''),
+                response['response'],
+                response.get('score', 0),
+                standard.get('weight', 0),
+                response.get('observations') or '',
+                str(inspection.get('created_at') or ''),
+                inspection.get('closed_at') or '',
+            ]
+
+
+def _csv_safe(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith(_CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+async def stream_csv(rows: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    """UTF-8 CSV with BOM (so Excel detects the encoding), flushed every ROWS_PER_CHUNK rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield codecs.BOM_UTF8 + buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+
+    count = 0
+    async for row in rows:
+        writer.writerow([_csv_safe(value) for value in row])
+        count += 1
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+# ====================
+# XLSX
+# ====================
+
+XLSX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+
+XLSX_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+XLSX_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Respuestas" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+XLSX_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+# Style 0: default, style 1: bold (header row)
+XLSX_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>
+</styleSheet>"""
+
+XLSX_SHEET_HEADER = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<sheetData>"""
+
+XLSX_SHEET_FOOTER = "</sheetData></worksheet>"
+
+
+def _xlsx_text_cell(value: Any, style: int = 0) -> str:
+    text = _XML_ILLEGAL_RE.sub("", str(value))[:XLSX_MAX_CELL_CHARS]
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _xlsx_row(index: int, row: List[Any], columns: List[str] = EXPORT_COLUMNS) -> str:
+    cells = []
+    for column, value in zip(columns, row):
+        if column in NUMERIC_COLUMNS and isinstance(value, (int, float)):
+            cells.append(f"<c><v>{value}</v></c>")
+        else:
+            cells.append(_xlsx_text_cell(value))
+    return f'<row r="{index}">{"".join(cells)}</row>'
+
+
+async def stream_xlsx(rows: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    """Single-sheet workbook written as a streaming ZIP (the sheet part is written row by row)"""
+    sink = ZipStreamSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+    archive.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+    archive.writestr("_rels/.rels", XLSX_ROOT_RELS)
+    archive.writestr("xl/workbook.xml", XLSX_WORKBOOK)
+    archive.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+    archive.writestr("xl/styles.xml", XLSX_STYLES)
+
+    with archive.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True) as sheet:
+        header = "".join(_xlsx_text_cell(column, style=1) for column in EXPORT_COLUMNS)
+        sheet.write((XLSX_SHEET_HEADER + f'<row r="1">{header}</row>').encode("utf-8"))
+
+        index = 1
+        pending = []
+        async for row in rows:
+            index += 1
+            pending.append(_xlsx_row(index, row))
+            if len(pending) >= ROWS_PER_CHUNK:
+                sheet.write("".join(pending).encode("utf-8"))
+                pending.clear()
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        sheet.write(("".join(pending) + XLSX_SHEET_FOOTER).encode("utf-8"))
+
+    archive.close()
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", stream_csv),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", stream_xlsx),
+}
@@ -0,0 +1,219 @@
+"""
+Trazas ligeras por petición.
+
+Cada petición abre un span raíz; las etapas (MongoDB, LLM, Storage, correo,
+PDF) abren spans hijos con `span()`. Al terminar, la traza se resume en la
+cabecera `Server-Timing` y, si TRACE_EXPORT_FILE está definido, se exporta como
+una línea OTLP/JSON a ese archivo.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from pymongo import monitoring
+
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "auditx-backend")
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE")
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                 start_ns: Optional[int] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def end(self, end_ns: Optional[int] = None):
+        self.end_ns = end_ns or time.time_ns()
+        self.trace.spans.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1_000_000
+
+
+class Trace:
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("auditx_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("auditx_span", default=None)
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Open a child span of the current one; a no-op outside a traced request"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(trace, name, parent.span_id if parent else None, kind, attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = str(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def server_timing(trace: Trace, root: Span) -> str:
+    """Summarize child spans by stage (the name prefix before the first dot)"""
+    stages: Dict[str, List[float]] = {}
+    for s in trace.spans:
+        if s is root:
+            continue
+        stages.setdefault(s.name.split(".", 1)[0], []).append(s.duration_ms)
+
+    parts = [f'{stage};dur={sum(durations):.1f};desc="{stage} x{len(durations)}"' for stage, durations in stages.items()]
+    parts.append(f"total;dur={root.duration_ms:.1f}")
+    return ", ".join(parts)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp_json(trace: Trace) -> Dict[str, Any]:
+    spans = []
+    for s in trace.spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            otlp_span["parentSpanId"] = s.parent_id
+        spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "auditx.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+_export_lock = threading.Lock()
+
+
+def export_trace(trace: Trace):
+    """Append the trace as one OTLP/JSON line to TRACE_EXPORT_FILE"""
+    try:
+        line = json.dumps(to_otlp_json(trace), ensure_ascii=False)
+        with _export_lock, open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except Exception as e:
+        logging.error(f"Error exporting trace {trace.trace_id}: {e}")
+
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """
+    pymongo command listener that records each command as a child span.
+    Motor copies contextvars into its executor threads, so the request's
+    trace is visible here.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        parent = _current_span.get()
+        target = event.command.get(event.command_name)
+        self._pending[(event.connection_id, event.request_id)] = Span(
+            trace,
+            f"db.{event.command_name}",
+            parent.span_id if parent else None,
+            SPAN_KIND_CLIENT,
+            attributes={
+                "db.system": "mongodb",
+                "db.operation": event.command_name,
+                "db.mongodb.collection": target if isinstance(target, str) else event.command.get("collection", "-"),
+            },
+        )
+
+    def _finish(self, event, error: Optional[str] = None):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is not None:
+            pending.error = error
+            pending.end(pending.start_ns + event.duration_micros * 1000)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, str(event.failure))
+
+
+async def tracing_middleware(request: Request, call_next):
+    trace_id = None
+    match = TRACEPARENT_RE.match(request.headers.get("traceparent", ""))
+    if match:
+        trace_id = match.group(1)
+
+    trace = Trace(trace_id)
+    root = Span(trace, f"{request.method} {request.url.path}", match.group(2) if match else None, SPAN_KIND_SERVER,
+                attributes={"http.method": request.method, "http.target": request.url.path})
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(root)
+    try:
+        response = await call_next(request)
+        root.attributes["http.status_code"] = response.status_code
+    except Exception as e:
+        root.error = str(e)
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        route = request.scope.get("route")
+        if getattr(route, "path", None):
+            root.name = f"{request.method} {route.path}"
+            root.attributes["http.route"] = route.path
+        root.end()
+        if TRACE_EXPORT_FILE:
+            asyncio.get_running_loop().run_in_executor(None, export_trace, trace)
+
+    response.headers["Server-Timing"] = server_timing(trace, root)
+    return response
@@ -0,0 +1,208 @@
+"""
+Entrega de /uploads pensada para cachés de navegador y CDN.
+
+Sustituye al StaticFiles plano:
+- Las rutas direccionadas por contenido (`logos/sha256/ab/<sha>.<ext>`, ver
+  object_storage.py) no cambian nunca de contenido: se sirven con
+  `Cache-Control: immutable` de un año y el SHA-256 como ETag fuerte.
+- Los archivos anteriores (nombres UUID) llevan un ETag fuerte calculado una
+  vez por archivo y una vida de caché corta con revalidación.
+- If-None-Match responde 304 y Range / If-Range se atienden con 206, así que
+  las descargas cortadas se reanudan en lugar de repetirse.
+- `?w=<ancho>` entrega una versión reducida de la imagen (anchos fijos en
+  VARIANT_WIDTHS, redondeando hacia arriba), generada la primera vez y
+  guardada en una caché de disco.
+
+UPLOAD_VARIANTS_DIR / UPLOAD_VARIANTS_MAX_MB: ubicación y tamaño máximo de la caché de variantes
+"""
+import asyncio
+import io
+import mimetypes
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from fastapi import APIRouter, Request
+from fastapi.responses import Response, StreamingResponse
+
+from cache import DiskCache
+from http_cache import etag_matches
+from metrics import CACHE_LOOKUPS
+from object_storage import CAS_PREFIX, InvalidObjectKey, LocalBackend, file_sha256
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=86400, must-revalidate"
+VARIANT_WIDTHS = (64, 128, 256, 512, 1024)
+VARIANT_FORMATS = {"image/jpeg": "JPEG", "image/png": "PNG", "image/webp": "WEBP"}
+HIDDEN_SUFFIXES = (".type", ".part", ".tmp")
+STREAM_BLOCK_SIZE = 64 * 1024
+ETAG_MEMO_SIZE = 4096
+
+router = APIRouter()
+uploads = LocalBackend()
+
+# Resized images are derived from immutable content, so keys never need invalidation
+variant_cache = DiskCache(
+    os.getenv("UPLOAD_VARIANTS_DIR", os.path.join(tempfile.gettempdir(), "auditx-upload-variants")),
+    int(os.getenv("UPLOAD_VARIANTS_MAX_MB", "200")) * 1024 * 1024,
+    suffix=".img",
+)
+
+# Strong ETags of legacy (non content-addressed) files by (path, mtime, size)
+_etag_memo: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def content_hash(key: str) -> Optional[str]:
+    """SHA-256 encoded in a content-addressed key, None for other keys"""
+    if not key.startswith(CAS_PREFIX):
+        return None
+    digest = Path(key).stem
+    return digest if len(digest) == 64 and all(c in "0123456789abcdef" for c in digest) else None
+
+
+def _file_etag(path: Path, stat: os.stat_result) -> str:
+    memo_key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _etag_lock:
+        etag = _etag_memo.get(memo_key)
+        if etag is not None:
+            _etag_memo.move_to_end(memo_key)
+            return etag
+    etag = f'"{file_sha256(path)}"'
+    with _etag_lock:
+        _etag_memo[memo_key] = etag
+        if len(_etag_memo) > ETAG_MEMO_SIZE:
+            _etag_memo.popitem(last=False)
+    return etag
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Single byte range of a Range header as (start, end) inclusive. None means
+    serve the whole body (no header, or several ranges); ValueError means the
+    range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _iter_file(path: Path, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as source:
+        source.seek(start)
+        while length > 0:
+            block = source.read(min(STREAM_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _render_variant(path: Path, width: int, content_type: str) -> bytes:
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((width, width * 4))
+        if VARIANT_FORMATS[content_type] == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, VARIANT_FORMATS[content_type], quality=85, optimize=True)
+        return out.getvalue()
+
+
+def variant_width(requested: Optional[str]) -> Optional[int]:
+    """Smallest standard width covering the requested one (the largest if it is bigger)"""
+    if not requested:
+        return None
+    try:
+        value = int(requested)
+    except ValueError:
+        return None
+    if value <= 0:
+        return None
+    return next((w for w in VARIANT_WIDTHS if w >= value), VARIANT_WIDTHS[-1])
+
+
+def _ranged_response(request: Request, etag: str, size: int, headers: dict, full, part) -> Response:
+    """Apply Range / If-Range to a body of `size` bytes; `full()` and `part(start, length)` build the body"""
+    if_range = request.headers.get("if-range")
+    byte_range = None
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return full({**headers, "Content-Length": str(size)})
+    start, end = byte_range
+    return part(start, end - start + 1, {
+        **headers,
+        "Content-Range": f"bytes {start}-{end}/{size}",
+        "Content-Length": str(end - start + 1),
+    })
+
+
+@router.api_route("/uploads/{key:path}", methods=["GET", "HEAD"])
+async def serve_upload(key: str, request: Request):
+    """Uploaded files with strong ETags, long-lived caching for content-addressed keys, ranges and resized variants"""
+    if any(part.startswith(".") for part in key.split("/")) or key.endswith(HIDDEN_SUFFIXES):
+        return Response(status_code=404)
+    try:
+        path = uploads.path(key)
+        stat = await asyncio.to_thread(path.stat)
+    except (InvalidObjectKey, FileNotFoundError, NotADirectoryError):
+        return Response(status_code=404)
+    if not path.is_file():
+        return Response(status_code=404)
+
+    content_type = uploads.content_type(key) or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    sha256 = content_hash(key)
+    etag = f'"{sha256}"' if sha256 else await asyncio.to_thread(_file_etag, path, stat)
+    cache_control = IMMUTABLE_CACHE_CONTROL if sha256 else MUTABLE_CACHE_CONTROL
+
+    width = variant_width(request.query_params.get("w")) if content_type in VARIANT_FORMATS else None
+    if width:
+        etag = f'{etag[:-1]}-w{width}"'
+
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if width:
+        cache_key = f"variant:{etag}"
+        data = await variant_cache.get(cache_key)
+        if data is None:
+            CACHE_LOOKUPS.labels("upload_variant", "miss").inc()
+            data = await asyncio.to_thread(_render_variant, path, width, content_type)
+            await variant_cache.set(cache_key, data)
+        else:
+            CACHE_LOOKUPS.labels("upload_variant", "hit_local").inc()
+        return _ranged_response(
+            request, etag, len(data), headers,
+            lambda h: Response(content=data, media_type=content_type, headers=h),
+            lambda start, length, h: Response(content=data[start:start + length], status_code=206,
+                                              media_type=content_type, headers=h),
+        )
+
+    return _ranged_response(
+        request, etag, stat.st_size, headers,
+        lambda h: StreamingResponse(_iter_file(path, 0, stat.st_size), media_type=content_type, headers=h),
+        lambda start, length, h: StreamingResponse(_iter_file(path, start, length), status_code=206,
+                                                   media_type=content_type, headers=h),
+    )
@@ -283,7 +283,7 @@ class AuditXAPITester:
             print(f"   Answered: {answered}/{total} standards")
             
             # Verify progress calculation
-            expected_progress = (3 / 60) * 100  # 3 answered out of 60 standards
+            expected_progress = (3 / total) * 100 if total else 0  # 3 answered out of the audit's catalog
             if abs(progress - expected_progress) < 0.1:
                 print(f"   ✅ Progress calculation correct")
             else:
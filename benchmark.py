@@ -0,0 +1,211 @@
+"""
+Micro-benchmarks for the CPU-bound paths of the AuditX backend:
+
+- scoring:  scoring.score_responses (save_auditoria_progress autosaves)
+- prompts:  prompts.build_analysis_prompts (analyze-inspection)
+- pdf:      pdf_generator.generate_professional_pdf (generate-pdf)
+
+Each case runs on synthetic inspections of varying size and report length.
+Results are compared against benchmark_baseline.json at the repository root,
+recorded on the CI reference runner and committed with the code; any case
+slower than baseline * (1 + threshold) makes the run fail, and so does a
+missing baseline. The comparison uses the fastest round of each case, which
+other load on the machine disturbs least.
+
+Timings are only comparable on the machine that recorded them: the baseline
+stores its machine description and the comparison warns when it differs. CI
+should run `python benchmark.py` on that reference runner for changes to
+backend/ (exit 1 on regression, 2 without a baseline). When a slowdown is
+intended, or the runner changes, run `python benchmark.py --save-baseline`
+there and commit the new file.
+
+Usage:
+    python benchmark.py --save-baseline          # record benchmark_baseline.json
+    python benchmark.py                          # compare against it (exit 1 on regression)
+    python benchmark.py --filter pdf --threshold 0.25
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from standards_catalog import CATALOGS  # noqa: E402
+from scoring import score_responses  # noqa: E402
+from prompts import build_analysis_prompts  # noqa: E402
+
+DEFAULT_BASELINE = ROOT_DIR / "benchmark_baseline.json"
+MACHINE_KEY = "_machine"
+CATALOG = CATALOGS.default
+
+COMPANY = {
+    "id": "bench-company",
+    "company_name": "Empresa de Referencia S.A.S.",
+    "admin_name": "Administrador de Pruebas",
+    "address": "Carrera 7 # 71-21, Bogotá",
+    "phone": "6015555555",
+    "nit": "900123456-7",
+    "representante_legal": "Representante de Pruebas",
+    "arl_afiliada": "ARL Referencia",
+    "nivel_riesgo": "3",
+    "codigo_ciiu": "4290",
+    "subdivision_ciiu": "01",
+    "descripcion_actividad": "Construcción de obras de ingeniería civil",
+    "numero_trabajadores": 120,
+    "numero_sedes": 2,
+}
+
+REPORT_BLOCK = """## RESULTADOS POR FASE
+
+### I. PLANEAR (72.5%)
+Se evidencia la designación del responsable del SG-SST, pero la asignación de recursos no está documentada.
+- **Hallazgo**: El plan de trabajo anual no tiene cronograma.
+- *Recomendación*: Definir responsables y fechas para cada actividad.
+
+| Acción | Responsable | Plazo | Costo estimado (COP) |
+|---|---|---|---|
+| Actualizar matriz de peligros | Responsable SG-SST | 30 días | 2.500.000 |
+| Capacitación del COPASST | Talento Humano | 60 días | 1.800.000 |
+
+1. Revisar la política de SST
+2. Socializar con todos los trabajadores
+   - Registrar asistencia
+"""
+
+
+def synthetic_responses(count, observation_words, rng):
+    """Raw autosave payload with `count` answers (standards repeat beyond the catalog size)"""
+    return [{
+        "standard_id": CATALOG.standards[i % len(CATALOG)]["id"],
+        "response": rng.choice(["cumple", "no_cumple", "no_aplica"]),
+        "observations": " ".join(rng.choice(["evidencia", "soporte", "registro", "acta", "pendiente"])
+                                 for _ in range(observation_words)),
+        "ai_recommendation": "",
+        "evidence_images": [],
+    } for i in range(count)]
+
+
+def synthetic_inspection(count, observation_words, rng):
+    responses, percentage, _, _ = score_responses(synthetic_responses(count, observation_words, rng), CATALOG)
+    return {"id": "bench-inspection", "company_id": COMPANY["id"], "responses": responses, "total_score": percentage,
+            **CATALOG.pin()}
+
+
+def build_cases(rng):
+    cases = {}
+    for count in (10, 30, 60, 600):
+        payload = synthetic_responses(count, 20, rng)
+        cases[f"scoring/{count}_responses"] = lambda payload=payload: score_responses(payload, CATALOG)
+
+    for count, words in ((30, 10), (60, 40), (60, 400)):
+        inspection = synthetic_inspection(count, words, rng)
+        cases[f"prompts/{count}_responses_{words}_words"] = (
+            lambda inspection=inspection: build_analysis_prompts(inspection, COMPANY)
+        )
+
+    try:
+        from pdf_generator import generate_professional_pdf
+    except ImportError as e:
+        print(f"⚠️  Skipping PDF benchmarks: {e}")
+        return cases
+
+    inspection = synthetic_inspection(60, 20, rng)
+    for blocks in (1, 10, 50):
+        analysis = {"report": "# INFORME DE EVALUACIÓN\n\n" + REPORT_BLOCK * blocks}
+
+        def render(analysis=analysis):
+            generate_professional_pdf(io.BytesIO(), COMPANY, inspection, analysis)
+
+        cases[f"pdf/report_{blocks}_blocks"] = render
+    return cases
+
+
+def measure(fn, min_time, rounds):
+    """Median seconds per call over `rounds`, each round running long enough to be measurable"""
+    fn()  # warm-up
+    start = time.perf_counter()
+    fn()
+    single = time.perf_counter() - start
+    loops = max(1, int(min_time / max(single, 1e-9)))
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "loops": loops, "rounds": rounds}
+
+
+def machine_description():
+    return {
+        "python": platform.python_version(),
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AuditX micro-benchmarks")
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown ratio (0.15 = 15%%)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    cases = {name: fn for name, fn in build_cases(random.Random(args.seed)).items() if args.filter in name}
+    results = {name: measure(fn, args.min_time, args.rounds) for name, fn in cases.items()}
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    recorded_on = baseline.get(MACHINE_KEY)
+    if recorded_on and recorded_on != machine_description() and not args.save_baseline:
+        print(f"⚠️  Baseline recorded on a different machine ({recorded_on}); timings may not be comparable")
+
+    print(f"{'CASE':<40}{'BEST':>14}{'BASELINE':>14}{'CHANGE':>10}")
+    print("=" * 78)
+    regressions = []
+    for name, result in results.items():
+        # Fastest round: the least disturbed by other load on the machine, so the steadiest to compare
+        best = result["min_s"]
+        base = baseline.get(name, {}).get("min_s")
+        change = f"{(best / base - 1) * 100:+.1f}%" if base else "-"
+        flag = ""
+        if base and best > base * (1 + args.threshold):
+            regressions.append(name)
+            flag = "  ❌"
+        base_text = f"{base * 1000:.3f} ms" if base else "-"
+        print(f"{name:<40}{best * 1000:>11.3f} ms{base_text:>14}{change:>10}{flag}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        baseline[MACHINE_KEY] = machine_description()
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+        print(f"\n💾 Baseline saved to {baseline_path}")
+        return 0
+
+    if not baseline:
+        print(f"\n❌ No baseline at {baseline_path}; record one with --save-baseline on the reference machine")
+        return 2
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
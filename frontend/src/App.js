@@ -12,6 +12,25 @@ import AuditoriaPage from "@/pages/AuditoriaPage";
 import ViewAuditoria from "@/pages/ViewAuditoria";
 import { Toaster } from "@/components/ui/sonner";
 import ErrorBoundary from "@/components/ErrorBoundary";
+import axios from "axios";
+
+// Causal consistency: echo the token returned by writes so reads served by
+// database secondaries include this session's own changes
+const CAUSAL_TOKEN_HEADER = "X-Causal-Token";
+axios.interceptors.request.use((config) => {
+  const token = sessionStorage.getItem("causalToken");
+  if (token) {
+    config.headers[CAUSAL_TOKEN_HEADER] = token;
+  }
+  return config;
+});
+axios.interceptors.response.use((response) => {
+  const token = response.headers[CAUSAL_TOKEN_HEADER.toLowerCase()];
+  if (token) {
+    sessionStorage.setItem("causalToken", token);
+  }
+  return response;
+});
 
 // Error boundary fallback
 window.addEventListener('error', (event) => {
@@ -47,6 +47,8 @@ const NormasEspecificasManager = ({ companyId }) => {
   const [editingNorma, setEditingNorma] = useState(null);
   const [saving, setSaving] = useState(false);
   const [expandedNorma, setExpandedNorma] = useState(null);
+  // Full texts are loaded on demand (the listing only carries metadata)
+  const [contenidos, setContenidos] = useState({});
 
   const [formData, setFormData] = useState({
     company_id: companyId,
@@ -100,6 +102,7 @@ const NormasEspecificasManager = ({ companyId }) => {
 
       setDialogOpen(false);
       resetForm();
+      if (editingNorma) setContenidos(prev => ({ ...prev, [editingNorma.id]: undefined }));
       fetchNormas();
     } catch (error) {
       toast.error("Error al guardar documento");
@@ -108,14 +111,44 @@ const NormasEspecificasManager = ({ companyId }) => {
     }
   };
 
-  const handleEdit = (norma) => {
+  const fetchContenido = async (normaId) => {
+    if (contenidos[normaId] !== undefined) return contenidos[normaId];
+    const token = localStorage.getItem("token");
+    const response = await axios.get(`${API}/normas-especificas/${normaId}/contenido`, {
+      headers: { Authorization: `Bearer ${token}` }
+    });
+    setContenidos(prev => ({ ...prev, [normaId]: response.data.contenido }));
+    return response.data.contenido;
+  };
+
+  const toggleContenido = async (normaId) => {
+    if (expandedNorma === normaId) {
+      setExpandedNorma(null);
+      return;
+    }
+    setExpandedNorma(normaId);
+    try {
+      await fetchContenido(normaId);
+    } catch (error) {
+      toast.error("Error al cargar el contenido");
+    }
+  };
+
+  const handleEdit = async (norma) => {
+    let contenido;
+    try {
+      contenido = await fetchContenido(norma.id);
+    } catch (error) {
+      toast.error("Error al cargar el contenido");
+      return;
+    }
     setEditingNorma(norma);
     setFormData({
       company_id: companyId,
       nombre: norma.nombre,
       tipo: norma.tipo,
       descripcion: norma.descripcion,
-      contenido: norma.contenido,
+      contenido: contenido,
       version: norma.version || "1.0"
     });
     setDialogOpen(true);
@@ -226,7 +259,7 @@ const NormasEspecificasManager = ({ companyId }) => {
                   <p className="text-sm text-gray-600 mb-2">{norma.descripcion}</p>
                 )}
                 <button
-                  onClick={() => setExpandedNorma(expandedNorma === norma.id ? null : norma.id)}
+                  onClick={() => toggleContenido(norma.id)}
                   className="flex items-center gap-1 text-sm text-blue-600 hover:text-blue-700"
                 >
                   {expandedNorma === norma.id ? (
@@ -244,7 +277,7 @@ const NormasEspecificasManager = ({ companyId }) => {
                 {expandedNorma === norma.id && (
                   <div className="mt-3 p-3 bg-gray-50 rounded-lg max-h-48 overflow-y-auto">
                     <pre className="whitespace-pre-wrap text-sm text-gray-700 font-sans">
-                      {norma.contenido}
+                      {contenidos[norma.id] ?? "Cargando..."}
                     </pre>
                   </div>
                 )}
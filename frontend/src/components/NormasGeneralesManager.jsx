@@ -54,6 +54,8 @@ const NormasGeneralesManager = () => {
   const [searchTerm, setSearchTerm] = useState("");
   const [filterCategoria, setFilterCategoria] = useState("all");
   const [expandedNorma, setExpandedNorma] = useState(null);
+  // Full texts are loaded on demand (the listing only carries metadata)
+  const [contenidos, setContenidos] = useState({});
 
   const [formData, setFormData] = useState({
     nombre: "",
@@ -104,6 +106,7 @@ const NormasGeneralesManager = () => {
 
       setDialogOpen(false);
       resetForm();
+      if (editingNorma) setContenidos(prev => ({ ...prev, [editingNorma.id]: undefined }));
       fetchNormas();
     } catch (error) {
       toast.error("Error al guardar norma");
@@ -112,13 +115,43 @@ const NormasGeneralesManager = () => {
     }
   };
 
-  const handleEdit = (norma) => {
+  const fetchContenido = async (normaId) => {
+    if (contenidos[normaId] !== undefined) return contenidos[normaId];
+    const token = localStorage.getItem("token");
+    const response = await axios.get(`${API}/normas-generales/${normaId}/contenido`, {
+      headers: { Authorization: `Bearer ${token}` }
+    });
+    setContenidos(prev => ({ ...prev, [normaId]: response.data.contenido }));
+    return response.data.contenido;
+  };
+
+  const toggleContenido = async (normaId) => {
+    if (expandedNorma === normaId) {
+      setExpandedNorma(null);
+      return;
+    }
+    setExpandedNorma(normaId);
+    try {
+      await fetchContenido(normaId);
+    } catch (error) {
+      toast.error("Error al cargar el contenido");
+    }
+  };
+
+  const handleEdit = async (norma) => {
+    let contenido;
+    try {
+      contenido = await fetchContenido(norma.id);
+    } catch (error) {
+      toast.error("Error al cargar el contenido");
+      return;
+    }
     setEditingNorma(norma);
     setFormData({
       nombre: norma.nombre,
       categoria: norma.categoria,
       descripcion: norma.descripcion,
-      contenido: norma.contenido,
+      contenido: contenido,
       fecha_expedicion: norma.fecha_expedicion || "",
       entidad_emisora: norma.entidad_emisora || ""
     });
@@ -277,7 +310,7 @@ const NormasGeneralesManager = () => {
                   <p className="text-gray-600 mb-3">{norma.descripcion}</p>
                   
                   <button
-                    onClick={() => setExpandedNorma(expandedNorma === norma.id ? null : norma.id)}
+                    onClick={() => toggleContenido(norma.id)}
                     className="flex items-center gap-2 text-sm text-purple-600 hover:text-purple-700"
                   >
                     {expandedNorma === norma.id ? (
@@ -288,7 +321,7 @@ const NormasGeneralesManager = () => {
                     ) : (
                       <>
                         <IconChevronDown className="h-4 w-4" />
-                        Ver contenido completo ({norma.contenido.length.toLocaleString()} caracteres)
+                        Ver contenido completo ({(norma.contenido_chars || 0).toLocaleString()} caracteres)
                       </>
                     )}
                   </button>
@@ -296,7 +329,7 @@ const NormasGeneralesManager = () => {
                   {expandedNorma === norma.id && (
                     <div className="mt-4 p-4 bg-gray-50 rounded-lg max-h-96 overflow-y-auto">
                       <pre className="whitespace-pre-wrap text-sm text-gray-700 font-sans">
-                        {norma.contenido}
+                        {contenidos[norma.id] ?? "Cargando..."}
                       </pre>
                     </div>
                   )}
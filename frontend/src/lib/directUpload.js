@@ -0,0 +1,97 @@
+import axios from "axios";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+
+async function sha256Hex(file) {
+  if (!window.crypto?.subtle) return null;
+  const digest = await window.crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, "0")).join("");
+}
+
+// Sube un archivo directamente al almacenamiento con un permiso firmado por la API
+// y lo registra al terminar. `target`: { kind, company_id, inspection_id, standard_id }
+export async function uploadDirect(file, target) {
+  const token = localStorage.getItem("token");
+  const auth = token ? { Authorization: `Bearer ${token}` } : {};
+
+  const { data: grant } = await axios.post(`${API}/uploads/sign`, {
+    ...target,
+    filename: file.name,
+    content_type: file.type,
+    size: file.size
+  }, { headers: auth });
+
+  await axios({
+    method: grant.method,
+    url: grant.url,
+    data: file,
+    headers: grant.headers
+  });
+
+  const { data } = await axios.post(`${API}/uploads/complete`, {
+    token: grant.token,
+    sha256: await sha256Hex(file)
+  }, { headers: auth });
+  return data;
+}
+
+// Subida por trozos a través de la API, reanudable: si la conexión se corta,
+// el siguiente intento continúa desde el último trozo confirmado. Con todos los
+// bytes confirmados, el trozo vacío reintenta el registro de la evidencia.
+// `target`: { inspection_id, standard_id }
+export async function uploadResumable(file, target = {}, maxAttempts = 5) {
+  const token = localStorage.getItem("token");
+  const auth = { Authorization: `Bearer ${token}` };
+  const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+
+  let session = null;
+  const savedId = localStorage.getItem(resumeKey);
+  if (savedId) {
+    try {
+      session = (await axios.get(`${API}/uploads/evidence/sessions/${savedId}`, { headers: auth })).data;
+      if (!["uploading", "finishing", "completed"].includes(session.status)) session = null;
+    } catch (error) {
+      session = null;
+    }
+  }
+  if (!session) {
+    session = (await axios.post(`${API}/uploads/evidence/sessions`, {
+      ...target,
+      filename: file.name,
+      content_type: file.type,
+      size: file.size
+    }, { headers: auth })).data;
+    localStorage.setItem(resumeKey, session.id);
+  }
+
+  let failures = 0;
+  while (session.status === "uploading" || session.status === "finishing") {
+    if (session.status === "finishing") {
+      // Another request is registering the file: wait for its result
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      session = (await axios.get(`${API}/uploads/evidence/sessions/${session.id}`, { headers: auth })).data;
+      continue;
+    }
+    const chunk = file.slice(session.offset, session.offset + session.chunk_size);
+    try {
+      session = (await axios.put(`${API}/uploads/evidence/sessions/${session.id}`, chunk, {
+        headers: { ...auth, "Content-Type": "application/octet-stream", "Upload-Offset": String(session.offset) }
+      })).data;
+      failures = 0;
+    } catch (error) {
+      if (error.response?.status === 409 && error.response.data?.offset !== undefined) {
+        session = error.response.data;
+        continue;
+      }
+      if (error.response && error.response.status < 500) throw error;
+      if (++failures >= maxAttempts) throw error;
+      await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+      session = (await axios.get(`${API}/uploads/evidence/sessions/${session.id}`, { headers: auth })).data;
+    }
+  }
+
+  localStorage.removeItem(resumeKey);
+  if (session.status !== "completed") throw new Error("La subida fue cancelada");
+  return session.result;
+}
@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import axios from "axios";
+import { uploadDirect } from "@/lib/directUpload";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Label } from "@/components/ui/label";
@@ -54,6 +55,8 @@ const AuditoriaPage = () => {
   const [selectedImageData, setSelectedImageData] = useState(null);
   
   const fileInputRefs = useRef({});
+  // Delta sync: server version and last saved snapshot per standard
+  const syncRef = useRef({ version: 0, saved: {} });
 
   useEffect(() => {
     fetchData();
@@ -64,11 +67,12 @@ const AuditoriaPage = () => {
       const token = localStorage.getItem("token");
       const headers = { Authorization: `Bearer ${token}` };
 
-      // Fetch auditoria, standards
-      const [auditoriaRes, standardsRes] = await Promise.all([
-        axios.get(`${API}/inspections/${auditoriaId}`, { headers }),
-        axios.get(`${API}/standards`, { headers })
-      ]);
+      // Fetch auditoria, then the catalog version it is scored against
+      const auditoriaRes = await axios.get(`${API}/inspections/${auditoriaId}`, { headers });
+      const standardsRes = await axios.get(`${API}/standards`, {
+        headers,
+        params: { catalog: auditoriaRes.data.catalog_id, version: auditoriaRes.data.catalog_version }
+      });
 
       setAuditoria(auditoriaRes.data);
       setStandards(standardsRes.data);
@@ -114,6 +118,12 @@ const AuditoriaPage = () => {
         }
       });
       setResponses(initialResponses);
+
+      const saved = {};
+      Object.entries(initialResponses).forEach(([standard_id, data]) => {
+        saved[standard_id] = JSON.stringify(syncEntry(standard_id, data, data.ai_recommendation, data.evidence_images));
+      });
+      syncRef.current = { version: auditoriaRes.data.version || 0, saved };
     } catch (error) {
       console.error("Error fetching data:", error);
       toast.error("Error al cargar la auditoría");
@@ -133,7 +143,37 @@ const AuditoriaPage = () => {
     }));
   };
 
-  // Save progress without closing
+  const syncEntry = (standard_id, data, aiRecommendation, images) => ({
+    standard_id,
+    response: data?.response || "",
+    observations: data?.observations || "",
+    ai_recommendation: aiRecommendation || "",
+    evidence_images: images || []
+  });
+
+  // Apply changes made in another session, except for standards edited locally
+  const applyServerChanges = (delta, localChanges) => {
+    const edited = new Set(localChanges.map(c => c.standard_id));
+    const incoming = [
+      ...delta.responses,
+      ...delta.removed.map(standard_id => ({ standard_id }))
+    ].filter(r => !edited.has(r.standard_id));
+
+    incoming.forEach(r => {
+      const entry = syncEntry(r.standard_id, r, r.ai_recommendation, r.evidence_images);
+      syncRef.current.saved[r.standard_id] = JSON.stringify(entry);
+      setResponses(prev => ({
+        ...prev,
+        [r.standard_id]: { response: entry.response, observations: entry.observations,
+                           ai_recommendation: entry.ai_recommendation, evidence_images: entry.evidence_images }
+      }));
+      setAiRecommendations(prev => ({ ...prev, [r.standard_id]: entry.ai_recommendation }));
+      setEvidenceImages(prev => ({ ...prev, [r.standard_id]: entry.evidence_images }));
+    });
+    syncRef.current.version = delta.version;
+  };
+
+  // Save progress without closing: only the standards changed since the last save are sent
   const handleSaveProgress = async () => {
     if (auditoria?.status === 'cerrada') {
       toast.error("La auditoría está cerrada y no se puede modificar");
@@ -143,21 +183,33 @@ const AuditoriaPage = () => {
     setSaving(true);
     try {
       const token = localStorage.getItem("token");
-      
-      const responsesArray = Object.entries(responses).map(([standard_id, data]) => ({
-        standard_id,
-        response: data.response,
-        observations: data.observations,
-        ai_recommendation: aiRecommendations[standard_id] || "",
-        evidence_images: evidenceImages[standard_id] || []
-      }));
+      const headers = { Authorization: `Bearer ${token}` };
+
+      const changes = Object.entries(responses)
+        .map(([standard_id, data]) => syncEntry(standard_id, data, aiRecommendations[standard_id], evidenceImages[standard_id]))
+        .filter(entry => JSON.stringify(entry) !== syncRef.current.saved[entry.standard_id]);
 
-      const response = await axios.put(
-        `${API}/auditorias/${auditoriaId}/save`,
-        responsesArray,
-        { headers: { Authorization: `Bearer ${token}` } }
+      const send = () => axios.patch(
+        `${API}/auditorias/${auditoriaId}/responses`,
+        { base_version: syncRef.current.version, responses: changes },
+        { headers }
       );
 
+      let response;
+      try {
+        response = await send();
+      } catch (error) {
+        // Someone else saved in between: merge their changes and retry once on top of them
+        if (error.response?.status !== 409) throw error;
+        applyServerChanges(error.response.data.detail, changes);
+        response = await send();
+      }
+
+      changes.forEach(entry => {
+        syncRef.current.saved[entry.standard_id] = JSON.stringify(entry);
+      });
+      syncRef.current.version = response.data.version;
+
       toast.success(`Progreso guardado. ${response.data.answered} de ${response.data.total} estándares completados.`);
     } catch (error) {
       console.error("Error saving:", error);
@@ -237,18 +289,14 @@ const AuditoriaPage = () => {
     try {
       const token = localStorage.getItem("token");
       
-      // Upload image
-      const formData = new FormData();
-      formData.append('file', file);
-      
-      const uploadResponse = await axios.post(`${API}/upload-evidence`, formData, {
-        headers: { 
-          Authorization: `Bearer ${token}`,
-          'Content-Type': 'multipart/form-data'
-        }
+      // Upload image straight to storage
+      const uploaded = await uploadDirect(file, {
+        kind: "evidence",
+        inspection_id: auditoriaId,
+        standard_id: standard.id
       });
 
-      const imageUrl = uploadResponse.data.url;
+      const imageUrl = uploaded.url;
 
       // Convert to base64 for AI analysis
       const base64 = await fileToBase64(file);
@@ -14,6 +14,7 @@ import { toast } from "sonner";
 import { IconShield, IconPlus, IconLogOut, IconFileText, IconCalendar, IconTrendingUp, IconEye, IconBuilding, IconMapPin, IconUsers, IconEdit, IconX, IconSettings, IconBookOpen, IconLock, IconTrash, IconAlertTriangle, IconBarChart } from "@/components/SafeIcons";
 import ConfiguracionAuditoriaWizard from "@/components/ConfiguracionAuditoriaWizard";
 import NormasEspecificasManager from "@/components/NormasEspecificasManager";
+import { uploadDirect } from "@/lib/directUpload";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -113,19 +114,10 @@ const ClientDashboard = () => {
 
     try {
       setUploadingLogo(true);
-      const formData = new FormData();
-      formData.append("file", file);
+      const uploaded = await uploadDirect(file, { kind: "logo" });
 
-      const token = localStorage.getItem("token");
-      const response = await axios.post(`${API}/upload-logo`, formData, {
-        headers: {
-          "Content-Type": "multipart/form-data",
-          Authorization: `Bearer ${token}`
-        }
-      });
-
-      setEditFormData(prev => ({ ...prev, logo_url: response.data.logo_url }));
-      setLogoPreview(response.data.logo_url);
+      setEditFormData(prev => ({ ...prev, logo_url: uploaded.logo_url }));
+      setLogoPreview(uploaded.logo_url);
       toast.success("Logo subido exitosamente");
     } catch (error) {
       toast.error("Error al subir logo");
@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from "react";
 import { useNavigate, useSearchParams } from "react-router-dom";
 import axios from "axios";
+import { uploadResumable } from "@/lib/directUpload";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Label } from "@/components/ui/label";
@@ -70,17 +71,43 @@ const CreateInspection = () => {
     }
   }, [selectedCompany, companies]);
 
+  // El catálogo de estándares depende de la empresa (tamaño, riesgo o catálogo propio)
+  useEffect(() => {
+    if (selectedCompany) {
+      fetchStandards(selectedCompany);
+    }
+  }, [selectedCompany]);
+
+  const fetchStandards = async (companyId) => {
+    try {
+      const token = localStorage.getItem("token");
+      const standardsRes = await axios.get(`${API}/standards`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { company_id: companyId }
+      });
+      setStandards(standardsRes.data);
+
+      const initialResponses = {};
+      standardsRes.data.forEach(standard => {
+        initialResponses[standard.id] = {
+          response: "",
+          observations: "",
+          ai_recommendation: "",
+          evidence_images: []
+        };
+      });
+      setResponses(initialResponses);
+    } catch (error) {
+      toast.error("Error al cargar los estándares");
+    }
+  };
+
   const fetchData = async () => {
     try {
       const token = localStorage.getItem("token");
       const headers = { Authorization: `Bearer ${token}` };
 
-      const [standardsRes, companiesRes] = await Promise.all([
-        axios.get(`${API}/standards`, { headers }),
-        axios.get(`${API}/my-companies`, { headers })
-      ]);
-
-      setStandards(standardsRes.data);
+      const companiesRes = await axios.get(`${API}/my-companies`, { headers });
       
       const userCompanies = companiesRes.data.filter(c => c.is_active);
       setCompanies(userCompanies);
@@ -103,17 +130,6 @@ const CreateInspection = () => {
           console.error("Error loading audit config:", err);
         }
       }
-
-      const initialResponses = {};
-      standardsRes.data.forEach(standard => {
-        initialResponses[standard.id] = {
-          response: "",
-          observations: "",
-          ai_recommendation: "",
-          evidence_images: []
-        };
-      });
-      setResponses(initialResponses);
     } catch (error) {
       toast.error("Error al cargar datos");
     } finally {
@@ -204,18 +220,10 @@ const CreateInspection = () => {
       try {
         const token = localStorage.getItem("token");
         
-        // Upload image to Firebase
-        const formData = new FormData();
-        formData.append('file', file);
-        
-        const uploadResponse = await axios.post(`${API}/upload-evidence`, formData, {
-          headers: { 
-            Authorization: `Bearer ${token}`,
-            'Content-Type': 'multipart/form-data'
-          }
-        });
+        // Upload image in resumable chunks (survives dropped mobile connections)
+        const uploaded = await uploadResumable(file, { standard_id: standard.id });
 
-        const imageUrl = uploadResponse.data.url;
+        const imageUrl = uploaded.url;
 
         // Convert to base64 for AI analysis
         const base64 = await fileToBase64(file);
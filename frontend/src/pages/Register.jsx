@@ -8,6 +8,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/com
 import { toast } from "sonner";
 import { Building2, IconEye, IconEyeOff, Upload, X } from "@/components/SafeIcons";
 import { LoadingSpinner } from "@/components/ui/loading-spinner";
+import { uploadDirect } from "@/lib/directUpload";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -78,18 +79,11 @@ const Register = () => {
     // Upload logo
     setUploadingLogo(true);
     try {
-      const formData = new FormData();
-      formData.append('file', file);
-
-      const response = await axios.post(`${API}/upload-logo`, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data'
-        }
-      });
+      const uploaded = await uploadDirect(file, { kind: "logo" });
 
       setFormData(prev => ({
         ...prev,
-        logo_url: response.data.logo_url
+        logo_url: uploaded.logo_url
       }));
       toast.success("Logo subido exitosamente");
     } catch (error) {
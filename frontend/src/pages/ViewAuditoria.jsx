@@ -88,7 +88,10 @@ const ViewAuditoria = () => {
       setAuditoria(auditoriaRes.data);
       setCompany(auditoriaRes.data.company);
 
-      const standardsRes = await axios.get(`${API}/standards`, { headers });
+      const standardsRes = await axios.get(`${API}/standards`, {
+        headers,
+        params: { catalog: auditoriaRes.data.catalog_id, version: auditoriaRes.data.catalog_version }
+      });
       setStandards(standardsRes.data);
 
       // Inicializar datos de hallazgos con responsables y fechas vacíos
@@ -38,11 +38,14 @@ const ViewInspection = () => {
       const token = localStorage.getItem("token");
       const headers = { Authorization: `Bearer ${token}` };
 
-      const [inspectionRes, standardsRes, allInspectionsRes] = await Promise.all([
+      const [inspectionRes, allInspectionsRes] = await Promise.all([
         axios.get(`${API}/inspections/${id}`, { headers }),
-        axios.get(`${API}/standards`, { headers }),
         axios.get(`${API}/inspections`, { headers })
       ]);
+      const standardsRes = await axios.get(`${API}/standards`, {
+        headers,
+        params: { catalog: inspectionRes.data.catalog_id, version: inspectionRes.data.catalog_version }
+      });
 
       setInspection(inspectionRes.data);
       setStandards(standardsRes.data);
@@ -0,0 +1,375 @@
+"""
+Offline load test for the AuditX audit workflow.
+
+Boots the FastAPI app in a subprocess against a local mongod (a throwaway
+database), with the stub LLM provider (LLM_PROVIDER=stub) and the local storage
+backend (STORAGE_BACKEND=local) instead of Firebase Storage, and drives concurrent virtual auditors through a realistic session:
+
+    login -> list inspections -> autosave bursts -> AI recommendations
+          -> AI analysis -> PDF download
+
+Reports p50/p95/p99 latency, throughput and errors per endpoint.
+
+Usage:
+    python load_test.py --users 20 --iterations 5
+    python load_test.py --start-mongod --users 50 --json results.json
+    python load_test.py --start-mongod --replica-set 3   # secondary reads + causal tokens
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+BACKEND_DIR = ROOT_DIR / "backend"
+
+# ====================
+# SERVER PROCESS (stubs + uvicorn)
+# ====================
+
+def serve(port: int):
+    """Run the API (executed in the child process; external services are selected through the environment)"""
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import server
+
+    import uvicorn
+    uvicorn.run(server.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+# ====================
+# LOAD DRIVER
+# ====================
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank method
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class LoadTester:
+    def __init__(self, base_url, users, iterations, autosave_burst, recommendations, superadmin_email):
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.users = users
+        self.iterations = iterations
+        self.autosave_burst = autosave_burst
+        self.recommendations = recommendations
+        self.superadmin_email = superadmin_email
+        self.samples = defaultdict(list)  # endpoint -> [(latency_s, status)]
+        self.standards = {}  # company_id -> standards of the catalog that applies to it
+        self.causal_token = None  # echoed like the frontend does, so reads see earlier writes
+
+    async def _send_causal_token(self, request):
+        if self.causal_token:
+            request.headers["X-Causal-Token"] = self.causal_token
+
+    async def _store_causal_token(self, response):
+        token = response.headers.get("X-Causal-Token")
+        if token:
+            self.causal_token = token
+
+    async def call(self, client, name, method, path, expected=(200,), **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, f"{self.api_url}/{path}", **kwargs)
+            status = response.status_code
+        except Exception:
+            response, status = None, 0
+        self.samples[name].append((time.perf_counter() - start, status))
+        if status not in expected:
+            return None
+        return response
+
+    async def setup_user(self, client, admin_headers, index):
+        email = f"loadtest_{index}_{uuid.uuid4().hex[:8]}@example.com"
+        password = "LoadTest#2024"
+        await self.call(client, "POST /auth/register", "POST", "auth/register", json={
+            "email": email,
+            "password": password,
+            "company_name": f"Empresa Carga {index}",
+            "admin_name": "Auditor de Carga",
+            "address": "Calle 1 # 2-3",
+            "phone": "3000000000",
+            "nivel_riesgo": str(random.randint(1, 5)),
+            "numero_trabajadores": random.randint(5, 500),
+        })
+        companies = await client.get(f"{self.api_url}/admin/pending-companies", headers=admin_headers)
+        company = next(c for c in companies.json() if c["user_email"] == email)
+        await client.post(f"{self.api_url}/admin/activate-company/{company['id']}", headers=admin_headers)
+        self.standards[company["id"]] = (await client.get(f"{self.api_url}/standards", headers=admin_headers,
+                                                          params={"company_id": company["id"]})).json()
+        return email, password, company["id"]
+
+    def random_responses(self, standards, count):
+        chosen = random.sample(standards, min(count, len(standards)))
+        return [{
+            "standard_id": s["id"],
+            "response": random.choice(["cumple", "no_cumple", "no_aplica"]),
+            "observations": "Observación de prueba de carga " * random.randint(1, 6),
+            "evidence_images": [],
+        } for s in chosen]
+
+    async def virtual_auditor(self, client, email, password, company_id):
+        standards = self.standards[company_id]
+        for _ in range(self.iterations):
+            login = await self.call(client, "POST /auth/login", "POST", "auth/login",
+                                    json={"email": email, "password": password})
+            if not login:
+                continue
+            headers = {"Authorization": f"Bearer {login.json()['token']}"}
+
+            await self.call(client, "GET /inspections", "GET", "inspections", headers=headers)
+
+            config = await self.call(client, "POST /configuraciones-auditoria", "POST", "configuraciones-auditoria",
+                                     headers=headers, json={
+                                         "company_id": company_id,
+                                         "fecha_inicio": "2024-01-15",
+                                         "alcance": "Evaluación completa del SG-SST",
+                                         "tipo_auditoria": "SST",
+                                     })
+            if not config:
+                continue
+            auditoria = await self.call(client, "POST /auditorias", "POST", "auditorias", headers=headers,
+                                        json={"company_id": company_id, "config_id": config.json()["id"]})
+            if not auditoria:
+                continue
+            auditoria_id = auditoria.json()["id"]
+
+            # Autosave burst: the UI saves as the auditor answers standard after standard
+            for step in range(1, self.autosave_burst + 1):
+                answered = int(len(standards) * step / self.autosave_burst)
+                await self.call(client, "PUT /auditorias/{id}/save", "PUT", f"auditorias/{auditoria_id}/save",
+                                headers=headers, json=self.random_responses(standards, answered))
+                await asyncio.sleep(random.uniform(0.0, 0.05))
+
+            for standard in random.sample(standards, min(self.recommendations, len(standards))):
+                await self.call(client, "POST /ai/standard-recommendation", "POST", "ai/standard-recommendation",
+                                headers=headers, json={
+                                    "standard_id": standard["id"],
+                                    "standard_title": standard["title"],
+                                    "standard_description": standard["description"],
+                                    "metodo_verificacion": standard["metodo_verificacion"],
+                                    "criterio": standard["criterio"],
+                                    "response": "no_cumple",
+                                    "audit_config_id": config.json()["id"],
+                                })
+
+            await self.call(client, "GET /inspections/{id}", "GET", f"inspections/{auditoria_id}", headers=headers)
+            await self.call(client, "POST /analyze-inspection", "POST", "analyze-inspection",
+                            headers=headers, json={"inspection_id": auditoria_id})
+            await self.call(client, "GET /generate-pdf/{id}", "GET", f"generate-pdf/{auditoria_id}", headers=headers)
+
+    async def run(self):
+        import httpx
+
+        limits = httpx.Limits(max_connections=self.users * 2, max_keepalive_connections=self.users * 2)
+        hooks = {"request": [self._send_causal_token], "response": [self._store_causal_token]}
+        async with httpx.AsyncClient(timeout=120, limits=limits, event_hooks=hooks) as client:
+            admin = await client.post(f"{self.api_url}/auth/login",
+                                      json={"email": self.superadmin_email, "password": "admin123"})
+            admin.raise_for_status()
+            admin_headers = {"Authorization": f"Bearer {admin.json()['token']}"}
+
+            print(f"Seeding {self.users} companies...")
+            accounts = [await self.setup_user(client, admin_headers, i) for i in range(self.users)]
+            self.samples.clear()
+
+            print(f"Running {self.users} virtual auditors x {self.iterations} iterations...")
+            start = time.perf_counter()
+            await asyncio.gather(*(self.virtual_auditor(client, *account) for account in accounts))
+            return time.perf_counter() - start
+
+    def report(self, elapsed):
+        rows = []
+        for name, samples in sorted(self.samples.items()):
+            latencies = sorted(s[0] for s in samples)
+            errors = sum(1 for s in samples if s[1] == 0 or s[1] >= 400)
+            rows.append({
+                "endpoint": name,
+                "requests": len(samples),
+                "errors": errors,
+                "throughput_rps": len(samples) / elapsed if elapsed else 0,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+            })
+
+        print("\n" + "=" * 100)
+        print(f"{'ENDPOINT':<38}{'REQS':>7}{'ERR':>6}{'RPS':>9}{'P50 ms':>12}{'P95 ms':>12}{'P99 ms':>12}")
+        print("=" * 100)
+        for row in rows:
+            print(f"{row['endpoint']:<38}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>9.2f}"
+                  f"{row['p50_ms']:>12.1f}{row['p95_ms']:>12.1f}{row['p99_ms']:>12.1f}")
+        total = sum(r["requests"] for r in rows)
+        print("=" * 100)
+        print(f"Total: {total} requests in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} req/s)")
+        return {"elapsed_s": elapsed, "total_requests": total, "endpoints": rows}
+
+
+def start_mongod(workdir):
+    port = free_port()
+    dbpath = Path(workdir) / "db"
+    dbpath.mkdir()
+    process = subprocess.Popen(
+        ["mongod", "--dbpath", str(dbpath), "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+    )
+    return process, f"mongodb://127.0.0.1:{port}"
+
+
+def start_replica_set(workdir, members, name="auditx_rs", timeout=60):
+    """Launch `members` local mongod processes as a replica set and wait for a primary"""
+    from pymongo import MongoClient
+
+    ports = [free_port() for _ in range(members)]
+    processes = []
+    for index, port in enumerate(ports):
+        dbpath = Path(workdir) / f"rs{index}"
+        dbpath.mkdir()
+        processes.append(subprocess.Popen(
+            ["mongod", "--replSet", name, "--dbpath", str(dbpath), "--port", str(port),
+             "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL,
+        ))
+
+    config = {"_id": name, "members": [
+        {"_id": i, "host": f"127.0.0.1:{port}", "priority": 2 if i == 0 else 1} for i, port in enumerate(ports)
+    ]}
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            MongoClient(f"mongodb://127.0.0.1:{ports[0]}", directConnection=True).admin.command("replSetInitiate", config)
+            break
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+    hosts = ",".join(f"127.0.0.1:{port}" for port in ports)
+    url = f"mongodb://{hosts}/?replicaSet={name}"
+    MongoClient(url, serverSelectionTimeoutMS=timeout * 1000).admin.command("ping")
+    return processes, url
+
+
+async def wait_for_server(base_url, timeout=60):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get(f"{base_url}/ready")
+                if response.status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the AuditX API")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual auditors")
+    parser.add_argument("--iterations", type=int, default=3, help="audit sessions per auditor")
+    parser.add_argument("--autosave-burst", type=int, default=8, help="saves per audit session")
+    parser.add_argument("--recommendations", type=int, default=3, help="AI recommendations per session")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=300)
+    parser.add_argument("--llm-latency-distribution", choices=["fixed", "normal", "lognormal"], default="lognormal")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0, help="stub streaming rate (0 = instant)")
+    parser.add_argument("--llm-failure-rate", type=float, default=0)
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://127.0.0.1:27017"))
+    parser.add_argument("--start-mongod", action="store_true", help="launch a throwaway mongod")
+    parser.add_argument("--replica-set", type=int, default=0,
+                        help="with --start-mongod: launch N members and route tolerant reads to secondaries")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return 0
+
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="auditx_loadtest_")
+    mongods = []
+    if args.start_mongod and args.replica_set:
+        mongods, args.mongo_url = start_replica_set(workdir, args.replica_set)
+    elif args.start_mongod:
+        mongod, args.mongo_url = start_mongod(workdir)
+        mongods = [mongod]
+
+    db_name = f"auditx_loadtest_{uuid.uuid4().hex[:8]}"
+    superadmin_email = "loadtest-admin@example.com"
+    uploads_dir = Path(workdir) / "uploads"
+    uploads_dir.mkdir()
+    env = {
+        **os.environ,
+        "MONGO_URL": args.mongo_url,
+        "DB_NAME": db_name,
+        "JWT_SECRET": uuid.uuid4().hex,
+        "LLM_PROVIDER": "stub",
+        "SUPERADMIN_EMAIL": superadmin_email,
+        "UPLOADS_DIR": str(uploads_dir),
+        "STORAGE_BACKEND": "local",
+        "SMTP_PASSWORD": "",
+        "LLM_STUB_LATENCY_MS": str(args.llm_latency_ms),
+        "LLM_STUB_LATENCY_JITTER_MS": str(args.llm_jitter_ms),
+        "LLM_STUB_LATENCY_DISTRIBUTION": args.llm_latency_distribution,
+        "LLM_STUB_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+        "LLM_STUB_FAILURE_RATE": str(args.llm_failure_rate),
+    }
+    if args.replica_set:
+        env["MONGO_SECONDARY_READS"] = "1"
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen([sys.executable, __file__, "--serve", str(port)], env=env, cwd=str(BACKEND_DIR))
+    try:
+        asyncio.run(wait_for_server(base_url))
+        tester = LoadTester(base_url, args.users, args.iterations, args.autosave_burst,
+                            args.recommendations, superadmin_email)
+        elapsed = asyncio.run(tester.run())
+        results = tester.report(elapsed)
+        results["config"] = {k: v for k, v in vars(args).items() if k not in ("serve", "json")}
+        if args.json:
+            Path(args.json).write_text(json.dumps(results, indent=2))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        try:
+            from pymongo import MongoClient
+            MongoClient(args.mongo_url).drop_database(db_name)
+        except Exception as e:
+            print(f"No se pudo eliminar la base de datos {db_name}: {e}")
+        for mongod in mongods:
+            mongod.terminate()
+        for mongod in mongods:
+            mongod.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Backfill of the keyed response map for existing inspections (see
+backend/response_map.py).
+
+Converts inspections whose `responses` is still a list, in batches ordered by
+_id. Progress is checkpointed in the `migrations` collection after every
+batch, so the command can be interrupted and run again to resume. The API
+reads both formats meanwhile, so it is safe to run with the server up.
+
+Usage:
+    python migrate_responses.py                      # run to completion
+    python migrate_responses.py --batch-size 200 --max-batches 10
+    python migrate_responses.py --status
+    python migrate_responses.py --restart            # ignore the checkpoint
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from dotenv import load_dotenv  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from response_map import MIGRATION_BATCH_SIZE, migration_status, run_migration  # noqa: E402
+
+
+async def run(args) -> int:
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.status:
+            state = await migration_status(db)
+        else:
+            state = await run_migration(db, args.batch_size, args.max_batches, args.restart)
+    finally:
+        client.close()
+
+    print(json.dumps(state, indent=2, default=str))
+    return 0 if state.get("status") in ("completed", "paused", "pending", "running") else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the keyed response map of inspections")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, help="stop after this many batches (resume later)")
+    parser.add_argument("--restart", action="store_true", help="start from the first inspection")
+    parser.add_argument("--status", action="store_true", help="only print the migration state")
+    args = parser.parse_args()
+
+    load_dotenv(ROOT_DIR / "backend" / ".env")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
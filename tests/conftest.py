@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend modules import each other as top-level modules (as uvicorn runs them from backend/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from tests.fake_db import FakeDatabase  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
@@ -0,0 +1,62 @@
+"""Async stand-in for a Motor database, backed by mongomock"""
+import mongomock
+
+
+class FakeCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, count):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        documents = list(self._cursor)
+        return documents if length is None else documents[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._cursor:
+            yield document
+
+
+class FakeCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def find_one_and_update(self, filter, update, *args, **kwargs):
+        # mongomock looks the document up again with `filter` after updating,
+        # which misses it when the update changed a filtered field
+        found = self._collection.find_one(filter, {"_id": 1})
+        if found is None:
+            if not kwargs.get("upsert"):
+                return None
+            return self._collection.find_one_and_update(filter, update, *args, **kwargs)
+        return self._collection.find_one_and_update({"_id": found["_id"]}, update, *args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        return FakeCursor(self._collection.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class FakeDatabase:
+    def __init__(self):
+        self._db = mongomock.MongoClient().db
+
+    def __getitem__(self, name):
+        return FakeCollection(self._db[name])
+
+    def __getattr__(self, name):
+        return self[name]
@@ -0,0 +1,85 @@
+import asyncio
+
+from response_map import changes_since, response_key, set_responses, version_filter
+from standards_catalog import CATALOGS, LEGACY_CATALOG
+
+FIRST, SECOND, THIRD = [standard["id"] for standard in CATALOGS.get(*LEGACY_CATALOG).standards[:3]]
+
+
+def inspection_at_version_5():
+    return {
+        "id": "a1",
+        "version": 5,
+        "status": "en_proceso",
+        "total_score": 40.0,
+        "progress": 2.0,
+        "responses": {
+            response_key(FIRST): {"standard_id": FIRST, "response": "cumple", "rev": 2},
+            response_key(THIRD): {"standard_id": THIRD, "response": "no_cumple", "rev": 5},
+        },
+        "removed_responses": {
+            response_key(SECOND): {"standard_id": SECOND, "rev": 4},
+        },
+    }
+
+
+def test_changes_since_returns_only_newer_revisions():
+    delta = changes_since(inspection_at_version_5(), 3)
+    assert delta["full"] is False
+    assert delta["version"] == 5
+    assert [r["standard_id"] for r in delta["responses"]] == [THIRD]
+    assert delta["removed"] == [SECOND]
+    assert (delta["status"], delta["total_score"], delta["progress"]) == ("en_proceso", 40.0, 2.0)
+
+
+def test_changes_since_current_version_is_empty():
+    delta = changes_since(inspection_at_version_5(), 5)
+    assert delta["full"] is False
+    assert delta["responses"] == [] and delta["removed"] == []
+
+
+def test_changes_since_unknown_version_sends_everything():
+    for since in (0, -1, 9):
+        delta = changes_since(inspection_at_version_5(), since)
+        assert delta["full"] is True
+        assert [r["standard_id"] for r in delta["responses"]] == [FIRST, THIRD]
+        assert delta["removed"] == []
+
+
+def test_changes_since_legacy_document():
+    delta = changes_since({"responses": [{"standard_id": FIRST, "response": "cumple"}]}, 0)
+    assert delta["version"] == 0 and delta["full"] is True
+    assert len(delta["responses"]) == 1
+
+
+def test_version_filter_treats_unversioned_documents_as_zero(db):
+    async def scenario():
+        await db.inspections.insert_many([{"id": "none"}, {"id": "zero", "version": 0}, {"id": "one", "version": 1}])
+        return sorted([d["id"] async for d in db.inspections.find(version_filter(0))])
+
+    assert asyncio.run(scenario()) == ["none", "zero"]
+
+
+def test_concurrent_writers_on_the_same_version_conflict(db):
+    async def save(inspection, responses):
+        version = inspection.get("version", 0)
+        update = set_responses({"$inc": {"version": 1}}, inspection, responses, rev=version + 1)
+        result = await db.inspections.update_one({"id": inspection["id"], **version_filter(version)}, update)
+        return result.modified_count == 1
+
+    async def scenario():
+        await db.inspections.insert_one(inspection_at_version_5())
+        seen_by_a = await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+        seen_by_b = await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+        a_saved = await save(seen_by_a, [{"standard_id": FIRST, "response": "no_aplica"}])
+        b_saved = await save(seen_by_b, [{"standard_id": FIRST, "response": "no_cumple"}])
+        return a_saved, b_saved, await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+
+    a_saved, b_saved, stored = asyncio.run(scenario())
+    assert (a_saved, b_saved) == (True, False)
+    assert stored["version"] == 6
+    assert stored["responses"][response_key(FIRST)] == {"standard_id": FIRST, "response": "no_aplica", "rev": 6}
+
+    delta = changes_since(stored, 5)
+    assert [r["standard_id"] for r in delta["responses"]] == [FIRST]
+    assert delta["removed"] == [THIRD]
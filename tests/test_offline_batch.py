@@ -0,0 +1,134 @@
+import asyncio
+from types import SimpleNamespace
+
+from offline_batch import apply_batch, fold_operations, replayed_outcomes
+from response_map import response_key
+from standards_catalog import CATALOGS, LEGACY_CATALOG
+
+FIRST, SECOND = [standard["id"] for standard in CATALOGS.get(*LEGACY_CATALOG).standards[:2]]
+
+
+def operation(op_id, type="responses", auditoria_id="a1", base_version=None, responses=(), **fields):
+    return SimpleNamespace(op_id=op_id, type=type, auditoria_id=auditoria_id, base_version=base_version,
+                           responses=list(responses), recommendation=fields.get("recommendation"),
+                           image_analysis=fields.get("image_analysis"), image_url=fields.get("image_url"),
+                           filename=fields.get("filename"))
+
+
+def change(standard_id, response="cumple"):
+    return {"standard_id": standard_id, "response": response}
+
+
+async def insert_inspection(db, **fields):
+    await db.inspections.insert_one({"id": "a1", "version": 2, "status": "en_proceso", "responses": {
+        response_key(FIRST): {"standard_id": FIRST, "response": "no_cumple", "rev": 2},
+    }, **fields})
+    return await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+
+
+def test_applied_operations_are_written_once_and_recorded(db):
+    async def scenario():
+        inspection = await insert_inspection(db)
+        batch = await apply_batch(db, {"a1": inspection}, [operation("op1", base_version=2, responses=[change(SECOND)])], {})
+        return batch, await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+
+    batch, stored = asyncio.run(scenario())
+    assert batch["results"][0]["status"] == "applied"
+    assert batch["auditorias"]["a1"]["version"] == 3
+    assert stored["version"] == 3
+    assert stored["responses"][response_key(SECOND)]["rev"] == 3
+    assert [entry["op_id"] for entry in stored["applied_ops"]] == ["op1"]
+
+
+def test_resent_batch_replays_stored_outcomes_without_writing(db):
+    operations = [operation("op1", responses=[change(SECOND)])]
+
+    async def scenario():
+        inspection = await insert_inspection(db)
+        first = await apply_batch(db, {"a1": inspection}, operations, {})
+
+        inspection = await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+        replayed = replayed_outcomes({"a1": inspection}, operations)
+        second = await apply_batch(db, {"a1": inspection}, operations, {}, rejected=replayed)
+        return first, second, await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+
+    first, second, stored = asyncio.run(scenario())
+    assert second["results"] == [{**first["results"][0], "replayed": True}]
+    assert second["auditorias"] == {}
+    assert stored["version"] == 3
+    assert len(stored["applied_ops"]) == 1
+
+
+def test_standards_changed_after_base_version_conflict():
+    inspection = {"id": "a1", "version": 4, "responses": {
+        response_key(FIRST): {"standard_id": FIRST, "response": "no_cumple", "rev": 4},
+        response_key(SECOND): {"standard_id": SECOND, "response": "cumple", "rev": 1},
+    }}
+    merged, outcomes = fold_operations(inspection, [
+        operation("partial", base_version=2, responses=[change(FIRST), change(SECOND, "no_aplica")]),
+        operation("conflict", base_version=2, responses=[change(FIRST), change("no-existe")]),
+    ], {})
+
+    assert outcomes[0]["status"] == "partial"
+    assert outcomes[0]["applied"] == [SECOND]
+    assert outcomes[0]["conflicts"] == [{"standard_id": FIRST, "reason": "modified",
+                                         "server": inspection["responses"][response_key(FIRST)]}]
+    assert outcomes[1]["status"] == "conflict"
+    assert [c["reason"] for c in outcomes[1]["conflicts"]] == ["modified", "unknown_standard"]
+    assert merged[response_key(FIRST)]["response"] == "no_cumple"
+    assert merged[response_key(SECOND)]["response"] == "no_aplica"
+
+
+def test_later_operations_build_on_earlier_ones_of_the_same_batch():
+    inspection = {"id": "a1", "version": 4, "responses": {
+        response_key(FIRST): {"standard_id": FIRST, "response": "no_cumple", "rev": 4},
+    }}
+    merged, outcomes = fold_operations(inspection, [
+        operation("current", base_version=4, responses=[change(FIRST, "cumple")]),
+        operation("older", base_version=2, responses=[change(FIRST, "no_aplica")]),
+    ], {})
+    assert [o["status"] for o in outcomes] == ["applied", "applied"]
+    assert merged[response_key(FIRST)]["response"] == "no_aplica"
+
+
+def test_inspection_changed_during_the_batch_is_retried(db):
+    async def scenario():
+        stale = await insert_inspection(db)
+        await db.inspections.update_one({"id": "a1"}, {"$inc": {"version": 1}})
+        batch = await apply_batch(db, {"a1": stale}, [operation("op1", responses=[change(SECOND)])], {})
+        return batch, await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+
+    batch, stored = asyncio.run(scenario())
+    assert batch["results"][0]["status"] == "retry"
+    assert batch["auditorias"] == {}
+    assert response_key(SECOND) not in stored["responses"]
+    assert "applied_ops" not in stored
+
+
+def test_failed_llm_operations_do_not_write(db):
+    recommendation = operation("rec", type="recommendation",
+                               recommendation=SimpleNamespace(standard_id=FIRST))
+
+    async def scenario():
+        inspection = await insert_inspection(db)
+        batch = await apply_batch(db, {"a1": inspection}, [recommendation], {"rec": {"error": "sin cupo"}})
+        return batch, await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+
+    batch, stored = asyncio.run(scenario())
+    assert batch["results"][0]["status"] == "failed"
+    assert batch["results"][0]["error"] == "sin cupo"
+    assert stored["version"] == 2
+
+
+def test_rejected_operations_keep_their_outcome(db):
+    async def scenario():
+        inspection = await insert_inspection(db)
+        rejected = {"op2": {"op_id": "op2", "status": "rejected", "error": "Auditoría cerrada"}}
+        return await apply_batch(db, {"a1": inspection}, [
+            operation("op1", responses=[change(SECOND)]),
+            operation("op2", auditoria_id="cerrada", responses=[change(FIRST)]),
+        ], {}, rejected=rejected)
+
+    batch = asyncio.run(scenario())
+    assert [r["status"] for r in batch["results"]] == ["applied", "rejected"]
+    assert list(batch["auditorias"]) == ["a1"]
@@ -0,0 +1,166 @@
+import asyncio
+
+from response_map import (
+    MIGRATION_ID, migrate_batch, migration_status, response_key, responses_list, responses_map, run_migration,
+    set_responses,
+)
+from standards_catalog import CATALOGS, LEGACY_CATALOG
+
+STANDARD_IDS = [standard["id"] for standard in CATALOGS.get(*LEGACY_CATALOG).standards[:3]]
+FIRST, SECOND, THIRD = STANDARD_IDS
+
+
+def answer(standard_id, response="cumple", **fields):
+    return {"standard_id": standard_id, "response": response, **fields}
+
+
+def test_response_key_replaces_dots():
+    assert response_key("1.1.1") == "1_1_1"
+
+
+def test_responses_map_indexes_by_key_and_keeps_last_duplicate():
+    mapped = responses_map([answer(FIRST, "no_cumple"), answer(SECOND), answer(FIRST), {"response": "sin estándar"}])
+    assert list(mapped) == [response_key(FIRST), response_key(SECOND)]
+    assert mapped[response_key(FIRST)]["response"] == "cumple"
+
+
+def test_responses_list_reads_both_formats():
+    legacy = {"responses": [answer(THIRD), answer(FIRST)]}
+    assert [r["standard_id"] for r in responses_list(legacy)] == [THIRD, FIRST]
+
+    keyed = {"responses": responses_map([answer(THIRD), answer(FIRST), answer(SECOND)])}
+    assert [r["standard_id"] for r in responses_list(keyed)] == [FIRST, SECOND, THIRD]
+    assert responses_list({}) == []
+
+
+def test_set_responses_on_map_writes_only_changed_paths():
+    inspection = {"version": 3, "responses": {
+        response_key(FIRST): answer(FIRST, rev=2),
+        response_key(SECOND): answer(SECOND, rev=3),
+    }}
+    update = set_responses({"$set": {"progress": 50}}, inspection,
+                           [answer(FIRST), answer(THIRD, "no_cumple")], rev=4)
+
+    assert update["$set"] == {
+        "progress": 50,
+        f"responses.{response_key(THIRD)}": answer(THIRD, "no_cumple", rev=4),
+        f"removed_responses.{response_key(SECOND)}": {"standard_id": SECOND, "rev": 4},
+    }
+    assert update["$unset"] == {f"responses.{response_key(SECOND)}": ""}
+
+
+def test_set_responses_readding_a_removed_standard_clears_its_tombstone():
+    inspection = {"version": 4, "responses": {},
+                  "removed_responses": {response_key(FIRST): {"standard_id": FIRST, "rev": 4}}}
+    update = set_responses({}, inspection, [answer(FIRST)], rev=5)
+    assert update["$set"] == {f"responses.{response_key(FIRST)}": answer(FIRST, rev=5)}
+    assert update["$unset"] == {f"removed_responses.{response_key(FIRST)}": ""}
+
+
+def test_set_responses_converts_legacy_array_as_a_whole():
+    inspection = {"version": 1, "responses": [answer(FIRST, rev=1), answer(SECOND)]}
+    update = set_responses({}, inspection, [answer(FIRST), answer(SECOND, "no_cumple")], rev=2)
+
+    assert update["$set"]["responses"] == {
+        response_key(FIRST): answer(FIRST, rev=1),
+        response_key(SECOND): answer(SECOND, "no_cumple", rev=2),
+    }
+    assert "$unset" not in update
+
+
+def test_set_responses_result_applies_to_the_stored_document(db):
+    async def scenario():
+        await db.inspections.insert_one({"id": "a1", "version": 1, "responses": [answer(FIRST), answer(SECOND)]})
+        inspection = await db.inspections.find_one({"id": "a1"})
+        await db.inspections.update_one({"id": "a1"}, set_responses({}, inspection, [answer(FIRST)], rev=2))
+
+        inspection = await db.inspections.find_one({"id": "a1"})
+        update = set_responses({}, inspection, [answer(FIRST), answer(THIRD)], rev=3)
+        await db.inspections.update_one({"id": "a1"}, update)
+        return await db.inspections.find_one({"id": "a1"}, {"_id": 0})
+
+    stored = asyncio.run(scenario())
+    assert [r["standard_id"] for r in responses_list(stored)] == [FIRST, THIRD]
+    assert "rev" not in stored["responses"][response_key(FIRST)]  # unchanged since before the conversion
+    assert stored["responses"][response_key(THIRD)]["rev"] == 3
+    assert stored["removed_responses"] == {response_key(SECOND): {"standard_id": SECOND, "rev": 2}}
+
+
+async def _insert_legacy(db, count):
+    for index in range(count):
+        await db.inspections.insert_one({"id": f"a{index}", "version": 1, "responses": [answer(FIRST), answer(SECOND)]})
+
+
+def test_migrate_batch_converts_from_the_checkpoint(db):
+    async def scenario():
+        await _insert_legacy(db, 3)
+        first = await migrate_batch(db, batch_size=2)
+        second = await migrate_batch(db, first["last_id"], batch_size=2)
+        third = await migrate_batch(db, second["last_id"], batch_size=2)
+        return first, second, third, await db.inspections.find_one({"id": "a0"})
+
+    first, second, third, migrated = asyncio.run(scenario())
+    assert (first["migrated"], second["migrated"], third["migrated"]) == (2, 1, 0)
+    assert third["last_id"] == second["last_id"]
+    assert migrated["responses"] == responses_map([answer(FIRST), answer(SECOND)])
+
+
+def test_migrate_batch_skips_documents_changed_since_read(db):
+    class RacingInspections:
+        """Bumps the version of every document between the batch read and its conditional update"""
+
+        def __init__(self, inspections):
+            self.inspections = inspections
+
+        def find(self, *args, **kwargs):
+            return self.inspections.find(*args, **kwargs)
+
+        async def update_one(self, filter, update):
+            await self.inspections.update_one({"_id": filter["_id"]}, {"$inc": {"version": 1}})
+            return await self.inspections.update_one(filter, update)
+
+    class RacingDatabase:
+        inspections = RacingInspections(db.inspections)
+
+    async def scenario():
+        await _insert_legacy(db, 2)
+        result = await migrate_batch(RacingDatabase())
+        return result, await db.inspections.count_documents({"responses": {"$type": "array"}})
+
+    result, remaining = asyncio.run(scenario())
+    assert (result["migrated"], result["skipped"]) == (0, 2)
+    assert remaining == 2
+
+
+def test_run_migration_resumes_from_saved_checkpoint(db):
+    async def scenario():
+        await _insert_legacy(db, 5)
+        paused = await run_migration(db, batch_size=2, max_batches=1)
+        checkpoint = await db.migrations.find_one({"id": MIGRATION_ID})
+        completed = await run_migration(db, batch_size=2)
+        return paused, checkpoint, completed
+
+    paused, checkpoint, completed = asyncio.run(scenario())
+    assert paused["status"] == "paused"
+    assert paused["remaining"] == 3
+    assert checkpoint["migrated"] == 2 and checkpoint["last_id"] is not None
+    assert completed["status"] == "completed"
+    assert completed["migrated"] == 5
+    assert completed["remaining"] == 0
+
+
+def test_run_migration_restart_ignores_checkpoint(db):
+    async def scenario():
+        await _insert_legacy(db, 2)
+        await run_migration(db, batch_size=1, max_batches=1)
+        # A document older than the checkpoint is still in the array format
+        await db.inspections.update_one({"id": "a0"}, {"$set": {"responses": [answer(FIRST)]}})
+        resumed = await run_migration(db, batch_size=1)
+        restarted = await run_migration(db, batch_size=1, restart=True)
+        return resumed, restarted, await migration_status(db)
+
+    resumed, restarted, status = asyncio.run(scenario())
+    assert resumed["status"] == "partial"
+    assert resumed["remaining"] == 1
+    assert restarted["status"] == "completed"
+    assert status["remaining"] == 0